@@ -0,0 +1,196 @@
+import os
+import mmap
+import asyncio
+import hashlib
+import tempfile
+import logging
+
+from sqlalchemy import text, bindparam
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# 오디오 원본 저장소 (내용 주소 기반, 로컬 디렉터리)
+# - 업로드는 청크 단위로 임시 파일에 쓰면서 SHA-256을 계산하고,
+#   끝나면 <STORE_DIR>/<해시 앞 2자리>/<다음 2자리>/<해시>.<포맷> 으로 os.replace (원자적 교체)
+# - AUDIO_STORAGE 행에는 FILE_HASH / FILE_SIZE / FILE_FORMAT 만 저장 (FILE blob은 NULL)
+#   → DB 크기, 백업 시간, 버퍼 풀 사용량이 오디오 양에 비례해 늘지 않음
+# - 같은 내용은 같은 경로이므로 재전송/중복 파일은 한 벌만 보관
+# - 읽는 쪽(/bundle, 워커 db 소스)은 경로 또는 mmap으로 접근
+# - 이전 방식으로 FILE blob만 있는 행은 read_row_bytes()로 그대로 읽힘
+#   (scripts/migrate_audio_blobs.py로 저장소로 옮길 수 있음)
+# - 어떤 행도 가리키지 않는 파일은 remove_unreferenced()로 삭제
+#   (업로드 DB 실패 시, 회차 삭제 시, scripts/gc_audio_store.py)
+# ============================================
+STORE_DIR = os.getenv(
+    "AUDIO_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "audio_store"),
+)
+CHUNK_SIZE = 1024 * 1024
+
+
+def _normalize_format(file_format: str) -> str:
+    return (file_format or "").lower().lstrip(".")
+
+
+def path_for(file_hash: str, file_format: str) -> str:
+    """해시/포맷에 해당하는 저장 경로 (존재 여부는 확인하지 않음)"""
+    return os.path.join(
+        STORE_DIR, file_hash[:2], file_hash[2:4], f"{file_hash}.{_normalize_format(file_format)}"
+    )
+
+
+def _new_temp(file_format: str):
+    tmp_dir = os.path.join(STORE_DIR, "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+    return tempfile.mkstemp(dir=tmp_dir, suffix=f".{_normalize_format(file_format)}.part")
+
+
+def _touch(path: str):
+    """같은 내용이 다시 저장됨 → 수정 시각 갱신 (remove_unreferenced가 진행 중인 업로드의 파일을 지우지 않게)"""
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass
+
+
+def _commit_temp(tmp_path: str, file_hash: str, file_format: str) -> str:
+    """임시 파일을 최종 경로로 원자적 이동. 같은 내용이 이미 있으면 임시 파일만 삭제"""
+    path = path_for(file_hash, file_format)
+    if os.path.exists(path):
+        os.unlink(tmp_path)
+        _touch(path)
+        return path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _write_and_hash(out, hasher, chunk):
+    hasher.update(chunk)
+    out.write(chunk)
+
+
+async def save_upload(file, file_format: str, chunk_size: int = CHUNK_SIZE):
+    """
+    FastAPI UploadFile을 메모리에 모으지 않고 저장소로 스트리밍
+    청크별 해시/쓰기, fsync, rename은 모두 스레드에서 실행 (이벤트 루프는 다른 요청을 계속 처리)
+    Returns: (file_hash, file_size, path)
+    """
+    hasher = hashlib.sha256()
+    size = 0
+    fd, tmp_path = _new_temp(file_format)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+                # SHA-256과 파일 쓰기는 GIL을 놓으므로 스레드에서 실행하면 루프를 막지 않음
+                await asyncio.to_thread(_write_and_hash, out, hasher, chunk)
+                size += len(chunk)
+            await asyncio.to_thread(out.flush)
+            # fsync/rename은 디스크 대기가 길 수 있으므로 이벤트 루프 밖에서 실행
+            await asyncio.to_thread(os.fsync, out.fileno())
+        file_hash = hasher.hexdigest()
+        path = await asyncio.to_thread(_commit_temp, tmp_path, file_hash, file_format)
+        return file_hash, size, path
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def save_bytes(data: bytes, file_format: str):
+    """메모리의 바이트(이전 FILE blob 등) 저장. Returns: (file_hash, file_size, path)"""
+    file_hash = hashlib.sha256(data).hexdigest()
+    path = path_for(file_hash, file_format)
+    if os.path.exists(path):
+        _touch(path)
+        return file_hash, len(data), path
+    fd, tmp_path = _new_temp(file_format)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            out.write(data)
+            out.flush()
+            os.fsync(out.fileno())
+        return file_hash, len(data), _commit_temp(tmp_path, file_hash, file_format)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def open_path(file_hash: str, file_format: str) -> str:
+    """저장된 파일 경로. 없으면 FileNotFoundError"""
+    path = path_for(file_hash, file_format)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"오디오 저장소에 파일 없음: {file_hash}.{_normalize_format(file_format)}")
+    return path
+
+
+def open_mmap(file_hash: str, file_format: str) -> mmap.mmap:
+    """읽기 전용 memory-map (호출 측에서 close). 빈 파일은 mmap할 수 없으므로 ValueError"""
+    with open(open_path(file_hash, file_format), "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def row_path(row):
+    """
+    AUDIO_STORAGE 행(mapping)의 저장소 경로. 저장소에 없는 이전 행이면 None
+    (FILE_HASH, FILE_FORMAT 컬럼을 함께 조회해야 함)
+    """
+    file_hash, file_format = row.get("FILE_HASH"), row.get("FILE_FORMAT")
+    if not file_hash or not file_format:
+        return None
+    path = path_for(file_hash, file_format)
+    return path if os.path.exists(path) else None
+
+
+def read_row_bytes(row) -> bytes:
+    """행의 오디오 바이트: 저장소 파일 우선, 없으면 이전 FILE blob"""
+    path = row_path(row)
+    if path is not None:
+        with open(path, "rb") as f:
+            return f.read()
+    data = row.get("FILE")
+    if data is None:
+        raise FileNotFoundError(f"오디오 없음: FILE_HASH={row.get('FILE_HASH')}")
+    return data
+
+
+def remove_unreferenced(db, files, saved_before: float = None, dry_run: bool = False) -> int:
+    """
+    files: [(file_hash, file_format), ...] 중 AUDIO_STORAGE 행이 가리키지 않는 저장소 파일 삭제
+    saved_before: 지정 시 수정 시각이 이보다 늦은 파일은 건너뜀
+                  (그 사이 같은 내용이 다시 업로드되어 아직 커밋 전일 수 있음)
+    dry_run: 삭제하지 않고 대상 수만 계산
+    Returns: 삭제한(dry_run이면 삭제할) 파일 수
+    """
+    files = {(file_hash, _normalize_format(file_format)) for file_hash, file_format in files if file_hash}
+    if not files:
+        return 0
+    rows = db.execute(
+        text("""
+            SELECT DISTINCT FILE_HASH, FILE_FORMAT
+            FROM AUDIO_STORAGE
+            WHERE FILE_HASH IN :hashes
+        """).bindparams(bindparam("hashes", expanding=True)),
+        {"hashes": sorted({file_hash for file_hash, _ in files})}
+    ).fetchall()
+    referenced = {(file_hash, _normalize_format(file_format)) for file_hash, file_format in rows}
+
+    removed = 0
+    for file_hash, file_format in sorted(files - referenced):
+        path = path_for(file_hash, file_format)
+        try:
+            if saved_before is not None and os.stat(path).st_mtime > saved_before:
+                continue
+            if not dry_run:
+                os.unlink(path)
+            removed += 1
+        except FileNotFoundError:
+            continue
+    if removed and not dry_run:
+        logger.info(f"오디오 저장소: 참조 없는 파일 {removed}개 삭제")
+    return removed
@@ -2,50 +2,145 @@ from sqlalchemy import create_engine, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
+import logging
+import threading
 from dotenv import load_dotenv
 from pathlib import Path
 import importlib.util
 
+logger = logging.getLogger(__name__)
+
 # .env 파일 로드
 env_path = Path(__file__).parent.parent / ".env"
 load_dotenv(dotenv_path=env_path)
 
-# DB URL 구성: 사용 가능한 MySQL 드라이버를 자동 선택
-driver = None
-try:
-    importlib.import_module("mysql.connector")
-    driver = "mysqlconnector"
-except ImportError:
-    try:
-        importlib.import_module("pymysql")
-        driver = "pymysql"
-    except ImportError:
-        raise ImportError(
-            "MySQL Python 드라이버가 설치되어 있지 않습니다. "
-            "mysql-connector-python 또는 PyMySQL을 설치하세요."
-        )
-
-DATABASE_URL = (
-    f"mysql+{driver}://{os.getenv('db_username')}:"
-    f"{os.getenv('db_password')}@{os.getenv('db_host')}:"
-    f"{os.getenv('db_port', 3306)}/{os.getenv('db_database')}"
-)
-
-print(
-    f"[DEBUG] Database URL: mysql+{driver}://{os.getenv('db_username')}:***@"
-    f"{os.getenv('db_host')}:{os.getenv('db_port')}/{os.getenv('db_database')}"
-)
-
-engine = create_engine(
-    DATABASE_URL, 
-    pool_pre_ping=True,
-    pool_recycle=3600,
-    echo=False  # SQL 로깅 끄기
-)
-
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# 엔진은 import 시점이 아니라 첫 세션 생성 시 만든다 (API 기동 시간 단축, DB 없이도 import 가능)
+_ENGINE = None
+_ASYNC_ENGINE = None
+_ENGINE_LOCK = threading.Lock()
+
+# 비동기 엔진 커넥션 풀 (동시 업로드 처리량은 이벤트 루프가 아니라 커넥션 수에 비례)
+ASYNC_POOL_SIZE = int(os.getenv("DB_ASYNC_POOL_SIZE", "10"))
+ASYNC_MAX_OVERFLOW = int(os.getenv("DB_ASYNC_MAX_OVERFLOW", "10"))
+
+
+def _detect_driver():
+    """사용 가능한 MySQL 드라이버를 자동 선택"""
+    if importlib.util.find_spec("mysql.connector") is not None:
+        return "mysqlconnector"
+    if importlib.util.find_spec("pymysql") is not None:
+        return "pymysql"
+    raise ImportError(
+        "MySQL Python 드라이버가 설치되어 있지 않습니다. "
+        "mysql-connector-python 또는 PyMySQL을 설치하세요."
+    )
+
+
+def _detect_async_driver():
+    """비동기 엔드포인트용 MySQL 드라이버 (aiomysql)"""
+    if importlib.util.find_spec("aiomysql") is not None:
+        return "aiomysql"
+    if importlib.util.find_spec("asyncmy") is not None:
+        return "asyncmy"
+    raise ImportError(
+        "비동기 MySQL 드라이버가 설치되어 있지 않습니다. aiomysql을 설치하세요."
+    )
+
+
+def get_database_url(driver=None):
+    driver = driver or _detect_driver()
+    return (
+        f"mysql+{driver}://{os.getenv('db_username')}:"
+        f"{os.getenv('db_password')}@{os.getenv('db_host')}:"
+        f"{os.getenv('db_port', 3306)}/{os.getenv('db_database')}"
+    )
+
+
+def get_engine():
+    """프로세스 전역 엔진 (최초 호출 시 생성)"""
+    global _ENGINE
+    if _ENGINE is None:
+        with _ENGINE_LOCK:
+            if _ENGINE is None:
+                driver = _detect_driver()
+                logger.info(
+                    f"Database URL: mysql+{driver}://{os.getenv('db_username')}:***@"
+                    f"{os.getenv('db_host')}:{os.getenv('db_port')}/{os.getenv('db_database')}"
+                )
+                _ENGINE = create_engine(
+                    get_database_url(driver),
+                    pool_pre_ping=True,
+                    pool_recycle=3600,
+                    echo=False  # SQL 로깅 끄기
+                )
+                _session_factory.configure(bind=_ENGINE)
+    return _ENGINE
+
+
+_session_factory = sessionmaker(autocommit=False, autoflush=False)
+
+
+def SessionLocal(**kwargs):
+    """기존 sessionmaker와 같은 사용법: SessionLocal() → Session (엔진은 지연 생성)"""
+    get_engine()
+    return _session_factory(**kwargs)
+
+
+# ============================================
+# 비동기 경로 (API의 async 엔드포인트 전용)
+# - 스크립트/모델 워커/스레드풀에서 도는 sync 엔드포인트는 위의 SessionLocal을 그대로 사용
+# - sync 헬퍼(job_queue, score_bulk 등)는 AsyncSession.run_sync로 재사용
+# ============================================
+_async_session_factory = None
+
+
+def get_async_engine():
+    """프로세스 전역 비동기 엔진 (최초 호출 시 생성)"""
+    global _ASYNC_ENGINE, _async_session_factory
+    if _ASYNC_ENGINE is None:
+        with _ENGINE_LOCK:
+            if _ASYNC_ENGINE is None:
+                from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+                driver = _detect_async_driver()
+                _ASYNC_ENGINE = create_async_engine(
+                    get_database_url(driver),
+                    pool_pre_ping=True,
+                    pool_recycle=3600,
+                    pool_size=ASYNC_POOL_SIZE,
+                    max_overflow=ASYNC_MAX_OVERFLOW,
+                    echo=False
+                )
+                _async_session_factory = async_sessionmaker(
+                    _ASYNC_ENGINE, autoflush=False, expire_on_commit=False
+                )
+    return _ASYNC_ENGINE
+
+
+async def dispose_async_engine():
+    """API 종료 시 비동기 커넥션 풀 정리 (생성된 적 없으면 무시)"""
+    global _ASYNC_ENGINE
+    if _ASYNC_ENGINE is not None:
+        await _ASYNC_ENGINE.dispose()
+        _ASYNC_ENGINE = None
+
+
+def AsyncSessionLocal(**kwargs):
+    """AsyncSessionLocal() → AsyncSession (엔진은 지연 생성)"""
+    get_async_engine()
+    return _async_session_factory(**kwargs)
+
+
 Base = declarative_base()
 
+
+def __getattr__(name):
+    # 하위 호환: from api.database import engine
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 # DB 세션 의존성
 def get_db():
     db = SessionLocal()
@@ -53,3 +148,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# 비동기 DB 세션 의존성 (async def 엔드포인트용)
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,121 @@
+import os
+import json
+import time
+import queue
+import socket
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# 업로드 → 모델 워커 깨우기 (프로세스 내부 신호)
+# - 업로드 API가 (환자, 회차)별로 notify_upload() 호출
+# - 워커는 wait_for_jobs()에서 대기하다가, 마지막 파일 도착 후
+#   DEBOUNCE_SECONDS 동안 추가 업로드가 없는 회차가 생기면 깨어남
+# - MODEL_WORKER_MODE=external 이면 같은 알림을 별도 데몬(scripts/model_worker.py --daemon)의
+#   제어 소켓으로도 전달 ({"cmd": "notify"}). 전송은 전용 스레드에서 best-effort로 수행하여
+#   업로드 요청(이벤트 루프)을 막지 않고, 실패해도 데몬의 주기 폴링이 안전망
+# ============================================
+DEBOUNCE_SECONDS = float(os.getenv("MODEL_JOB_DEBOUNCE_SECONDS", "5"))
+
+FORWARD_TO_DAEMON = os.getenv("MODEL_WORKER_MODE", "thread").lower() == "external"
+DAEMON_HOST = os.getenv("MODEL_WORKER_HOST", "127.0.0.1")
+DAEMON_PORT = int(os.getenv("MODEL_WORKER_PORT", "8765"))
+FORWARD_TIMEOUT = float(os.getenv("MODEL_WORKER_NOTIFY_TIMEOUT", "2"))
+
+_COND = threading.Condition()
+_PENDING = {}   # (patient_id, order_num) -> 마지막 업로드 시각 (monotonic)
+_RUN_REQUESTED = False   # 디바운스 없이 즉시 한 번 깨우기 (데몬 제어 명령 등)
+
+
+_FORWARD_QUEUE = queue.Queue()
+_FORWARDER = None
+_FORWARDER_LOCK = threading.Lock()
+
+
+def notify_upload(patient_id: str, order_num: int, forward: bool = True):
+    """
+    (환자, 회차)에 파일이 도착했음을 알림. 같은 회차는 디바운스 창이 다시 시작됨
+    forward: external 모드면 별도 데몬에도 전달 (데몬이 받은 알림을 다시 보낼 때는 False)
+    """
+    with _COND:
+        _PENDING[(patient_id, int(order_num))] = time.monotonic()
+        _COND.notify_all()
+    if forward and FORWARD_TO_DAEMON:
+        _ensure_forwarder()
+        _FORWARD_QUEUE.put({"cmd": "notify", "patient_id": patient_id, "order_num": int(order_num)})
+
+
+def _send_to_daemon(request: dict):
+    with socket.create_connection((DAEMON_HOST, DAEMON_PORT), timeout=FORWARD_TIMEOUT) as sock:
+        sock.settimeout(FORWARD_TIMEOUT)
+        sock.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        resp = json.loads(sock.makefile("rb").readline().decode("utf-8") or "{}")
+    if not resp.get("ok"):
+        raise RuntimeError(resp.get("error") or "응답 없음")
+
+
+def _forward_loop():
+    failing = False
+    while True:
+        request = _FORWARD_QUEUE.get()
+        try:
+            _send_to_daemon(request)
+            if failing:
+                logger.info("모델 워커 데몬 알림 전송 복구")
+            failing = False
+        except Exception as e:
+            # 데몬이 꺼져 있어도 업로드는 성공, 작업은 큐에 남아 데몬의 주기 폴링에서 처리 (경고는 연속 실패 중 1회)
+            if not failing:
+                logger.warning(f"모델 워커 데몬 알림 전송 실패 ({DAEMON_HOST}:{DAEMON_PORT}): {e}")
+            failing = True
+
+
+def _ensure_forwarder():
+    global _FORWARDER
+    with _FORWARDER_LOCK:
+        if _FORWARDER is None or not _FORWARDER.is_alive():
+            _FORWARDER = threading.Thread(target=_forward_loop, name="model-worker-notify", daemon=True)
+            _FORWARDER.start()
+
+
+def request_run():
+    """대기 중인 워커를 디바운스 없이 즉시 깨움"""
+    global _RUN_REQUESTED
+    with _COND:
+        _RUN_REQUESTED = True
+        _COND.notify_all()
+
+
+def pending_uploads():
+    """디바운스 대기 중인 (환자, 회차) 목록"""
+    with _COND:
+        return list(_PENDING.keys())
+
+
+def wait_for_jobs(timeout: float, debounce: float = None):
+    """
+    디바운스가 끝난 회차가 생기거나 timeout이 지날 때까지 대기.
+    Returns: 처리 준비된 [(patient_id, order_num), ...] (timeout 또는 request_run()이면 빈 리스트일 수 있음)
+    """
+    global _RUN_REQUESTED
+    debounce = DEBOUNCE_SECONDS if debounce is None else debounce
+    deadline = time.monotonic() + timeout
+    with _COND:
+        while True:
+            now = time.monotonic()
+            ready = [key for key, t in _PENDING.items() if now - t >= debounce]
+            if ready or _RUN_REQUESTED:
+                _RUN_REQUESTED = False
+                for key in ready:
+                    del _PENDING[key]
+                return ready
+
+            remaining = deadline - now
+            if remaining <= 0:
+                return []
+            if _PENDING:
+                next_ready = min(_PENDING.values()) + debounce - now
+                remaining = min(remaining, max(next_ready, 0.0))
+            _COND.wait(remaining)
@@ -0,0 +1,211 @@
+import os
+import socket
+
+from sqlalchemy import text, bindparam
+from sqlalchemy.orm import Session
+
+from .job_events import DEBOUNCE_SECONDS
+
+# ============================================
+# 모델링 작업 큐 (model_job 테이블, db/data/MODEL_JOB_create.sql)
+# 상태: queued → claimed(임대) → done / failed
+# - 업로드 시 (환자, 회차) 단위로 enqueue
+# - 워커는 SELECT ... FOR UPDATE SKIP LOCKED 로 작업을 임대하므로
+#   여러 프로세스/노드가 동시에 큐를 비워도 같은 회차를 중복 채점하지 않음
+# - 임대 만료(LEASE_UNTIL) 시 다른 워커가 다시 가져갈 수 있음
+# - 업로드마다 NOT_BEFORE를 (지금 + 디바운스)로 미루므로, 파일이 아직 도착 중인 회차는
+#   다른 회차의 처리나 주기 폴링이 큐를 비울 때도 임대되지 않음 (위치 기반 채점의 부분 채점 방지)
+# ============================================
+LEASE_SECONDS = int(os.getenv("MODEL_JOB_LEASE_SECONDS", "1800"))
+MAX_ATTEMPTS = int(os.getenv("MODEL_JOB_MAX_ATTEMPTS", "3"))
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def enqueue_job(db: Session, patient_id: str, order_num: int, debounce: float = None):
+    """
+    (환자, 회차) 작업을 queued 로 등록. commit은 호출 측 트랜잭션에서 수행.
+    이미 처리 중(claimed)이면 RERUN 표시만 남겨 완료 후 다시 queued 로 돌린다.
+    업로드마다 NOT_BEFORE를 지금 + debounce 로 미뤄 회차의 파일이 다 올라온 뒤에만 임대되게 한다.
+    (ON DUPLICATE KEY UPDATE는 왼쪽부터 적용되므로 STATUS를 마지막에 갱신)
+    """
+    debounce = DEBOUNCE_SECONDS if debounce is None else debounce
+    db.execute(
+        text("""
+            INSERT INTO model_job (PATIENT_ID, ORDER_NUM, STATUS, ATTEMPTS, NOT_BEFORE, CREATE_DATE)
+            VALUES (
+                :patient_id, :order_num, 'queued', 0,
+                NOW(3) + INTERVAL :debounce_ms * 1000 MICROSECOND, NOW()
+            )
+            ON DUPLICATE KEY UPDATE
+                NOT_BEFORE = VALUES(NOT_BEFORE),
+                RERUN = IF(STATUS = 'claimed', 1, RERUN),
+                ATTEMPTS = IF(STATUS = 'claimed', ATTEMPTS, 0),
+                LAST_ERROR = IF(STATUS = 'claimed', LAST_ERROR, NULL),
+                UPDATE_DATE = NOW(),
+                STATUS = IF(STATUS = 'claimed', STATUS, 'queued')
+        """),
+        {"patient_id": patient_id, "order_num": order_num, "debounce_ms": int(debounce * 1000)}
+    )
+
+
+def enqueue_pending_from_storage(db: Session) -> int:
+    """
+    미채점(USE_TF = 0) 행이 있는데 큐에 없거나 이미 done인 회차를 queued로 등록 (안전망).
+    업로드 API를 거치지 않은 데이터(import 스크립트, migrate_audio_blobs, 직접 DB 수정,
+    큐 도입 이전 데이터)용. done인데 USE_TF = 0 행이 남아 있으면 완료 뒤 들어온 행이므로 다시 채점.
+    (같은 문항의 더 최신 재시도(QUESTION_MINOR_NO)가 있는 행은 채점 대상이 아니므로 제외 → 재등록이 반복되지 않음)
+    failed는 재시도가 끝없이 반복되지 않도록 그대로 둠 (queued/claimed도 변경 없음).
+    Returns: 영향 행 수 (MySQL 기준 신규 등록 1, done → queued 2)
+    """
+    # SELECT를 파생 테이블로 감싸 ON DUPLICATE KEY UPDATE의 컬럼이 model_job만 가리키게 함
+    result = db.execute(
+        text("""
+            INSERT INTO model_job (PATIENT_ID, ORDER_NUM, STATUS, ATTEMPTS, CREATE_DATE)
+            SELECT p.PATIENT_ID, p.ORDER_NUM, 'queued', 0, NOW()
+            FROM (
+                SELECT DISTINCT s.PATIENT_ID, s.ORDER_NUM
+                FROM AUDIO_STORAGE s
+                LEFT JOIN model_job j
+                    ON j.PATIENT_ID = s.PATIENT_ID
+                   AND j.ORDER_NUM = s.ORDER_NUM
+                WHERE s.USE_TF = 0
+                  AND (
+                      j.JOB_ID IS NULL
+                      OR (
+                          j.STATUS = 'done'
+                          AND NOT EXISTS (
+                              SELECT 1
+                              FROM AUDIO_STORAGE n
+                              WHERE n.PATIENT_ID = s.PATIENT_ID
+                                AND n.ORDER_NUM = s.ORDER_NUM
+                                AND n.ASSESS_TYPE = s.ASSESS_TYPE
+                                AND n.QUESTION_CD = s.QUESTION_CD
+                                AND n.QUESTION_NO = s.QUESTION_NO
+                                AND CAST(n.QUESTION_MINOR_NO AS SIGNED) > CAST(s.QUESTION_MINOR_NO AS SIGNED)
+                          )
+                      )
+                  )
+            ) p
+            ON DUPLICATE KEY UPDATE
+                ATTEMPTS = IF(STATUS = 'done', 0, ATTEMPTS),
+                RERUN = IF(STATUS = 'done', 0, RERUN),
+                LAST_ERROR = IF(STATUS = 'done', NULL, LAST_ERROR),
+                NOT_BEFORE = IF(STATUS = 'done', NOW(3), NOT_BEFORE),
+                UPDATE_DATE = IF(STATUS = 'done', NOW(), UPDATE_DATE),
+                STATUS = IF(STATUS = 'done', 'queued', STATUS)
+        """)
+    )
+    db.commit()
+    return result.rowcount or 0
+
+
+def claim_jobs(db: Session, worker_id: str = WORKER_ID, limit: int = 1, lease_seconds: int = LEASE_SECONDS):
+    """
+    대기 중이거나 임대가 만료된 작업을 최대 limit건 임대.
+    Returns: [(job_id, patient_id, order_num, api_key), ...]
+    """
+    # 재시도 한도를 넘긴 채 임대가 만료된 작업은 failed 처리
+    db.execute(
+        text("""
+            UPDATE model_job
+            SET STATUS = 'failed',
+                LAST_ERROR = IFNULL(LAST_ERROR, 'lease expired'),
+                CLAIMED_BY = NULL,
+                LEASE_UNTIL = NULL,
+                UPDATE_DATE = NOW()
+            WHERE STATUS = 'claimed'
+              AND LEASE_UNTIL < NOW()
+              AND ATTEMPTS >= :max_attempts
+        """),
+        {"max_attempts": MAX_ATTEMPTS}
+    )
+
+    rows = db.execute(
+        text("""
+            SELECT j.JOB_ID, j.PATIENT_ID, j.ORDER_NUM, pk.API_KEY
+            FROM model_job j
+            LEFT JOIN api_key pk
+                ON pk.PATIENT_ID = j.PATIENT_ID
+            WHERE (j.STATUS = 'queued'
+                   OR (j.STATUS = 'claimed' AND j.LEASE_UNTIL < NOW()))
+              AND j.NOT_BEFORE <= NOW(3)
+            ORDER BY j.JOB_ID
+            LIMIT :limit
+            FOR UPDATE OF j SKIP LOCKED
+        """),
+        {"limit": limit}
+    ).fetchall()
+
+    if rows:
+        db.execute(
+            text("""
+                UPDATE model_job
+                SET STATUS = 'claimed',
+                    CLAIMED_BY = :worker_id,
+                    LEASE_UNTIL = NOW() + INTERVAL :lease_seconds SECOND,
+                    ATTEMPTS = ATTEMPTS + 1,
+                    UPDATE_DATE = NOW()
+                WHERE JOB_ID IN :job_ids
+            """).bindparams(bindparam("job_ids", expanding=True)),
+            {
+                "worker_id": worker_id,
+                "lease_seconds": lease_seconds,
+                "job_ids": [row[0] for row in rows],
+            }
+        )
+    db.commit()
+    return [tuple(row) for row in rows]
+
+
+def seconds_until_next_job(db: Session):
+    """디바운스 대기 중(NOT_BEFORE가 미래)인 queued 작업 중 가장 빠른 것까지 남은 초. 없으면 None"""
+    delay_us = db.execute(
+        text("""
+            SELECT TIMESTAMPDIFF(MICROSECOND, NOW(3), MIN(NOT_BEFORE))
+            FROM model_job
+            WHERE STATUS = 'queued'
+              AND NOT_BEFORE > NOW(3)
+        """)
+    ).scalar()
+    return None if delay_us is None else max(delay_us / 1_000_000, 0.0)
+
+
+def complete_job(db: Session, job_id: int, worker_id: str = WORKER_ID):
+    """작업 완료. 처리 중 새 업로드(RERUN)가 있었으면 다시 queued"""
+    db.execute(
+        text("""
+            UPDATE model_job
+            SET STATUS = IF(RERUN = 1, 'queued', 'done'),
+                ATTEMPTS = IF(RERUN = 1, 0, ATTEMPTS),
+                RERUN = 0,
+                CLAIMED_BY = NULL,
+                LEASE_UNTIL = NULL,
+                LAST_ERROR = NULL,
+                UPDATE_DATE = NOW()
+            WHERE JOB_ID = :job_id
+              AND CLAIMED_BY = :worker_id
+        """),
+        {"job_id": job_id, "worker_id": worker_id}
+    )
+    db.commit()
+
+
+def fail_job(db: Session, job_id: int, error: str, worker_id: str = WORKER_ID):
+    """작업 실패. 재시도 한도 이내(또는 RERUN)면 다시 queued, 아니면 failed"""
+    db.execute(
+        text("""
+            UPDATE model_job
+            SET STATUS = IF(RERUN = 1 OR ATTEMPTS < :max_attempts, 'queued', 'failed'),
+                ATTEMPTS = IF(RERUN = 1, 0, ATTEMPTS),
+                RERUN = 0,
+                CLAIMED_BY = NULL,
+                LEASE_UNTIL = NULL,
+                LAST_ERROR = :error,
+                UPDATE_DATE = NOW()
+            WHERE JOB_ID = :job_id
+              AND CLAIMED_BY = :worker_id
+        """),
+        {"job_id": job_id, "worker_id": worker_id, "max_attempts": MAX_ATTEMPTS, "error": (error or "")[:500]}
+    )
+    db.commit()
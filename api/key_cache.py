@@ -0,0 +1,166 @@
+import os
+import time
+import logging
+import threading
+
+from sqlalchemy import text, bindparam
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# API Key ↔ 환자 ID 조회 캐시 + LAST_USED_AT 지연 기록
+# - 조회 결과를 프로세스 내에 TTL_SECONDS 동안 보관 (없는 키는 캐시하지 않음)
+# - 새 키 발급 시 put()이 해당 환자의 이전 매핑을 먼저 지움
+#   (다른 API 프로세스는 최대 TTL_SECONDS 동안 이전 키를 볼 수 있음)
+# - touch()는 메모리에만 기록하고, 백그라운드 스레드가 FLUSH_SECONDS마다
+#   모인 환자들의 LAST_USED_AT을 UPDATE 한 번으로 갱신 (정밀도: FLUSH_SECONDS 이내)
+#   → 업로드/삭제 요청 경로에서 UPDATE + commit 제거
+# ============================================
+TTL_SECONDS = float(os.getenv("API_KEY_CACHE_TTL_SECONDS", "300"))
+FLUSH_SECONDS = float(os.getenv("API_KEY_TOUCH_FLUSH_SECONDS", "5"))
+
+_LOCK = threading.Lock()
+_BY_KEY = {}        # api_key -> (patient_id, 만료 시각)
+_BY_PATIENT = {}    # patient_id -> (api_key, 만료 시각)
+_TOUCHED = set()    # LAST_USED_AT 갱신 대기 중인 patient_id
+_STATS = {"hits": 0, "misses": 0, "flushes": 0, "flushed_rows": 0}
+
+_FLUSHER = None
+_STOP = threading.Event()
+
+
+def lookup_by_key(api_key: str):
+    """캐시된 환자 ID, 없거나 만료면 None"""
+    with _LOCK:
+        entry = _BY_KEY.get(api_key)
+        if entry is not None and entry[1] > time.monotonic():
+            _STATS["hits"] += 1
+            return entry[0]
+        _BY_KEY.pop(api_key, None)
+        _STATS["misses"] += 1
+        return None
+
+
+def lookup_by_patient(patient_id: str):
+    """캐시된 API Key, 없거나 만료면 None"""
+    with _LOCK:
+        entry = _BY_PATIENT.get(patient_id)
+        if entry is not None and entry[1] > time.monotonic():
+            _STATS["hits"] += 1
+            return entry[0]
+        _BY_PATIENT.pop(patient_id, None)
+        _STATS["misses"] += 1
+        return None
+
+
+def put(patient_id: str, api_key: str):
+    """매핑 저장. 같은 환자의 이전 키 매핑은 제거"""
+    expires = time.monotonic() + TTL_SECONDS
+    with _LOCK:
+        old = _BY_PATIENT.get(patient_id)
+        if old is not None and old[0] != api_key:
+            _BY_KEY.pop(old[0], None)
+        _BY_PATIENT[patient_id] = (api_key, expires)
+        _BY_KEY[api_key] = (patient_id, expires)
+
+
+def invalidate(patient_id: str = None, api_key: str = None):
+    """환자 또는 키 기준으로 매핑 제거 (둘 다 None이면 전체)"""
+    with _LOCK:
+        if patient_id is None and api_key is None:
+            _BY_KEY.clear()
+            _BY_PATIENT.clear()
+            return
+        if api_key is not None:
+            entry = _BY_KEY.pop(api_key, None)
+            if entry is not None:
+                patient_id = patient_id or entry[0]
+        if patient_id is not None:
+            entry = _BY_PATIENT.pop(patient_id, None)
+            if entry is not None:
+                _BY_KEY.pop(entry[0], None)
+
+
+def touch(patient_id: str):
+    """LAST_USED_AT 갱신 예약 (다음 flush에서 일괄 반영)"""
+    with _LOCK:
+        _TOUCHED.add(patient_id)
+    _ensure_flusher()
+
+
+def flush(db=None) -> int:
+    """예약된 LAST_USED_AT 갱신을 UPDATE 한 번으로 반영. 반영한 환자 수 반환"""
+    with _LOCK:
+        patient_ids = list(_TOUCHED)
+        _TOUCHED.clear()
+    if not patient_ids:
+        return 0
+
+    own_session = db is None
+    if own_session:
+        from .database import SessionLocal
+        db = SessionLocal()
+    try:
+        db.execute(
+            text(
+                "UPDATE api_key SET LAST_USED_AT = NOW() WHERE PATIENT_ID IN :patient_ids"
+            ).bindparams(bindparam("patient_ids", expanding=True)),
+            {"patient_ids": patient_ids}
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        # 실패분은 다음 flush에서 다시 시도
+        with _LOCK:
+            _TOUCHED.update(patient_ids)
+        raise
+    finally:
+        if own_session:
+            db.close()
+
+    with _LOCK:
+        _STATS["flushes"] += 1
+        _STATS["flushed_rows"] += len(patient_ids)
+    return len(patient_ids)
+
+
+def _flush_loop():
+    while not _STOP.wait(FLUSH_SECONDS):
+        try:
+            flush()
+        except Exception as e:
+            logger.warning(f"API Key LAST_USED_AT 갱신 실패 (다음 주기에 재시도): {e}")
+
+
+def _ensure_flusher():
+    global _FLUSHER
+    if _FLUSHER is not None and _FLUSHER.is_alive():
+        return
+    with _LOCK:
+        if _FLUSHER is None or not _FLUSHER.is_alive():
+            _STOP.clear()
+            _FLUSHER = threading.Thread(target=_flush_loop, name="api-key-flush", daemon=True)
+            _FLUSHER.start()
+
+
+def shutdown():
+    """flush 스레드 종료 후 남은 갱신 반영 (API 종료 시)"""
+    global _FLUSHER
+    _STOP.set()
+    if _FLUSHER is not None:
+        _FLUSHER.join(timeout=FLUSH_SECONDS + 1)
+        _FLUSHER = None
+    try:
+        flush()
+    except Exception as e:
+        logger.warning(f"API Key LAST_USED_AT 최종 갱신 실패: {e}")
+
+
+def stats() -> dict:
+    with _LOCK:
+        snapshot = dict(_STATS)
+        snapshot["entries"] = len(_BY_KEY)
+        snapshot["pending_touches"] = len(_TOUCHED)
+    total = snapshot["hits"] + snapshot["misses"]
+    snapshot["hit_rate"] = snapshot["hits"] / total if total else 0.0
+    return snapshot
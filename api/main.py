@@ -1,32 +1,9 @@
-import importlib.util
-import subprocess
-import sys
-from pathlib import Path
+import os
 from contextlib import asynccontextmanager
 
-def _ensure_api_requirements():
-    req_path = Path(__file__).resolve().parent / "environment.yaml"
-    marker_path = Path(__file__).resolve().parent / ".api_env_installed"
-
-    if not req_path.exists() or marker_path.exists():
-        return
-
-    has_fastapi = importlib.util.find_spec("fastapi") is not None
-    has_uvicorn = importlib.util.find_spec("uvicorn") is not None
-    if has_fastapi and has_uvicorn:
-        marker_path.write_text("ok")
-        return
-
-    subprocess.check_call([sys.executable, "-m", "pip", "install", "-r", str(req_path)])
-    marker_path.write_text("ok")
-
-try:
-    from fastapi import FastAPI, Response
-    from fastapi.middleware.cors import CORSMiddleware
-except ModuleNotFoundError:
-    _ensure_api_requirements()
-    from fastapi import FastAPI, Response
-    from fastapi.middleware.cors import CORSMiddleware
+# 의존성 설치는 배포 단계(api/environment.yaml)에서 수행, import 시 pip 실행 없음
+from fastapi import FastAPI, Response
+from fastapi.middleware.cors import CORSMiddleware
 # ================================= 2026-01-31 jhkim =================================
 import threading
 import logging
@@ -39,8 +16,15 @@ from .routers import reports, upload
 # ================================= 2026-01-31 jhkim =================================
 logger = logging.getLogger(__name__)
 
+# 모델 워커 실행 방식
+# - "thread": API 프로세스 안 데몬 스레드 (기본, 기존 동작)
+# - "external": 별도 프로세스(scripts/model_worker.py --daemon)가 큐를 처리 → API는 시작하지 않고
+#               업로드 알림만 데몬 제어 소켓으로 전달 (api/job_events.py, MODEL_WORKER_HOST/PORT)
+# - "off": 시작하지 않음
+MODEL_WORKER_MODE = os.getenv("MODEL_WORKER_MODE", "thread").lower()
+
 def _start_model_worker():
-    """model_worker를 백그라운드 데몬 스레드로 실행 (5분 주기 폴링)"""
+    """model_worker를 백그라운드 데몬 스레드로 실행 (업로드 알림 시 즉시, 그 외 5분 주기 폴링)"""
     try:
         import sys
         import os
@@ -49,18 +33,22 @@ def _start_model_worker():
         sys.path.append(str(ROOT / "ui"))
         sys.path.append(str(ROOT))
 
-        from scripts.model_worker import _init_heavy_imports, process_pending_jobs
-        import time
+        from scripts.model_worker import _init_heavy_imports, process_pending_jobs, next_wait
+        from .job_events import wait_for_jobs
 
         pd, text, SessionLocal, APIClient, model_process, save_scores_to_db = _init_heavy_imports()
-        logger.info("모델 워커 백그라운드 스레드 시작 (주기: 300초)")
+        logger.info("모델 워커 백그라운드 스레드 시작 (업로드 알림 대기, 안전망 주기: 300초)")
 
         while True:
             try:
-                process_pending_jobs(pd, text, SessionLocal, APIClient, model_process, save_scores_to_db)
+                # 같은 프로세스이므로 HTTP 번들 대신 DB에서 직접 읽음
+                process_pending_jobs(pd, text, SessionLocal, APIClient, model_process, save_scores_to_db, source="db")
             except Exception as e:
                 logger.error(f"모델 워커 처리 중 오류: {e}")
-            time.sleep(300)
+            # 업로드 알림(디바운스 후), 디바운스 대기 작업의 NOT_BEFORE 또는 300초 경과 시 다시 큐를 비움
+            ready = wait_for_jobs(timeout=next_wait(SessionLocal, 300))
+            if ready:
+                logger.info(f"업로드 알림으로 워커 기동: {ready}")
     except Exception as e:
         logger.error(f"모델 워커 초기화 실패: {e}")
 # ====================================================================================
@@ -71,26 +59,29 @@ def _start_model_worker():
 # ============================================
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """애플리케이션 생명주기 관리"""
+    """애플리케이션 생명주기 관리 (무거운 작업 없이 즉시 반환)"""
     # Startup
-    print("=" * 50)
-    print("CLAP API Server Starting...")
-    print("=" * 50)
-    print("✅ Routers registered:")
-    for route in app.routes:
-        if hasattr(route, "methods"):
-            print(f"  {list(route.methods)[0]:6s} {route.path}")
-    print("=" * 50)
+    logger.info(f"CLAP API Server Starting... (routes: {len(app.routes)}, model worker: {MODEL_WORKER_MODE})")
 
     # ================================= 2026-01-31 jhkim =================================
-    # model_worker 백그라운드 데몬 스레드 시작 (5분 주기)
-    worker_thread = threading.Thread(target=_start_model_worker, daemon=True)
-    worker_thread.start()
-    print("✅ Model worker 백그라운드 스레드 시작됨 (300초 주기)")
+    # model_worker 백그라운드 데몬 스레드 시작 (업로드 알림 + 5분 주기 안전망)
+    # 무거운 import(pandas/TF/Torch)는 이 스레드 안에서만 일어나므로 기동을 막지 않음
+    if MODEL_WORKER_MODE == "thread":
+        worker_thread = threading.Thread(target=_start_model_worker, name="model-worker", daemon=True)
+        worker_thread.start()
+        logger.info("Model worker 백그라운드 스레드 시작됨 (업로드 알림 / 300초 주기)")
+    else:
+        logger.info(f"Model worker를 API 프로세스에서 시작하지 않음 (MODEL_WORKER_MODE={MODEL_WORKER_MODE})")
     # ====================================================================================
 
     yield  # 애플리케이션 실행
 
+    # Shutdown: 지연 기록 중인 API Key LAST_USED_AT 반영, 비동기 커넥션 풀 정리
+    from . import key_cache
+    from .database import dispose_async_engine
+    key_cache.shutdown()
+    await dispose_async_engine()
+
 
 # ============================================
 # FastAPI 앱 생성
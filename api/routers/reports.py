@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, Header
+from fastapi import APIRouter, Depends, HTTPException, Header, Query
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from io import BytesIO
+import itertools
 import tarfile
 import json
 import sys
@@ -10,17 +12,41 @@ import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
-from ..database import get_db
+from ..database import get_db, get_async_db, SessionLocal
+from .. import audio_store
 
 router = APIRouter()
 
+# 번들 압축 모드 → (tarfile 스트림 모드, media_type, 확장자)
+# m4a/aac는 이미 압축되어 있으므로 "none"(무압축 tar)이 CPU/지연 면에서 유리
+_BUNDLE_MODES = {
+    "gz": ("w|gz", "application/gzip", "tar.gz"),
+    "none": ("w|", "application/x-tar", "tar"),
+}
+
+
+class _ChunkBuffer:
+    """tarfile 스트림 모드 출력 버퍼: write()된 바이트를 모아두었다가 drain()으로 꺼냄"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
 # 특정 환자의 모든 검사 결과(리포트) 조회
 @router.get("/{patient_id}")
-def get_report(
+async def get_report(
     patient_id: str,
     api_key: str = Header(..., alias="X-API-KEY"),
     assess_type: str = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """검사 리포트 전체 데이터 조회: 등록된 api키 없으면 종료 """
     try:
@@ -29,7 +55,7 @@ def get_report(
             FROM api_key
             WHERE API_KEY = :api_key
         """)
-        api_check_cursor = db.execute(
+        api_check_cursor = await db.execute(
             api_check_query, 
             {"api_key": api_key}
         )
@@ -56,7 +82,7 @@ def get_report(
               AND sc.USE_TF = 1
               AND (:assess_type IS NULL OR sc.ASSESS_TYPE = :assess_type)
         """)
-        assess_cursor = db.execute(
+        assess_cursor = await db.execute(
             assess_query,
             {
                 "patient_id": patient_id,
@@ -87,10 +113,10 @@ def get_report(
 
 # 모델링용 메타데이터 불러오기: 이미 진행된 경우는 제외(use_tf)
 @router.get("/{patient_id}/{order_num}/metadata")
-def get_assessment(
+async def get_assessment(
     patient_id,
     order_num,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     assess_query = text("""
 
@@ -109,7 +135,7 @@ def get_assessment(
             AND sc.ORDER_NUM = :order_num
             AND sc.USE_TF = 0
     """)
-    assess_cursor = db.execute(
+    assess_cursor = await db.execute(
         assess_query, 
         {
             "patient_id": patient_id,
@@ -162,13 +188,66 @@ def get_assessment(
             for row in rows
         ]
 
+def _iter_bundle(rows, db, tar_mode):
+    """행이 도착하는 대로 tar 엔트리를 만들어 바로 내보내는 제너레이터 (manifest.json은 마지막)"""
+    buf = _ChunkBuffer()
+    try:
+        with tarfile.open(mode=tar_mode, fileobj=buf) as tar:
+            manifest = []
+
+            for row in rows:
+                # manifest용 메타데이터
+                item = {
+                    "patient_id": row["PATIENT_ID"],
+                    "order_num": row["ORDER_NUM"],
+                    "assess_type": row["ASSESS_TYPE"],
+                    "question_cd": row["QUESTION_CD"],
+                    "question_no": row["QUESTION_NO"],
+                    "question_minor_no": row["QUESTION_MINOR_NO"],
+                    "duration": row["DURATION"],
+                    "rate": row["RATE"],
+                    # 번들 안에서의 경로
+                    "relative_path": f"audio/{row['QUESTION_CD']}/{row['QUESTION_NO']}_{row['QUESTION_MINOR_NO']}.wav",
+                }
+                manifest.append(item)
+
+                # 오디오 파일 추가: 저장소 파일은 경로에서 바로 스트리밍, 이전 행은 FILE blob
+                info = tarfile.TarInfo(name=item["relative_path"])
+                path = audio_store.row_path(row)
+                if path is not None:
+                    info.size = os.path.getsize(path)
+                    with open(path, "rb") as f:
+                        tar.addfile(info, fileobj=f)
+                else:
+                    audio_bytes: bytes = audio_store.read_row_bytes(row)
+                    info.size = len(audio_bytes)
+                    tar.addfile(info, fileobj=BytesIO(audio_bytes))
+
+                chunk = buf.drain()
+                if chunk:
+                    yield chunk
+
+            # manifest.json 추가
+            manifest_bytes = json.dumps(manifest, ensure_ascii=False).encode("utf-8")
+            manifest_info = tarfile.TarInfo(name="manifest.json")
+            manifest_info.size = len(manifest_bytes)
+            tar.addfile(manifest_info, fileobj=BytesIO(manifest_bytes))
+
+        chunk = buf.drain()
+        if chunk:
+            yield chunk
+    finally:
+        db.close()
+
+
 @router.get("/{patient_id}/{order_num}/bundle")
 def get_assessment_bundle(
     patient_id: str,
     order_num: int,
-    db: Session = Depends(get_db),
+    compression: str = Query("gz", pattern="^(gz|none)$"),
 ):
-    # 1) 메타데이터 + BLOB 조회
+    # 1) 메타데이터 + 저장소 위치 조회 (서버 측 커서, 응답 스트리밍이 끝날 때까지 세션 유지)
+    #    FILE blob은 저장소로 옮기기 전의 이전 행에만 채워져 있음
     query = text("""
         SELECT 
             PATIENT_ID,
@@ -179,7 +258,9 @@ def get_assessment_bundle(
             QUESTION_MINOR_NO,
             DURATION,
             RATE,
-            FILE
+            FILE_HASH,
+            FILE_FORMAT,
+            IF(FILE_FORMAT IS NULL, FILE, NULL) AS FILE
         FROM AUDIO_STORAGE
         WHERE PATIENT_ID = :patient_id
           AND ORDER_NUM = :order_num
@@ -187,55 +268,28 @@ def get_assessment_bundle(
         ORDER BY ASSESS_TYPE, QUESTION_CD, QUESTION_NO, QUESTION_MINOR_NO
     """)
 
-    rows = db.execute(query, {
-        "patient_id": patient_id,
-        "order_num": order_num,
-    }).mappings().fetchall()
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            query,
+            {"patient_id": patient_id, "order_num": order_num},
+            execution_options={"stream_results": True, "yield_per": 1},
+        ).mappings()
+        first_row = next(rows, None)
+    except Exception:
+        db.close()
+        raise
 
-    if not rows:
+    if first_row is None:
+        db.close()
         raise HTTPException(status_code=404, detail="해당 회차의 파일이 없습니다")
 
-    # 2) tar.gz 메모리 번들 생성
-    buf = BytesIO()
-    with tarfile.open(mode="w:gz", fileobj=buf) as tar:
-        manifest = []
-
-        for idx, row in enumerate(rows):
-            # manifest용 메타데이터
-            item = {
-                "patient_id": row["PATIENT_ID"],
-                "order_num": row["ORDER_NUM"],
-                "assess_type": row["ASSESS_TYPE"],
-                "question_cd": row["QUESTION_CD"],
-                "question_no": row["QUESTION_NO"],
-                "question_minor_no": row["QUESTION_MINOR_NO"],
-                "duration": row["DURATION"],
-                "rate": row["RATE"],
-                # 번들 안에서의 경로
-                "relative_path": f"audio/{row['QUESTION_CD']}/{row['QUESTION_NO']}_{row['QUESTION_MINOR_NO']}.wav",
-            }
-            manifest.append(item)
-
-            # 오디오 파일 추가
-            audio_bytes: bytes = row["FILE"]
-            file_obj = BytesIO(audio_bytes)
-
-            info = tarfile.TarInfo(name=item["relative_path"])
-            info.size = len(audio_bytes)
-            tar.addfile(info, fileobj=file_obj)
-
-        # manifest.json 추가
-        manifest_bytes = json.dumps(manifest, ensure_ascii=False).encode("utf-8")
-        manifest_info = tarfile.TarInfo(name="manifest.json")
-        manifest_info.size = len(manifest_bytes)
-        tar.addfile(manifest_info, fileobj=BytesIO(manifest_bytes))
-
-    buf.seek(0)
-
+    # 2) tar 스트림 번들 (메모리에 전체를 만들지 않음)
+    tar_mode, media_type, ext = _BUNDLE_MODES[compression]
     return StreamingResponse(
-        buf,
-        media_type="application/gzip",
+        _iter_bundle(itertools.chain([first_row], rows), db, tar_mode),
+        media_type=media_type,
         headers={
-            "Content-Disposition": f'attachment; filename="{patient_id}_{order_num}_bundle.tar.gz"'
+            "Content-Disposition": f'attachment; filename="{patient_id}_{order_num}_bundle.{ext}"'
         },
     )
\ No newline at end of file
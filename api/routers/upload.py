@@ -1,11 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Header, Query, Request
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from typing import List, Optional, Dict
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 import sys
 import os
+import json
 import datetime
+import time
 import random
 import string
 import threading
@@ -13,14 +16,25 @@ import logging
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
-from ..database import get_db
+from ..database import get_db, get_async_db
+from .. import audio_store
+from .. import key_cache
+from ..job_queue import enqueue_job
+from ..score_bulk import update_scores
+from ..job_events import notify_upload
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 # 현재 api key 로직: 환자 파일 업로드하면 발급, 그후 환자ID별로 저장 및 조회에 사용
+# 조회는 api/key_cache.py의 TTL 캐시를 먼저 보고, LAST_USED_AT은 key_cache.touch()로 일괄 갱신
 def issue_api_key(patient_id: str, db: Session) -> str:
     """환자별 API Key 재사용, 없으면 발급 후 DB에 저장"""
+    key = key_cache.lookup_by_patient(patient_id)
+    if key:
+        key_cache.touch(patient_id)
+        return key
+
     row = db.execute(
         text(
             "SELECT API_KEY FROM api_key WHERE PATIENT_ID = :patient_id"
@@ -29,11 +43,8 @@ def issue_api_key(patient_id: str, db: Session) -> str:
     ).fetchone()
     if row and row[0]:
         key = row[0]
-        db.execute(
-            text("UPDATE api_key SET LAST_USED_AT = NOW() WHERE PATIENT_ID = :patient_id"),
-            {"patient_id": patient_id}
-        )
-        db.commit()
+        key_cache.put(patient_id, key)
+        key_cache.touch(patient_id)
         return key
 
     now = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%d%H%M%S%f")
@@ -50,11 +61,18 @@ def issue_api_key(patient_id: str, db: Session) -> str:
         {"patient_id": patient_id, "api_key": key}
     )
     db.commit()
+    # 새 키 발급: 이 환자의 이전 매핑을 지우고 새 매핑으로 교체
+    key_cache.put(patient_id, key)
     return key
 
 
 def resolve_api_key_db(api_key: str, db: Session) -> Optional[str]:
-    """API Key로 환자 ID 조회 (DB)"""
+    """API Key로 환자 ID 조회 (캐시 → DB)"""
+    patient_id = key_cache.lookup_by_key(api_key)
+    if patient_id:
+        key_cache.touch(patient_id)
+        return patient_id
+
     row = db.execute(
         text(
             """
@@ -66,14 +84,9 @@ def resolve_api_key_db(api_key: str, db: Session) -> Optional[str]:
         {"api_key": api_key}
     ).fetchone()
     if row:
-        # 마지막 사용 시각 업데이트
-        db.execute(
-            text(
-                "UPDATE api_key SET LAST_USED_AT = NOW() WHERE API_KEY = :api_key"
-            ),
-            {"api_key": api_key}
-        )
-        db.commit()
+        # 마지막 사용 시각은 지연 기록
+        key_cache.put(row[0], api_key)
+        key_cache.touch(row[0])
         return row[0]
     return None
 
@@ -105,27 +118,7 @@ def resolve_api_key(api_key: str, db: Session = Depends(get_db)):
 @router.get("/keys/{patient_id}")
 def get_api_key_by_patient(patient_id: str, db: Session = Depends(get_db)):
     """환자 ID로 API Key 조회, 없으면 새로 발급하여 반환"""
-    row = db.execute(
-        text(
-            """
-            SELECT API_KEY
-            FROM api_key
-            WHERE PATIENT_ID = :patient_id
-            """
-        ),
-        {"patient_id": patient_id}
-    ).fetchone()
-
-    if row and row[0]:
-        api_key = row[0]
-        db.execute(
-            text("UPDATE api_key SET LAST_USED_AT = NOW() WHERE PATIENT_ID = :patient_id"),
-            {"patient_id": patient_id}
-        )
-        db.commit()
-        return {"api_key": api_key}
-
-    # 없으면 발급
+    # 캐시/DB 조회, 사용 시각 갱신, 없을 때의 발급까지 issue_api_key와 동일
     api_key = issue_api_key(patient_id, db)
     return {"api_key": api_key}
 
@@ -144,6 +137,57 @@ def get_next_order_num(db: Session, patient_id: str) -> int:
     return int(db.execute(query, {"patient_id": patient_id}).scalar() or 1)
 
 
+ALLOWED_EXTENSIONS = ['.wav', '.m4a', '.mp4', '.aac']
+
+
+def parse_question_numbers(filename: str):
+    """파일명 p_<QUESTION_NO>_<QUESTION_MINOR_NO>.<ext> → (question_no, question_minor_no)"""
+    name_parts = filename.split("_")
+    question_no = int(name_parts[1])
+    question_minor_no = int(name_parts[2].split('.')[0])
+    return question_no, question_minor_no
+
+
+# ================================= 2026-01-31 jhkim =================================
+# 동일 PK 조합 중복 시 score/file/duration만 갱신 (ON DUPLICATE KEY UPDATE)
+# 파일 본문은 저장소에 있으므로 FILE blob은 비움
+# 단일 업로드는 파라미터 1건, 일괄 업로드는 파라미터 리스트(executemany)로 실행
+UPSERT_AUDIO_QUERY = text("""
+    INSERT INTO audio_storage (
+        PATIENT_ID, ORDER_NUM, ASSESS_TYPE, QUESTION_CD, QUESTION_NO, QUESTION_MINOR_NO, DURATION, SCORE, RATE,
+        FILE, FILE_HASH, FILE_SIZE, FILE_FORMAT
+    ) VALUES (
+        :patient_id, :order_num, :assess_type, :question_cd,
+        :question_no, :question_minor_no, :duration, :score, :rate,
+        NULL, :file_hash, :file_size, :file_format
+    )
+    ON DUPLICATE KEY UPDATE
+        SCORE = VALUES(SCORE),
+        DURATION = VALUES(DURATION),
+        RATE = VALUES(RATE),
+        FILE = NULL,
+        FILE_HASH = VALUES(FILE_HASH),
+        FILE_SIZE = VALUES(FILE_SIZE),
+        FILE_FORMAT = VALUES(FILE_FORMAT),
+        USE_TF = 0
+""")
+# ====================================================================================
+
+
+async def _discard_written(db: AsyncSession, written, saved_at):
+    """
+    DB 반영이 실패한 업로드의 저장소 파일 정리 (롤백 후 호출)
+    다른 행이 같은 내용을 가리키거나 그 사이 같은 파일이 다시 업로드됐으면 남김
+    """
+    if not written:
+        return
+    try:
+        await db.run_sync(audio_store.remove_unreferenced, written, saved_at)
+        await db.rollback()
+    except Exception as e:
+        logger.warning(f"업로드 실패 파일 정리 실패 (scripts/gc_audio_store.py로 정리 가능): {e}")
+
+
 # ============================================
 # Endpoints
 # ============================================
@@ -159,52 +203,65 @@ async def upload_files_with_metadata(
     rate: str = Form(...),
     score: float = Form(...),
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
-    파일을 MEDIUMBLOB으로 저장 (단일 파일)
+    파일을 오디오 저장소(api/audio_store.py)에 저장하고 DB에는 해시/크기/포맷만 기록 (단일 파일)
     wav, m4a 등 다양한 오디오 포맷 지원
+    DB는 비동기 세션으로 접근 (대기 중에도 이벤트 루프가 다른 요청을 처리)
 
     """
-    name_parts = filename.split("_")
-    question_no = int(name_parts[1])
-    question_minor_no = int(name_parts[2].split('.')[0])
+    question_no, question_minor_no = parse_question_numbers(filename)
+    written, saved_at = [], None
 
     try:
-        # 업로드 시 인증 없이 키 발급
-        api_key = issue_api_key(patient_id, db)
+        # 업로드 시 인증 없이 키 발급 (sync 헬퍼를 run_sync로 재사용, 캐시 적중 시 DB 접근 없음)
+        api_key = await db.run_sync(lambda s: issue_api_key(patient_id, s))
 
         # 파일 확장자 검증
         file_ext = os.path.splitext(filename)[1].lower()
-        allowed_extensions = ['.wav', '.m4a', '.mp4', '.aac']
         
-        if file_ext not in allowed_extensions:
+        if file_ext not in ALLOWED_EXTENSIONS:
             raise HTTPException(
                 status_code=400,
-                detail=f"지원하지 않는 파일 형식: {file_ext}. 허용: {', '.join(allowed_extensions)}"
-            )
-        # 파일을 바이너리(bytes)로 읽음
-        file_content = await file.read()
-
-        # ================================= 2026-01-31 jhkim =================================
-        # 동일 PK 조합 중복 시 score/file/duration만 갱신 (ON DUPLICATE KEY UPDATE)
-        query = text("""
-            INSERT INTO audio_storage (
-                PATIENT_ID, ORDER_NUM, ASSESS_TYPE, QUESTION_CD, QUESTION_NO, QUESTION_MINOR_NO, DURATION, SCORE, RATE, FILE
-            ) VALUES (
-                :patient_id, :order_num, :assess_type, :question_cd,
-                :question_no, :question_minor_no, :duration, :score, :rate, :file
+                detail=f"지원하지 않는 파일 형식: {file_ext}. 허용: {', '.join(ALLOWED_EXTENSIONS)}"
             )
-            ON DUPLICATE KEY UPDATE
-                SCORE = VALUES(SCORE),
-                DURATION = VALUES(DURATION),
-                RATE = VALUES(RATE),
-                FILE = VALUES(FILE),
-                USE_TF = 0
-        """)
-        # ====================================================================================
-        
-        db.execute(query, {
+        # 저장소로 스트리밍하면서 내용 해시 계산 (같은 내용은 같은 경로 → 재전송이어도 한 벌만 보관)
+        file_format = file_ext.lstrip('.')
+        file_hash, file_size, _ = await audio_store.save_upload(file, file_format)
+        written = [(file_hash, file_format)]
+        saved_at = time.time()
+
+        # 같은 문항에 동일한 파일이 재전송된 경우(태블릿 재시도): 기존 점수/USE_TF 유지, 재채점 없음
+        existing_hash = (await db.execute(
+            text("""
+                SELECT FILE_HASH
+                FROM AUDIO_STORAGE
+                WHERE PATIENT_ID = :patient_id
+                  AND ORDER_NUM = :order_num
+                  AND ASSESS_TYPE = :assess_type
+                  AND QUESTION_CD = :question_cd
+                  AND QUESTION_NO = :question_no
+                  AND QUESTION_MINOR_NO = :question_minor_no
+            """),
+            {
+                'patient_id': patient_id,
+                'order_num': order_num,
+                'assess_type': assess_type,
+                'question_cd': question_cd,
+                'question_no': question_no,
+                'question_minor_no': question_minor_no,
+            }
+        )).scalar()
+        if existing_hash == file_hash:
+            return {
+                "success": True,
+                "message": "동일한 파일이 이미 저장되어 있음 (변경 없음)",
+                "api_key": api_key,
+                "unchanged": True,
+            }
+
+        await db.execute(UPSERT_AUDIO_QUERY, {
             'patient_id': patient_id,
             'order_num': order_num,
             'assess_type': assess_type,
@@ -214,9 +271,15 @@ async def upload_files_with_metadata(
             'duration': duration,
             'rate': rate,
             'score': score,
-            'file': file_content
+            'file_hash': file_hash,
+            'file_size': file_size,
+            'file_format': file_format,
         })
-        db.commit()
+        # 같은 트랜잭션에서 모델링 작업 등록 (워커가 임대하여 처리)
+        await db.run_sync(enqueue_job, patient_id, order_num)
+        await db.commit()
+        # 커밋 후 워커 깨우기 (회차의 마지막 파일 이후 디바운스 창이 지나면 처리 시작)
+        notify_upload(patient_id, order_num)
         
         return {
             "success": True,
@@ -224,7 +287,8 @@ async def upload_files_with_metadata(
             "api_key": api_key
         }
     except Exception as e:
-        db.rollback()
+        await db.rollback()
+        await _discard_written(db, written, saved_at)
         raise HTTPException(status_code=500, detail=f"파일 저장 실패: {str(e)}")
 
 
@@ -232,7 +296,7 @@ def _run_model_worker_once():
     try:
         from scripts.model_worker import _init_heavy_imports, process_pending_jobs
         pd, text, SessionLocal, APIClient, model_process, save_scores_to_db = _init_heavy_imports()
-        process_pending_jobs(pd, text, SessionLocal, APIClient, model_process, save_scores_to_db)
+        process_pending_jobs(pd, text, SessionLocal, APIClient, model_process, save_scores_to_db, source="db")
     except Exception as e:
         logger.error(f"모델 워커 실행 실패: {e}")
 
@@ -309,55 +373,129 @@ def check_modeling_status(
     }
 
 
+class BulkFileMeta(BaseModel):
+    """일괄 업로드 파일별 메타데이터 (단일 업로드 폼 필드와 같은 이름)"""
+    assess_type: str = Field(..., alias="type")
+    question_cd: str = Field(..., alias="episode")
+    filename: Optional[str] = Field(None, alias="fileName")
+    duration: float
+    rate: str
+    score: float
+
+
 @router.post("/assessments/files/bulk-upload")
 async def upload_files_bulk(
-    pn: str = Form(...),
-    evaluationId: str = Form(...),
+    patient_id: str = Form(..., alias="pn"),
+    order_num: int = Form(..., alias="evaluationId"),
+    metadata: str = Form(...),
     audioFiles: List[UploadFile] = File(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    여러 파일을 한 번에 업로드하여 BLOB으로 저장
+    한 회차(세션)의 파일 여러 개를 한 번의 multipart 요청으로 업로드
+    - metadata: audioFiles와 같은 순서의 JSON 배열
+      [{"type": "CLAP_D", "episode": "AH_SOUND", "fileName": "p_1_1.wav", "duration": 3.2, "rate": "16000", "score": 0}, ...]
+      (fileName을 생략하면 업로드 파일명 사용)
+    - 파일은 저장소로 스트리밍, DB는 executemany 한 번 + 작업 등록을 한 트랜잭션으로 처리
+    - 파일별 status: saved / unchanged(같은 문항에 동일 파일) / error(해당 파일만 건너뜀)
     """
     try:
-        # API Key 발급
-        api_key = issue_api_key(pn, db)
-        
-        uploaded_count = 0
-        for file in audioFiles:
-            # 파일을 바이너리(bytes)로 읽음
-            file_content = await file.read()
-            
-            # 파일 확장자 검증
-            file_ext = os.path.splitext(file.filename)[1].lower()
-            allowed_extensions = ['.wav', '.m4a', '.mp4', '.aac']
-            
-            if file_ext not in allowed_extensions:
-                continue  # 지원하지 않는 파일 형식은 건너뛰기
-            
-            # SQLAlchemy text()를 사용하여 쿼리 실행
-            query = text("""
-                INSERT INTO audio_storage (pn, order_num, filename, audio_blob)
-                VALUES (:pn, :order_num, :filename, :audio_blob)
-            """)
-            
-            db.execute(query, {
-                'pn': pn,
-                'order_num': evaluationId,
-                'filename': file.filename,
-                'audio_blob': file_content
+        items = json.loads(metadata)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"metadata JSON 파싱 실패: {e}")
+    if not isinstance(items, list) or len(items) != len(audioFiles):
+        raise HTTPException(
+            status_code=400,
+            detail=f"metadata 항목 수({len(items) if isinstance(items, list) else 'N/A'})와 파일 수({len(audioFiles)})가 다릅니다"
+        )
+
+    written, saved_at = [], None
+    try:
+        # 업로드 시 인증 없이 키 발급
+        api_key = await db.run_sync(lambda s: issue_api_key(patient_id, s))
+
+        # 이 회차에 이미 저장된 문항별 파일 해시 (재전송 판별용, 조회 1회)
+        existing = {
+            tuple(row[:4]): row[4]
+            for row in (await db.execute(
+                text("""
+                    SELECT ASSESS_TYPE, QUESTION_CD, QUESTION_NO, QUESTION_MINOR_NO, FILE_HASH
+                    FROM AUDIO_STORAGE
+                    WHERE PATIENT_ID = :patient_id
+                      AND ORDER_NUM = :order_num
+                """),
+                {"patient_id": patient_id, "order_num": order_num}
+            )).fetchall()
+        }
+
+        results = []
+        rows = []
+        for index, (file, item) in enumerate(zip(audioFiles, items)):
+            result = {"index": index, "fileName": None, "status": "error", "error": None}
+            results.append(result)
+            try:
+                meta = BulkFileMeta.model_validate(item)
+                filename = meta.filename or file.filename
+                result["fileName"] = filename
+
+                file_ext = os.path.splitext(filename)[1].lower()
+                if file_ext not in ALLOWED_EXTENSIONS:
+                    raise ValueError(f"지원하지 않는 파일 형식: {file_ext}. 허용: {', '.join(ALLOWED_EXTENSIONS)}")
+                question_no, question_minor_no = parse_question_numbers(filename)
+                result.update(question_cd=meta.question_cd, question_no=question_no, question_minor_no=question_minor_no)
+
+                file_format = file_ext.lstrip('.')
+                file_hash, file_size, _ = await audio_store.save_upload(file, file_format)
+                written.append((file_hash, file_format))
+                saved_at = time.time()
+            except Exception as e:
+                result["error"] = str(e)
+                continue
+
+            pk = (meta.assess_type, meta.question_cd, question_no, question_minor_no)
+            if existing.get(pk) == file_hash:
+                result["status"] = "unchanged"
+                continue
+
+            result["status"] = "saved"
+            existing[pk] = file_hash
+            rows.append({
+                'patient_id': patient_id,
+                'order_num': order_num,
+                'assess_type': meta.assess_type,
+                'question_cd': meta.question_cd,
+                'question_no': question_no,
+                'question_minor_no': question_minor_no,
+                'duration': meta.duration,
+                'rate': meta.rate,
+                'score': meta.score,
+                'file_hash': file_hash,
+                'file_size': file_size,
+                'file_format': file_format,
             })
-            uploaded_count += 1
 
-        db.commit()
+        if rows:
+            # 전체 파일을 executemany 한 번으로 기록하고, 같은 트랜잭션에서 작업 등록
+            await db.execute(UPSERT_AUDIO_QUERY, rows)
+            await db.run_sync(enqueue_job, patient_id, order_num)
+            await db.commit()
+            # 커밋 후 워커 깨우기 (단일 업로드와 같은 디바운스 경로)
+            notify_upload(patient_id, order_num)
+
+        counts = {status: sum(1 for r in results if r["status"] == status) for status in ("saved", "unchanged", "error")}
         return {
-            "success": True,
-            "message": f"{uploaded_count}개 파일 DB 저장 완료",
-            "api_key": api_key
+            "success": counts["error"] == 0,
+            "message": f"{counts['saved']}개 저장, {counts['unchanged']}개 변경 없음, {counts['error']}개 실패",
+            "api_key": api_key,
+            "saved": counts["saved"],
+            "unchanged": counts["unchanged"],
+            "failed": counts["error"],
+            "files": results,
         }
 
     except Exception as e:
-        db.rollback()
+        await db.rollback()
+        await _discard_written(db, written, saved_at)
         raise HTTPException(status_code=500, detail=f"파일 저장 실패: {str(e)}")
 
 from pydantic import BaseModel
@@ -376,42 +514,29 @@ class ScoresBulkIn(BaseModel):
     scores: List[ScoreIn]
 
 @router.post("/assessments/score")
-def save_scores_bulk(
+async def save_scores_bulk(
     payload: ScoresBulkIn,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     모델 결과 점수들을 AUDIO_STORAGE 테이블에 직접 업데이트하는 엔드포인트.
     클라이언트에서 json={"scores": [...]} 형태로 호출.
+    항목 수와 관계없이 임시 테이블 + UPDATE JOIN으로 한 번에 반영 (api/score_bulk.py)
+    results: 항목별 matched(키에 해당하는 행 있음) / updated(값이 실제로 바뀜)
     """
     try:
-        for item in payload.scores:
-            query = text("""
-                UPDATE AUDIO_STORAGE
-                SET SCORE = :score,
-                    USE_TF = 1
-                WHERE PATIENT_ID = :patient_id
-                  AND ORDER_NUM = :order_num
-                  AND ASSESS_TYPE = :assess_type
-                  AND QUESTION_CD = :question_cd
-                  AND QUESTION_NO = :question_no
-                  AND QUESTION_MINOR_NO = :question_minor_no
-            """)
-            db.execute(query, {
-                "patient_id": item.patient_id,
-                "order_num": item.order_num,
-                "assess_type": item.assess_type,
-                "question_cd": item.question_cd,
-                "question_no": item.question_no,
-                "question_minor_no": item.question_minor_no,
-                "score": item.score,
-            })
-
-        db.commit()
-        return {"success": True, "count": len(payload.scores)}
+        results = await db.run_sync(update_scores, [item.model_dump() for item in payload.scores])
+        await db.commit()
+        return {
+            "success": True,
+            "count": len(payload.scores),
+            "matched": sum(1 for r in results if r["matched"]),
+            "updated": sum(1 for r in results if r["updated"]),
+            "results": results,
+        }
 
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"점수 저장 실패: {str(e)}")
 
 @router.delete("/assessments/{patient_id}/{order_num}")
@@ -421,18 +546,42 @@ def delete_assessment(
     db: Session = Depends(get_db),
     _: str = Depends(require_api_key_for_patient)
 ):
-    """업로드 실패 시 해당 환자/회차 데이터 롤백용"""
+    """
+    업로드 실패 시 해당 환자/회차 데이터 롤백용
+    행 삭제 후 다른 행이 가리키지 않게 된 저장소 파일도 삭제
+    """
     try:
         params = {"patient_id": patient_id, "order_num": order_num}
+        started = time.time()
+        files = db.execute(
+            text("""
+                SELECT DISTINCT FILE_HASH, FILE_FORMAT
+                FROM AUDIO_STORAGE
+                WHERE PATIENT_ID = :patient_id
+                  AND ORDER_NUM = :order_num
+                  AND FILE_FORMAT IS NOT NULL
+            """),
+            params
+        ).fetchall()
         result = db.execute(
             text("DELETE FROM AUDIO_STORAGE WHERE PATIENT_ID = :patient_id AND ORDER_NUM = :order_num"),
             params
         )
         db.commit()
-        return {
-            "success": True,
-            "deleted_rows": result.rowcount
-        }
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"데이터 롤백 실패: {str(e)}")
+
+    # 행 삭제는 이미 커밋됨 → 파일 정리 실패는 응답을 실패로 만들지 않음 (scripts/gc_audio_store.py로 정리 가능)
+    deleted_files = 0
+    try:
+        deleted_files = audio_store.remove_unreferenced(db, files, saved_before=started)
+        db.rollback()
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"회차 삭제 후 저장소 파일 정리 실패: {e}")
+    return {
+        "success": True,
+        "deleted_rows": result.rowcount,
+        "deleted_files": deleted_files,
+    }
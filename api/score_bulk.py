@@ -0,0 +1,107 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# ============================================
+# 채점 결과 일괄 반영 (AUDIO_STORAGE.SCORE / USE_TF)
+# - 항목 수와 관계없이 왕복 횟수가 일정한 집합 기반 경로:
+#   임시 테이블 생성 → executemany INSERT(드라이버가 다중 행 INSERT로 묶음)
+#   → 복합 키 JOIN으로 행별 매칭/변경 여부 조회 → UPDATE ... JOIN 한 번
+# - 임시 테이블은 대상 테이블에서 컬럼을 복사해 만들므로 타입/콜레이션이 같아 키 인덱스를 그대로 사용
+# - commit은 호출 측에서 수행
+# ============================================
+KEY_COLUMNS = ["PATIENT_ID", "ORDER_NUM", "ASSESS_TYPE", "QUESTION_CD", "QUESTION_NO", "QUESTION_MINOR_NO"]
+
+_TMP_TABLE = "tmp_score_in"
+
+_JOIN_ON = " AND ".join(f"s.{c} = t.{c}" for c in KEY_COLUMNS)
+
+
+def _key(item: dict):
+    return tuple(item[c.lower()] for c in KEY_COLUMNS)
+
+
+def update_scores(db: Session, items, table: str = "AUDIO_STORAGE"):
+    """
+    items: [{"patient_id", "order_num", "assess_type", "question_cd",
+             "question_no", "question_minor_no", "score"}, ...]
+    Returns: items 순서대로 [{"index", "matched", "updated"}, ...]
+      - matched: 복합 키에 해당하는 행이 있음
+      - updated: SCORE 또는 USE_TF 값이 실제로 바뀜 (이미 같은 점수로 반영된 행은 False)
+      - 같은 키가 여러 번 오면 마지막 항목만 반영, 앞선 항목은 updated=False
+    """
+    results = [{"index": i, "matched": False, "updated": False} for i in range(len(items))]
+    if not items:
+        return results
+
+    # 같은 키는 마지막 항목만 사용 (UPDATE ... JOIN에서 어느 값이 적용될지 모호해지지 않게)
+    last_index = {}
+    for i, item in enumerate(items):
+        last_index[_key(item)] = i
+
+    db.execute(text(f"DROP TEMPORARY TABLE IF EXISTS {_TMP_TABLE}"))
+    db.execute(text(f"""
+        CREATE TEMPORARY TABLE {_TMP_TABLE} (
+            PRIMARY KEY (ROW_IDX),
+            KEY ix_key ({", ".join(KEY_COLUMNS)})
+        )
+        SELECT 0 AS ROW_IDX, {", ".join(KEY_COLUMNS)}, SCORE
+        FROM {table}
+        LIMIT 0
+    """))
+    try:
+        db.execute(
+            text(f"""
+                INSERT INTO {_TMP_TABLE} (ROW_IDX, {", ".join(KEY_COLUMNS)}, SCORE)
+                VALUES (:row_idx, {", ".join(":" + c.lower() for c in KEY_COLUMNS)}, :score)
+            """),
+            [dict(items[i], row_idx=i) for i in last_index.values()]
+        )
+
+        # 행별 매칭/변경 여부 (반영 전 값 기준, 갱신할 행은 잠금)
+        rows = db.execute(text(f"""
+            SELECT t.ROW_IDX, (s.SCORE <=> t.SCORE AND s.USE_TF = 1) AS UNCHANGED
+            FROM {_TMP_TABLE} t
+            JOIN {table} s ON {_JOIN_ON}
+            FOR UPDATE
+        """)).fetchall()
+        matched = {}
+        for row_idx, unchanged in rows:
+            matched[row_idx] = not unchanged
+
+        db.execute(text(f"""
+            UPDATE {table} s
+            JOIN {_TMP_TABLE} t ON {_JOIN_ON}
+            SET s.SCORE = t.SCORE,
+                s.USE_TF = 1
+        """))
+    finally:
+        db.execute(text(f"DROP TEMPORARY TABLE IF EXISTS {_TMP_TABLE}"))
+
+    for i, item in enumerate(items):
+        last = last_index[_key(item)]
+        results[i]["matched"] = last in matched
+        results[i]["updated"] = i == last and matched.get(last, False)
+    return results
+
+
+def update_scores_per_item(db: Session, items, table: str = "AUDIO_STORAGE"):
+    """이전 방식(항목마다 UPDATE 1회). 벤치마크 비교용, 결과 형식은 update_scores와 동일"""
+    results = []
+    for i, item in enumerate(items):
+        result = db.execute(
+            text(f"""
+                UPDATE {table}
+                SET SCORE = :score,
+                    USE_TF = 1
+                WHERE PATIENT_ID = :patient_id
+                  AND ORDER_NUM = :order_num
+                  AND ASSESS_TYPE = :assess_type
+                  AND QUESTION_CD = :question_cd
+                  AND QUESTION_NO = :question_no
+                  AND QUESTION_MINOR_NO = :question_minor_no
+            """),
+            item
+        )
+        # 드라이버가 CLIENT_FOUND_ROWS로 연결하면 rowcount는 매칭 행 수
+        results.append({"index": i, "matched": result.rowcount > 0, "updated": None})
+    return results
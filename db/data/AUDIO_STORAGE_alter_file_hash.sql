@@ -0,0 +1,7 @@
+-- 업로드 파일 내용 해시 (SHA-256 hex)
+-- 동일한 파일이 재전송되면 기존 SCORE / USE_TF 를 유지하고 재채점하지 않음
+ALTER TABLE clap.audio_storage
+  ADD COLUMN `FILE_HASH` char(64) DEFAULT NULL COMMENT '파일 내용 SHA-256' AFTER `FILE`;
+
+-- 기존 행 해시 채우기 (MySQL 8: SHA2(blob, 256))
+UPDATE clap.audio_storage SET FILE_HASH = SHA2(FILE, 256) WHERE FILE_HASH IS NULL AND FILE IS NOT NULL;
@@ -0,0 +1,7 @@
+-- 오디오 원본을 DB blob 대신 내용 주소 기반 저장소(api/audio_store.py)에 보관
+-- 행에는 FILE_HASH(기존) / FILE_SIZE / FILE_FORMAT 만 남기고 FILE은 NULL
+-- 기존 blob 행은 scripts/migrate_audio_blobs.py로 저장소에 옮긴 뒤 FILE을 비움
+ALTER TABLE clap.audio_storage
+  MODIFY COLUMN `FILE` mediumblob DEFAULT NULL COMMENT '이전 방식 blob (저장소 이전 후 NULL)',
+  ADD COLUMN `FILE_SIZE` int DEFAULT NULL COMMENT '파일 크기 (bytes)' AFTER `FILE_HASH`,
+  ADD COLUMN `FILE_FORMAT` varchar(8) DEFAULT NULL COMMENT '파일 포맷 (wav, m4a ...), NULL이면 FILE blob 사용' AFTER `FILE_SIZE`;
@@ -0,0 +1,7 @@
+-- 업로드 디바운스를 임대 시점에도 적용 (api/job_queue.py)
+-- 업로드마다 NOT_BEFORE = NOW(3) + 디바운스 로 밀리며, 그 전에는 claim_jobs가 가져가지 않음
+-- → 파일이 아직 도착 중인 회차가 다른 회차의 처리/주기 폴링에 섞여 부분 채점되지 않음
+ALTER TABLE model_job
+  ADD COLUMN `NOT_BEFORE` datetime(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3)
+    COMMENT '업로드 디바운스: 회차의 마지막 업로드 + 디바운스 이후에만 임대' AFTER `LEASE_UNTIL`,
+  ADD KEY `ix_model_job_not_before` (`STATUS`, `NOT_BEFORE`);
@@ -0,0 +1,21 @@
+CREATE TABLE `model_job` (
+  `JOB_ID` bigint unsigned NOT NULL AUTO_INCREMENT,
+  `PATIENT_ID` char(4) NOT NULL,
+  `ORDER_NUM` int unsigned NOT NULL,
+  `STATUS` varchar(8) NOT NULL DEFAULT 'queued' COMMENT 'queued / claimed / done / failed',
+  `RERUN` tinyint(1) NOT NULL DEFAULT 0 COMMENT '처리 중 새 파일 업로드 → 완료 후 다시 queued',
+  `ATTEMPTS` smallint NOT NULL DEFAULT 0,
+  `CLAIMED_BY` varchar(100) DEFAULT NULL,
+  `LEASE_UNTIL` datetime DEFAULT NULL,
+  `NOT_BEFORE` datetime(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3) COMMENT '업로드 디바운스: 회차의 마지막 업로드 + 디바운스 이후에만 임대',
+  `LAST_ERROR` varchar(500) DEFAULT NULL,
+  `CREATE_DATE` datetime DEFAULT CURRENT_TIMESTAMP,
+  `UPDATE_DATE` datetime DEFAULT NULL,
+  PRIMARY KEY (`JOB_ID`),
+  UNIQUE KEY `uk_model_job` (`PATIENT_ID`,`ORDER_NUM`),
+  KEY `ix_model_job_status` (`STATUS`,`LEASE_UNTIL`),
+  KEY `ix_model_job_not_before` (`STATUS`,`NOT_BEFORE`)
+) ENGINE=InnoDB 
+DEFAULT CHARSET=utf8mb4
+COLLATE=utf8mb4_0900_ai_ci 
+COMMENT='모델링 작업 큐';
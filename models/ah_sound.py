@@ -1,5 +1,6 @@
 ﻿import sys
 import os
+import threading
 # 필요한 라이브러리 import
 try:
     import tensorflow as tf
@@ -8,6 +9,7 @@ try:
     import librosa
     import warnings
     warnings.filterwarnings('ignore')
+    from models import audio_clip
     
     print("✅ 모든 라이브러리 import 완료")
     
@@ -16,12 +18,22 @@ except ImportError as e:
     print("필요한 라이브러리를 설치하세요.")
     sys.exit(1)
 
+# SPICE SavedModel 로컬 경로 (네트워크 접근 없음)
+# 준비: https://tfhub.dev/google/spice/2?tf-hub-format=compressed 를 받아 이 디렉터리에 압축 해제
+SPICE_MODEL_DIR = os.getenv("SPICE_MODEL_DIR", os.path.join(os.path.dirname(__file__), "spice_2"))
+# 채점 캐시 지문(models/score_cache.py)에 쓰이는 모델 아티팩트
+ARTIFACTS = [SPICE_MODEL_DIR]
+
+_SPICE_MODEL = None
+_SPICE_LOCK = threading.Lock()
+
 def setup_tensorflow():
     """TensorFlow 환경 설정"""
     # 스레드 수 제한으로 안정성 향상 (이미 초기화된 경우 스킵)
     try:
-        tf.config.threading.set_intra_op_parallelism_threads(1)
-        tf.config.threading.set_inter_op_parallelism_threads(1)
+        tf_threads = int(os.getenv("MODEL_TF_THREADS", "1"))
+        tf.config.threading.set_intra_op_parallelism_threads(tf_threads)
+        tf.config.threading.set_inter_op_parallelism_threads(tf_threads)
     except RuntimeError:
         pass  # 이미 초기화된 경우 무시
     
@@ -36,22 +48,53 @@ def setup_tensorflow():
     
     tf.config.run_functions_eagerly(False)
 
-def clear_tfhub_cache():
-    """TensorFlow Hub 캐시 클리어"""
-    import tempfile
-    import shutil
-    
-    try:
-        cache_dir = os.path.join(tempfile.gettempdir(), 'tfhub_modules')
-        if os.path.exists(cache_dir):
-            shutil.rmtree(cache_dir)
-            print("TensorFlow Hub 캐시 클리어 완료")
-    except Exception as e:
-        pass
+def load_spice_model(model_dir=None):
+    """로컬 SavedModel에서 SPICE를 한 번만 로드하고 워밍업 (이후 호출은 캐시 반환)"""
+    global _SPICE_MODEL
+    if _SPICE_MODEL is not None:
+        return _SPICE_MODEL
+
+    with _SPICE_LOCK:
+        if _SPICE_MODEL is None:
+            model_dir = model_dir or SPICE_MODEL_DIR
+            if not os.path.exists(os.path.join(model_dir, "saved_model.pb")):
+                raise FileNotFoundError(
+                    f"SPICE SavedModel이 없습니다: {model_dir} "
+                    f"(SPICE_MODEL_DIR 환경 변수로 경로 지정)"
+                )
+
+            print(f"SPICE 모델 로딩 중... ({model_dir})")
+            with tf.device('/CPU:0'):
+                model = hub.load(model_dir)
+
+                # 모델 워밍업 (프로세스당 1회)
+                dummy_audio = tf.zeros([1000], dtype=tf.float32)
+                try:
+                    _ = model.signatures["serving_default"](dummy_audio)
+                    print("모델 워밍업 완료")
+                except Exception as warmup_error:
+                    pass
+
+            print("SPICE 모델 로드 완료")
+            _SPICE_MODEL = model
+    return _SPICE_MODEL
+
+def load():
+    """SPICE SavedModel 상주 (load()/is_loaded()/unload() 공통 계약)"""
+    load_spice_model()
+
+def is_loaded():
+    return _SPICE_MODEL is not None
+
+def unload():
+    global _SPICE_MODEL
+    with _SPICE_LOCK:
+        _SPICE_MODEL = None
 
 def load_audio(filepath, sample_rate=16000):
-    """오디오 파일을 로드하고 정규화"""
-    audio, sr = librosa.load(filepath, sr=sample_rate)
+    """오디오 파일(또는 DecodedClip)을 로드하고 정규화"""
+    clip = audio_clip.as_clip(filepath, sr=sample_rate)
+    audio, sr = clip.pcm, clip.sr
     if np.max(np.abs(audio)) > 0:
         audio = audio / np.max(np.abs(audio))
     return audio, sr
@@ -59,78 +102,52 @@ def load_audio(filepath, sample_rate=16000):
 def estimate_pitch_spice_only(audio, sr=16000):
     """SPICE 모델을 사용한 피치 추정"""
     try:
-        print("SPICE 모델 로딩 중...")
-        tf.keras.backend.clear_session()
-        clear_tfhub_cache()
-        
+        model = load_spice_model()
+
+        if np.max(np.abs(audio)) == 0:
+            raise ValueError("오디오에 신호가 없습니다")
+
+        audio_tensor = tf.convert_to_tensor(audio, dtype=tf.float32)
+
         with tf.device('/CPU:0'):
-            model = hub.load("https://tfhub.dev/google/spice/2")
-        
-        print("SPICE 모델 로드 완료")
-        
-        try:
-            if np.max(np.abs(audio)) == 0:
-                raise ValueError("오디오에 신호가 없습니다")
-            
-            audio_tensor = tf.convert_to_tensor(audio, dtype=tf.float32)
-            
-            with tf.device('/CPU:0'):
-                signature_keys = list(model.signatures.keys())
-                
-                # 모델 워밍업
-                dummy_audio = tf.zeros([1000], dtype=tf.float32)
-                try:
-                    _ = model.signatures["serving_default"](dummy_audio)
-                    print("모델 워밍업 완료")
-                except Exception as warmup_error:
-                    pass
-                
-                # 실제 모델 실행
-                print("SPICE 모델 실행 중...")
-                outputs = model.signatures["serving_default"](audio_tensor)
-                
-                pitch = outputs["pitch"].numpy().flatten()
-                uncertainty = outputs["uncertainty"].numpy().flatten()
-                confidence = 1.0 - uncertainty
-            
-            return pitch, confidence
-            
-        finally:
-            # ============================================================================
-            # 메모리 정리 - 2025.08.22 추가
-            # SPICE 모델 사용 완료 후 메모리에서 제거하여 메모리 누수 방지
-            # ============================================================================
-            del model
-            tf.keras.backend.clear_session()
-            print("SPICE 모델 메모리 정리 완료")
-        
+            # 실제 모델 실행
+            print("SPICE 모델 실행 중...")
+            outputs = model.signatures["serving_default"](audio_tensor)
+
+            pitch = outputs["pitch"].numpy().flatten()
+            uncertainty = outputs["uncertainty"].numpy().flatten()
+            confidence = 1.0 - uncertainty
+
+        return pitch, confidence
+
     except Exception as e:
         print(f"SPICE 모델 실행 실패: {e}")
         raise e
 
 def filter_pitch(pitch, confidence, threshold=0.7):
-    """신뢰도가 높은 피치만 필터링"""
-    filtered = [p if c >= threshold else 0 for p, c in zip(pitch, confidence)]
-    valid_count = sum(1 for p in filtered if p > 0)
-    return filtered
-
-# def moving_std(seq, win=5):
-#     """이동 윈도우 표준편차 계산"""
-#     if len(seq) == 0:
-#         return []
-    
-#     padded = np.pad(seq, (win//2,), mode='edge')
-#     std_values = []
-    
-#     for i in range(len(seq)):
-#         window = padded[i:i+win]
-#         valid_values = window[window > 0]
-#         if len(valid_values) > 1:
-#             std_values.append(np.std(valid_values))
-#         else:
-#             std_values.append(0.0)
-    
-#     return std_values
+    """신뢰도가 높은 피치만 필터링 (나머지는 0)"""
+    pitch = np.asarray(pitch, dtype=np.float64)
+    confidence = np.asarray(confidence)
+    return np.where(confidence >= threshold, pitch, 0.0)
+
+def moving_std(seq, win=5):
+    """
+    이동 윈도우 표준편차 계산 (0보다 큰 값만 사용, 유효값 1개 이하면 0)
+    edge 패딩 후 sliding_window_view로 전체 프레임을 한 번에 계산
+    """
+    seq = np.asarray(seq, dtype=np.float64)
+    if len(seq) == 0:
+        return np.zeros(0, dtype=np.float64)
+
+    padded = np.pad(seq, (win//2,), mode='edge')
+    windows = np.lib.stride_tricks.sliding_window_view(padded, win)[:len(seq)]   # (N, win)
+
+    valid = windows > 0
+    count = valid.sum(axis=1)
+    denom = np.maximum(count, 1)
+    mean = np.where(valid, windows, 0.0).sum(axis=1) / denom
+    var = np.where(valid, (windows - mean[:, None]) ** 2, 0.0).sum(axis=1) / denom
+    return np.where(count > 1, np.sqrt(var), 0.0)
 
 def analyze_pitch_stability(filepath, std_threshold=.5, confidence_threshold=0.1, window_size=9):
     """SPICE 전용 피치 안정성 분석 파이프라인"""
@@ -151,26 +168,12 @@ def analyze_pitch_stability(filepath, std_threshold=.5, confidence_threshold=0.1
         filtered_pitch = filter_pitch(pitch, confidence, threshold=confidence_threshold)
         
         # 4. 안정성 평가
-        def custom_moving_std(seq, win):
-            if len(seq) == 0:
-                return []
-            padded = np.pad(seq, (win//2,), mode='edge')
-            std_values = []
-            for i in range(len(seq)):
-                window = padded[i:i+win]
-                valid_values = window[window > 0]
-                if len(valid_values) > 1:
-                    std_values.append(np.std(valid_values))
-                else:
-                    std_values.append(0.0)
-            return std_values
-        
-        pitch_std = custom_moving_std(filtered_pitch, window_size)
-        mono_flags = [s < std_threshold and p > 0 for s, p in zip(pitch_std, filtered_pitch)]
+        pitch_std = moving_std(filtered_pitch, window_size)
+        mono_flags = (pitch_std < std_threshold) & (filtered_pitch > 0)
         
         # 5. 결과 계산
         actual_fps = len(filtered_pitch) / actual_duration
-        mono_duration = sum(mono_flags) / actual_fps
+        mono_duration = int(mono_flags.sum()) / actual_fps
 
         return mono_duration
         
@@ -0,0 +1,86 @@
+import io
+import os
+import hashlib
+import tempfile
+from dataclasses import dataclass
+
+import numpy as np
+import librosa
+
+# =========================================================
+# 디코딩된 오디오 클립
+# - 파일 1개를 작업당 한 번만 librosa.load(16kHz mono) 하고,
+#   mel / Whisper 단계가 같은 PCM을 공유하도록 전달
+# =========================================================
+SAMPLE_RATE = 16000
+
+
+@dataclass(frozen=True)
+class DecodedClip:
+    pcm: np.ndarray         # (N,) float32, 16kHz mono
+    sr: int = SAMPLE_RATE
+    path: str = None        # 원본 파일 경로 (로그용)
+    num_bytes: int = 0      # 원본 파일 크기 (ptk/talk_clean duration 계산용)
+    content_hash: str = None  # 원본 파일 내용 SHA-256 (AUDIO_STORAGE.FILE_HASH와 동일, 캐시 키)
+
+    @property
+    def duration(self) -> float:
+        return len(self.pcm) / self.sr if self.sr else 0.0
+
+
+def file_sha256(path, chunk_size=1024 * 1024) -> str:
+    """파일 내용 SHA-256 (hex)"""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def load_clip(path, sr=SAMPLE_RATE, content_hash=None) -> DecodedClip:
+    """
+    오디오 파일을 디코딩/리샘플링하여 DecodedClip 생성
+    content_hash: 이미 알고 있는 내용 해시(오디오 저장소 파일 등)면 다시 계산하지 않음
+    """
+    y, _ = librosa.load(path, sr=sr, mono=True)
+    return DecodedClip(
+        pcm=np.ascontiguousarray(y, dtype=np.float32),
+        sr=sr,
+        path=str(path),
+        num_bytes=os.path.getsize(path),
+        content_hash=content_hash or file_sha256(path),
+    )
+
+
+def load_clip_bytes(data: bytes, sr=SAMPLE_RATE, name=None, suffix=".wav") -> DecodedClip:
+    """
+    메모리의 오디오 바이트(DB blob 등)를 임시 파일 없이 디코딩
+    soundfile이 읽지 못하는 포맷(m4a/aac 등)은 ffmpeg 경로를 위해 임시 파일로 한 번만 기록
+    """
+    try:
+        y, _ = librosa.load(io.BytesIO(data), sr=sr, mono=True)
+    except Exception:
+        tmp = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
+        try:
+            tmp.write(data)
+            tmp.close()
+            y, _ = librosa.load(tmp.name, sr=sr, mono=True)
+        finally:
+            os.unlink(tmp.name)
+    return DecodedClip(
+        pcm=np.ascontiguousarray(y, dtype=np.float32),
+        sr=sr,
+        path=name,
+        num_bytes=len(data),
+        content_hash=hashlib.sha256(data).hexdigest(),
+    )
+
+
+def as_clip(src, sr=SAMPLE_RATE) -> DecodedClip:
+    """경로 또는 DecodedClip을 받아 요청한 샘플레이트의 DecodedClip으로 반환"""
+    if isinstance(src, DecodedClip):
+        if src.sr == sr:
+            return src
+        pcm = librosa.resample(src.pcm, orig_sr=src.sr, target_sr=sr).astype(np.float32)
+        return DecodedClip(pcm=pcm, sr=sr, path=src.path, num_bytes=src.num_bytes, content_hash=src.content_hash)
+    return load_clip(src, sr=sr)
@@ -0,0 +1,160 @@
+import os
+import time
+import hashlib
+import sqlite3
+import tempfile
+import threading
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# =========================================================
+# 중간 특징 저장소 (SQLite 색인 + .npy 파일)
+# - 오디오 내용 해시별로 log-mel, Whisper 토큰 ID를 보관
+# - feature: "tokens" / "mel" 등, variant: 체크포인트(+ 스냅샷 리비전)·디코딩 옵션·전처리 파라미터
+# - Keras 헤드만 바꿔 재채점할 때 Whisper 전사/멜 계산을 건너뜀
+# - .npy는 임시 파일에 쓴 뒤 os.replace로 교체 (부분 기록된 파일을 읽지 않음)
+# =========================================================
+STORE_DIR = os.getenv(
+    "FEATURE_STORE_DIR",
+    os.path.join(os.path.dirname(__file__), ".cache", "features"),
+)
+ENABLED = os.getenv("FEATURE_STORE_ENABLED", "1") != "0"
+
+_LOCK = threading.Lock()
+_CONN = None
+_STATS = {"hits": 0, "misses": 0, "puts": 0}
+
+
+def _connect():
+    global _CONN
+    if _CONN is None:
+        os.makedirs(STORE_DIR, exist_ok=True)
+        conn = sqlite3.connect(os.path.join(STORE_DIR, "index.sqlite"), check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS features (
+                audio_hash TEXT NOT NULL,
+                feature    TEXT NOT NULL,
+                variant    TEXT NOT NULL,
+                rel_path   TEXT NOT NULL,
+                shape      TEXT NOT NULL,
+                dtype      TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (audio_hash, feature, variant)
+            )
+            """
+        )
+        _CONN = conn
+    return _CONN
+
+
+def _rel_path(audio_hash, feature, variant):
+    # variant는 길 수 있으므로 파일명에는 짧은 해시만 사용 (원문은 색인에 보관)
+    variant_id = hashlib.sha1(variant.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(feature, audio_hash[:2], f"{audio_hash}_{variant_id}.npy")
+
+
+def get(audio_hash, feature, variant, mmap=False):
+    """저장된 배열 반환, 없으면 None. mmap=True면 읽기 전용 memory-map"""
+    if not ENABLED or not audio_hash:
+        return None
+    with _LOCK:
+        row = _connect().execute(
+            "SELECT rel_path FROM features WHERE audio_hash = ? AND feature = ? AND variant = ?",
+            (audio_hash, feature, variant),
+        ).fetchone()
+    path = os.path.join(STORE_DIR, row[0]) if row else None
+    if path is None or not os.path.exists(path):
+        with _LOCK:
+            _STATS["misses"] += 1
+        return None
+    try:
+        arr = np.load(path, mmap_mode="r" if mmap else None, allow_pickle=False)
+    except Exception as e:
+        logger.warning(f"특징 파일 읽기 실패, 다시 계산: {path} ({e})")
+        with _LOCK:
+            _STATS["misses"] += 1
+        return None
+    with _LOCK:
+        _STATS["hits"] += 1
+    return arr
+
+
+def put(audio_hash, feature, variant, array):
+    """배열 저장 (같은 키는 덮어씀)"""
+    if not ENABLED or not audio_hash:
+        return
+    array = np.asarray(array)
+    rel_path = _rel_path(audio_hash, feature, variant)
+    path = os.path.join(STORE_DIR, rel_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, array, allow_pickle=False)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+    with _LOCK:
+        conn = _connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO features (audio_hash, feature, variant, rel_path, shape, dtype, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (audio_hash, feature, variant, rel_path, str(tuple(array.shape)), str(array.dtype), time.time()),
+        )
+        conn.commit()
+        _STATS["puts"] += 1
+
+
+def get_or_compute(audio_hash, feature, variant, compute):
+    """저장소에 있으면 읽고, 없으면 compute()로 계산 후 저장"""
+    arr = get(audio_hash, feature, variant)
+    if arr is not None:
+        return arr
+    arr = compute()
+    try:
+        put(audio_hash, feature, variant, arr)
+    except Exception as e:
+        logger.warning(f"특징 저장 실패 ({feature}): {e}")
+    return arr
+
+
+def get_many_or_compute(audio_hashes, feature, variant, compute_missing):
+    """
+    배치용: 해시 순서대로 배열 리스트 반환
+    compute_missing(missing): 없는 항목 인덱스 리스트 → 그 순서대로 배열 리스트 (배치로 한 번에 계산)
+    """
+    results = [get(h, feature, variant) for h in audio_hashes]
+    missing = [i for i, arr in enumerate(results) if arr is None]
+    if missing:
+        computed = compute_missing(missing)
+        for i, arr in zip(missing, computed):
+            results[i] = arr
+            try:
+                put(audio_hashes[i], feature, variant, arr)
+            except Exception as e:
+                logger.warning(f"특징 저장 실패 ({feature}): {e}")
+    return results
+
+
+def cached_mel(clip, variant, compute):
+    """DecodedClip의 mel을 저장소에서 읽거나 compute(clip)으로 계산 (variant: 모듈/파라미터)"""
+    return get_or_compute(
+        getattr(clip, "content_hash", None), "mel", f"{variant}:sr{clip.sr}", lambda: compute(clip)
+    )
+
+
+def stats() -> dict:
+    with _LOCK:
+        snapshot = dict(_STATS)
+    total = snapshot["hits"] + snapshot["misses"]
+    snapshot["hit_rate"] = snapshot["hits"] / total if total else 0.0
+    return snapshot
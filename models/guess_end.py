@@ -1,9 +1,12 @@
 import os
+import threading
 import numpy as np
 import tensorflow as tf
 import librosa
 import torch
-from transformers import WhisperProcessor, WhisperForConditionalGeneration
+from models import whisper_registry
+from models import audio_clip
+from models import feature_store
 
 # =========================================================
 # Config
@@ -41,11 +44,14 @@ class BuildCrossAttnMask(tf.keras.layers.Layer):
 # =========================================================
 # Whisper
 # =========================================================
-device = torch.device ("cuda" if torch.cuda.is_available() else "cpu")
-
-processor = WhisperProcessor.from_pretrained("openai/whisper-small")
-whisper_model = WhisperForConditionalGeneration.from_pretrained("openai/whisper-small").to(device)
-whisper_model.eval()
+WHISPER_CHECKPOINT = "openai/whisper-small"
+device = whisper_registry.device
+# 채점 캐시 지문(models/score_cache.py)에 쓰이는 모델 아티팩트
+ARTIFACTS = [MODEL_PATH, WHISPER_CHECKPOINT]
+
+# import 시에는 processor(토크나이저)만, 모델 가중치는 load()에서
+processor = whisper_registry.get_processor(WHISPER_CHECKPOINT)
+_WHISPER = whisper_registry.WhisperHold(WHISPER_CHECKPOINT)
 forced_ids = processor.get_decoder_prompt_ids(language="ko", task="transcribe")
 
 # PAD_ID 계산 
@@ -56,27 +62,20 @@ PAD_ID     = BASE_VOCAB
 # =========================================================
 # 전처리 유틸
 # =========================================================
-def wav_to_mel(wav_path: str, sr=SAMPLE_RATE, n_mels=N_MELS):
-    y, _ = librosa.load(wav_path, sr=sr, mono=True)
-    mel = librosa.feature.melspectrogram(y=y, sr=sr, n_mels=n_mels)
+def _compute_mel(clip, n_mels=N_MELS):
+    mel = librosa.feature.melspectrogram(y=clip.pcm, sr=clip.sr, n_mels=n_mels)
     mel_db = librosa.power_to_db(mel, ref=np.max)
     mel_db = np.expand_dims(mel_db, axis=-1)  # (128, T, 1)
     return mel_db
 
-@torch.no_grad()
-def wav_to_tokens_and_mask(wav_path: str, sr=SAMPLE_RATE):
-    if not os.path.exists(wav_path):
-        raise FileNotFoundError(f"WAV not found: {wav_path}")
-    y, _ = librosa.load(wav_path, sr=sr, mono=True)
-    inputs = processor(y, sampling_rate=sr, return_tensors="pt")
-    input_features = inputs.input_features.to(device)
-    pred_ids = whisper_model.generate(
-        input_features,
-        forced_decoder_ids=forced_ids,
-        do_sample=False,
-        max_new_tokens=MAX_TOKEN_LENGTH,
-    )
-    token_ids = pred_ids[0].cpu().numpy().astype(np.int32)
+def clip_to_mel(clip, n_mels=N_MELS):
+    # 같은 오디오의 mel은 특징 저장소(models/feature_store.py)에서 재사용
+    return feature_store.cached_mel(clip, f"guess_end:n{n_mels}", lambda c: _compute_mel(c, n_mels))
+
+def wav_to_mel(wav_path: str, sr=SAMPLE_RATE, n_mels=N_MELS):
+    return clip_to_mel(audio_clip.load_clip(wav_path, sr=sr), n_mels=n_mels)
+
+def _pad_tokens_and_mask(token_ids):
     token_len = token_ids.shape[0]
     if token_len < MAX_TOKEN_LENGTH: 
         pad_len = MAX_TOKEN_LENGTH - token_len         
@@ -91,6 +90,26 @@ def wav_to_tokens_and_mask(wav_path: str, sr=SAMPLE_RATE):
         token_mask[0] = 1
     return token_ids, token_mask
 
+def clips_to_tokens_and_masks(clips):
+    """여러 클립을 배치 generate로 전사 → [(token_ids, token_mask), ...]"""
+    pred_ids = whisper_registry.transcribe(
+        WHISPER_CHECKPOINT,
+        [clip.pcm for clip in clips],
+        keys=[clip.content_hash for clip in clips],
+        forced_language="ko",
+        do_sample=False,
+        max_new_tokens=MAX_TOKEN_LENGTH,
+    )
+    return [_pad_tokens_and_mask(ids) for ids in pred_ids]
+
+def clip_to_tokens_and_mask(clip):
+    return clips_to_tokens_and_masks([clip])[0]
+
+def wav_to_tokens_and_mask(wav_path: str, sr=SAMPLE_RATE):
+    if not os.path.exists(wav_path):
+        raise FileNotFoundError(f"WAV not found: {wav_path}")
+    return clip_to_tokens_and_mask(audio_clip.load_clip(wav_path, sr=sr))
+
 def pad_mels(mel_list):
     max_time = max(m.shape[1] for m in mel_list)
     batch = np.zeros((len(mel_list), N_MELS, max_time, 1), dtype=np.float32)
@@ -110,28 +129,49 @@ for pid in range(NUM_PROMPTS):
 
 # =========================================================
 # 모델 로딩 (한 번만 로드해서 캐시)
+# load() / is_loaded() / unload(): 모든 models/* 모듈 공통 계약 (models/warmup.py)
 # =========================================================
 _MODEL = None
+_LOAD_LOCK = threading.Lock()
+
 def _load_model(model_path=MODEL_PATH):
     global _MODEL
-    if _MODEL is None:
-        _MODEL = tf.keras.models.load_model(model_path, custom_objects={"BuildCrossAttnMask": BuildCrossAttnMask})
+    with _LOAD_LOCK:
+        if _MODEL is None:
+            _MODEL = tf.keras.models.load_model(model_path, custom_objects={"BuildCrossAttnMask": BuildCrossAttnMask})
     return _MODEL
 
+def load():
+    """Keras 헤드 + Whisper(whisper-small) 상주"""
+    _load_model()
+    _WHISPER.hold()
+
+def is_loaded():
+    return _MODEL is not None and _WHISPER.held
+
+def unload():
+    global _MODEL
+    with _LOAD_LOCK:
+        _MODEL = None
+    _WHISPER.drop()
+
 # =========================================================
-#  wav_path: 파일 경로 # prompt_id: 0~4 (0=1번 문항)
+#  wav_path: 파일 경로 또는 DecodedClip # prompt_id: 0~4 (0=1번 문항)
 # =========================================================
-def predict_guess_end_score(wav_path: str, prompt_id: int, model_path: str = MODEL_PATH, return_probs: bool = False):
+def predict_guess_end_score(wav_path: str, prompt_id: int, model_path: str = MODEL_PATH, return_probs: bool = False, tokens=None):
     if not (0 <= int(prompt_id) <= 4):
         # raise ValueError(f"prompt_id must be in 0..4, got {prompt_id}") 
         print(f"GUESS_END : prompt_id must be in 0..4, got {prompt_id}") 
         pass
 
+    load()
     model = _load_model(model_path)
 
-    # 전처리
-    mel = wav_to_mel(wav_path)
-    tok_ids, tok_msk = wav_to_tokens_and_mask(wav_path)
+    # 전처리 (디코딩은 한 번만)
+    clip = audio_clip.as_clip(wav_path)
+    mel = clip_to_mel(clip)
+    # tokens: 배치 전사 결과 (token_ids, token_mask), 없으면 단건 전사
+    tok_ids, tok_msk = clip_to_tokens_and_mask(clip) if tokens is None else tokens
 
     mel_b = pad_mels([mel])                            
     tok_b = tok_ids[None, :].astype(np.int32)           
@@ -145,6 +185,34 @@ def predict_guess_end_score(wav_path: str, prompt_id: int, model_path: str = MOD
 
     return score
 
+# =========================================================
+#  배치 채점: 문항 그룹 전체를 predict 1회로 처리
+#  wav_paths: 파일 경로 또는 DecodedClip 리스트 # prompt_ids: 파일별 0~4
+# =========================================================
+def predict_guess_end_scores(wav_paths, prompt_ids, model_path: str = MODEL_PATH, tokens_list=None):
+    clips = [audio_clip.as_clip(p) for p in wav_paths]
+    if not clips:
+        return []
+    prompt_ids = [int(pid) for pid in prompt_ids]
+    for pid in prompt_ids:
+        if not (0 <= pid <= 4):
+            print(f"GUESS_END : prompt_id must be in 0..4, got {pid}")
+
+    load()
+    model = _load_model(model_path)
+
+    if tokens_list is None:
+        tokens_list = clips_to_tokens_and_masks(clips)
+
+    mel_b = pad_mels([clip_to_mel(clip) for clip in clips])
+    tok_b = np.stack([tok for tok, _ in tokens_list]).astype(np.int32)
+    msk_b = np.stack([msk for _, msk in tokens_list]).astype(np.int32)
+    pid_b = np.array(prompt_ids, dtype=np.int32)
+    sw_b = PROMPT_MASKS[pid_b].astype(np.float32)
+
+    probs = model.predict([mel_b, tok_b, msk_b, pid_b, sw_b], verbose=0)
+    return [int(np.argmax(p)) for p in probs]  # 0/1/2
+
 # =========================================================
 # 사용 예시
 # =========================================================
@@ -7,10 +7,13 @@ import tensorflow as tf
 # )
 # from tensorflow.keras.models import Model
 # from tensorflow.keras.optimizers import Adam
-from transformers import WhisperProcessor, WhisperForConditionalGeneration
+from models import whisper_registry
+from models import audio_clip
+from models import feature_store
 from tensorflow.keras.models import load_model
 import torch
 import os
+import threading
 from tqdm import tqdm
 from ui.utils.env_utils import model_common_path
 
@@ -26,43 +29,94 @@ LR = 1e-4
 EPOCHS = 30
 BATCH_SIZE = 2
 TEMPERATURE = 0
+WHISPER_CHECKPOINT = "openai/whisper-base"
+MODEL_PATH = os.path.join(model_common_path(), "model_ltn_rpt.keras")
+# 채점 캐시 지문(models/score_cache.py)에 쓰이는 모델 아티팩트
+ARTIFACTS = [MODEL_PATH, WHISPER_CHECKPOINT]
 
 # ===== Whisper 초기화 =====
-device = "cuda" if torch.cuda.is_available() else "cpu"
-processor = WhisperProcessor.from_pretrained("openai/whisper-base")
-whisper_model = WhisperForConditionalGeneration.from_pretrained("openai/whisper-base").to(device)
+device = whisper_registry.device
+# import 시에는 processor(토크나이저)만, 모델 가중치는 load()에서
+processor = whisper_registry.get_processor(WHISPER_CHECKPOINT)
+_WHISPER = whisper_registry.WhisperHold(WHISPER_CHECKPOINT)
+
+# ===== 모델 캐시 (load()/is_loaded()/unload()) =====
+# 예전에는 predict_score 호출마다 load_model을 다시 했음 → 한 번 로드 후 상주
+_MODEL = None
+_LOAD_LOCK = threading.Lock()
+
+def _load_model():
+    global _MODEL
+    with _LOAD_LOCK:
+        if _MODEL is None:
+            _MODEL = load_model(MODEL_PATH)
+    return _MODEL
+
+def load():
+    """Keras 헤드 + Whisper(whisper-base) 상주"""
+    _load_model()
+    _WHISPER.hold()
+
+def is_loaded():
+    return _MODEL is not None and _WHISPER.held
+
+def unload():
+    global _MODEL
+    with _LOAD_LOCK:
+        _MODEL = None
+    _WHISPER.drop()
 
 
 
 # ========== 함수 정의 ==========
-def wav_to_mel(wav_path, sr=SAMPLE_RATE, n_mels=N_MELS):
-    y, _ = librosa.load(wav_path, sr=sr)
-    mel = librosa.feature.melspectrogram(y=y, sr=sr, n_mels=n_mels)
+def _compute_mel(clip, n_mels=N_MELS):
+    mel = librosa.feature.melspectrogram(y=clip.pcm, sr=clip.sr, n_mels=n_mels)
     mel_db = librosa.power_to_db(mel, ref=np.max)
     mel_db = mel_db[..., np.newaxis]  # (n_mels, time, 1)
     return mel_db.astype(np.float32)
 
-def wav_to_token_ids(wav_path, sr=SAMPLE_RATE, seq_len=TOKEN_SEQ_LEN):
-    y, _ = librosa.load(wav_path, sr=sr)
-    inputs = processor(y, sampling_rate=sr, return_tensors="pt")
-    input_features = inputs.input_features.to(device)
-    pred_ids = whisper_model.generate(input_features, temperature=TEMPERATURE)
-    token_ids = pred_ids[0].cpu().tolist()
+def clip_to_mel(clip, n_mels=N_MELS):
+    # 같은 오디오의 mel은 특징 저장소(models/feature_store.py)에서 재사용
+    return feature_store.cached_mel(clip, f"ltn_rpt:n{n_mels}", lambda c: _compute_mel(c, n_mels))
+
+def wav_to_mel(wav_path, sr=SAMPLE_RATE, n_mels=N_MELS):
+    return clip_to_mel(audio_clip.load_clip(wav_path, sr=sr), n_mels=n_mels)
+
+def _pad_token_ids(token_ids, seq_len=TOKEN_SEQ_LEN):
+    token_ids = list(token_ids)
     if len(token_ids) < seq_len:
         token_ids += [0] * (seq_len - len(token_ids))
     else:
         token_ids = token_ids[:seq_len]
     return np.array(token_ids, dtype=np.int32)
 
+def clips_to_token_ids(clips, seq_len=TOKEN_SEQ_LEN):
+    """여러 클립을 배치 generate로 전사 → 파일별 (seq_len,) 토큰"""
+    pred_ids = whisper_registry.transcribe(
+        WHISPER_CHECKPOINT,
+        [clip.pcm for clip in clips],
+        keys=[clip.content_hash for clip in clips],
+        temperature=TEMPERATURE,
+    )
+    return [_pad_token_ids(ids, seq_len=seq_len) for ids in pred_ids]
+
+def clip_to_token_ids(clip, seq_len=TOKEN_SEQ_LEN):
+    return clips_to_token_ids([clip], seq_len=seq_len)[0]
+
+def wav_to_token_ids(wav_path, sr=SAMPLE_RATE, seq_len=TOKEN_SEQ_LEN):
+    return clip_to_token_ids(audio_clip.load_clip(wav_path, sr=sr), seq_len=seq_len)
+
 def prepare_wave(wav_path):
-    # wave 파일을 변환
+    # wave 파일을 변환 (경로 또는 DecodedClip 리스트)
     mel_list, token_list, label_list = [], [], []
 
-    for path in tqdm(wav_path, desc="Processing audio files", total=len(wav_path)):
-        mel = wav_to_mel(path)  # (128, time, 1)
-        token_ids = wav_to_token_ids(path)  # (128,)
+    clips = [audio_clip.as_clip(path) for path in wav_path]
+    for clip in tqdm(clips, desc="Processing audio files", total=len(clips)):
+        mel = clip_to_mel(clip)  # (128, time, 1)
         mel_list.append(mel)
-        token_list.append(token_ids)
+
+    # 전체 파일을 배치 generate로 한 번에 전사
+    token_list = clips_to_token_ids(clips)  # [(128,), ...]
 
     # 패딩을 위해 최대 time
     #max_time = max(m.shape[1] for m in mel_list)
@@ -79,11 +133,11 @@ def prepare_wave(wav_path):
     return mel_batch, token_batch
 
 def predict_score(wav_path):
+    load()
     mel_batch, token_batch = prepare_wave(wav_path)
     # model = load_model('model_ltn_rpt.keras') 
 
-    MODEL_PATH = os.path.join(model_common_path(), "model_ltn_rpt.keras")
-    model = load_model(MODEL_PATH)
+    model = _load_model()
 
     # ========== 예측 ==========
     preds = model.predict({'mel_input': mel_batch, 'token_input': token_batch})
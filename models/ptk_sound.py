@@ -1,30 +1,58 @@
 import os
+import threading
 from tensorflow.keras.models import load_model
 import librosa
 import numpy as np
+from models import audio_clip
+from models import feature_store
 
 MODEL_PATH_WHOLE = os.path.join(os.path.dirname(__file__), "ptk_model.keras")
-model_whole = load_model(MODEL_PATH_WHOLE)
-
 MODEL_PATH_EACH = os.path.join(os.path.dirname(__file__), "teo_model.keras")
-model_each = load_model(MODEL_PATH_EACH)
+# 채점 캐시 지문(models/score_cache.py)에 쓰이는 모델 아티팩트
+ARTIFACTS = [MODEL_PATH_EACH, MODEL_PATH_WHOLE]
+
+# 모델은 import 시점이 아니라 처음 사용할 때 로드 (경로별 캐시)
+_MODELS = {}
+_LOAD_LOCK = threading.Lock()
+
+def _load_model(model_path):
+  with _LOAD_LOCK:
+    if model_path not in _MODELS:
+      _MODELS[model_path] = load_model(model_path)
+  return _MODELS[model_path]
+
+def load():
+  """단일 음정(each) + 전체 음정(whole) 모델 상주"""
+  _load_model(MODEL_PATH_EACH)
+  _load_model(MODEL_PATH_WHOLE)
+
+def is_loaded():
+  return MODEL_PATH_EACH in _MODELS and MODEL_PATH_WHOLE in _MODELS
+
+def unload():
+  with _LOAD_LOCK:
+    _MODELS.clear()
 
 
 # ========== 데이터 전처리 함수 ==========
-def audio_preprocess(wav, sr=16000, n_mels=128):
-  ori_y1, sr1 = librosa.load(wav, sr=sr)
-  mel_spec1 = librosa.feature.melspectrogram(y=ori_y1, sr=sr1, n_mels=n_mels)
-  mel_db1 = librosa.power_to_db(mel_spec1, ref=np.max)
+def _compute_mel(clip, n_mels=128):
+  mel_spec1 = librosa.feature.melspectrogram(y=clip.pcm, sr=clip.sr, n_mels=n_mels)
+  return librosa.power_to_db(mel_spec1, ref=np.max)
+
+def clip_preprocess(clip, n_mels=128):
+  mel_db1 = feature_store.cached_mel(clip, f"ptk_sound:n{n_mels}", lambda c: _compute_mel(c, n_mels))
   length = mel_db1.shape[1]
   if length > 312:
     length = 312
-  with open(wav, 'rb') as f:
-    wav_data = f.read()
+  # 원본 파일 바이트 수 기준 (파일을 다시 읽지 않음)
   bytes_per_sample = 2
-  duration = len(wav_data) / (sr * bytes_per_sample)
+  duration = clip.num_bytes / (clip.sr * bytes_per_sample)
 
   return mel_db1, round(duration,3), length
 
+def audio_preprocess(wav, sr=16000, n_mels=128):
+  return clip_preprocess(audio_clip.as_clip(wav, sr=sr), n_mels=n_mels)
+
 def wav_padding(wav, wav_max_len=312):
   pad_width = wav_max_len - wav.shape[1]
   if pad_width > 0:
@@ -62,16 +90,26 @@ def pred_preprocess(wav_path, sr=16000, n_mels=128):
   x_pred_data = np.expand_dims(pred_audio_transposed, axis=-1)
   return x_pred_data
 
+def _predict_batch(model_path, filepaths):
+    # 파일별 (1, 312, 128, 1) 입력을 쌓아 predict 1회
+    if len(filepaths) == 0:
+        return []
+    ptk_x_data = np.concatenate([pred_preprocess(fp) for fp in filepaths], axis=0)
+    pred = _load_model(model_path).predict(ptk_x_data, verbose=0)
+    return [max(0,np.round(p[0],2)) for p in pred]
+
 """## 단일 음정(퍼퍼퍼) """
+def ptk_each_batch(filepaths):
+    return _predict_batch(MODEL_PATH_EACH, filepaths)
+
 def ptk_each(filepath):
-    ptk_x_data=pred_preprocess(filepath)
-    pred = model_each.predict(ptk_x_data)
-    return max(0,np.round(pred[0][0],2))
+    return ptk_each_batch([filepath])[0]
 
 
 """## 전체 음정(퍼터커) """
+def ptk_whole_batch(filepaths):
+    return _predict_batch(MODEL_PATH_WHOLE, filepaths)
+
 def ptk_whole(filepath):
-    ptk_x_data=pred_preprocess(filepath)
-    pred = model_whole.predict(ptk_x_data)
-    return max(0,np.round(pred[0][0],2))
+    return ptk_whole_batch([filepath])[0]
 
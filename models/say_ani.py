@@ -11,9 +11,12 @@ Original file is located at
 import numpy as np
 import librosa
 import torch
-from transformers import WhisperProcessor, WhisperForConditionalGeneration
+from models import whisper_registry
+from models import audio_clip
+from models import feature_store
 from tensorflow.keras.models import load_model
 import os
+import threading
 
 # ====== 고정 설정 ======
 MODEL_PATH = os.path.join(os.path.dirname(__file__), "animal.keras")   # 저장해둔 모델 파일
@@ -60,48 +63,63 @@ class BuildCrossMask(Layer):
         Tq = tf.shape(q)[1]
         return tf.tile(tokmask, [1, Tq, 1])                          # (B,Tq,L)
 
-# ====== 모델 로드 ======
-model = load_model(
-    MODEL_PATH,
-    custom_objects={"TokenRealMask": TokenRealMask, "BuildCrossMask": BuildCrossMask}
-)
+# ====== 모델 로드 (처음 사용할 때, load()/is_loaded()/unload()) ======
+_MODEL = None
+_LOAD_LOCK = threading.Lock()
+
+def _load_model():
+    global _MODEL
+    with _LOAD_LOCK:
+        if _MODEL is None:
+            _MODEL = load_model(
+                MODEL_PATH,
+                custom_objects={"TokenRealMask": TokenRealMask, "BuildCrossMask": BuildCrossMask}
+            )
+    return _MODEL
 
 # ====== Whisper 로드(학습과 동일한 체크포인트 권장) ======
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-processor = WhisperProcessor.from_pretrained("openai/whisper-medium")
-whisper_model = WhisperForConditionalGeneration.from_pretrained("openai/whisper-medium").to(device)
-whisper_model.eval()
+WHISPER_CHECKPOINT = "openai/whisper-medium"
+device = whisper_registry.device
+# 채점 캐시 지문(models/score_cache.py)에 쓰이는 모델 아티팩트
+ARTIFACTS = [MODEL_PATH, WHISPER_CHECKPOINT]
+# import 시에는 processor(토크나이저)만, 모델 가중치는 load()에서
+processor = whisper_registry.get_processor(WHISPER_CHECKPOINT)
+_WHISPER = whisper_registry.WhisperHold(WHISPER_CHECKPOINT)
+
+def load():
+    """Keras 헤드 + Whisper(whisper-medium) 상주"""
+    _load_model()
+    _WHISPER.hold()
+
+def is_loaded():
+    return _MODEL is not None and _WHISPER.held
+
+def unload():
+    global _MODEL
+    with _LOAD_LOCK:
+        _MODEL = None
+    _WHISPER.drop()
 
 # pad 토큰 ID (학습 시 PAD_ID = len(tokenizer))
 VOCAB_SIZE = len(processor.tokenizer)
 PAD_ID = VOCAB_SIZE
 
 # ====== 전처리 ======
-def load_wav_to_mel(wav_path, sr=SAMPLE_RATE, n_mels=N_MELS):
-    y, _ = librosa.load(wav_path, sr=sr, mono=True)
-    mel = librosa.feature.melspectrogram(y=y, sr=sr, n_mels=n_mels)
+def _compute_mel(clip, n_mels=N_MELS):
+    mel = librosa.feature.melspectrogram(y=clip.pcm, sr=clip.sr, n_mels=n_mels)
     mel_db = librosa.power_to_db(mel, ref=np.max)
     mel_norm = (mel_db + 80) / 80.0               # [0,1] 근사
     mel_norm = mel_norm.astype(np.float32)
     return np.expand_dims(mel_norm, axis=-1)      # (128, T, 1)
 
-@torch.no_grad()
-def extract_token_ids_from_wav(wav_path):
-    speech, _ = librosa.load(wav_path, sr=SAMPLE_RATE, mono=True)
-    inputs = processor(speech, sampling_rate=SAMPLE_RATE, return_tensors="pt")
-    input_features = inputs.input_features.to(device)
-    attn_mask = inputs.attention_mask.to(device) if hasattr(inputs, "attention_mask") and inputs.attention_mask is not None else None
-
-    pred_ids = whisper_model.generate(
-        input_features,
-        attention_mask=attn_mask,
-        language="ko",
-        task="transcribe",
-        do_sample=False,
-        max_new_tokens=MAX_TOKEN_LENGTH,
-    )
-    token_ids = pred_ids[0].cpu().numpy().astype(np.int32)
+def clip_to_mel(clip, n_mels=N_MELS):
+    # 같은 오디오의 mel은 특징 저장소(models/feature_store.py)에서 재사용
+    return feature_store.cached_mel(clip, f"say_ani:n{n_mels}", lambda c: _compute_mel(c, n_mels))
 
+def load_wav_to_mel(wav_path, sr=SAMPLE_RATE, n_mels=N_MELS):
+    return clip_to_mel(audio_clip.load_clip(wav_path, sr=sr), n_mels=n_mels)
+
+def _pad_token_ids(token_ids):
     # 학습과 동일하게 PAD_ID로 패딩/자르기
     if token_ids.shape[0] < MAX_TOKEN_LENGTH:
         pad = np.full(MAX_TOKEN_LENGTH - token_ids.shape[0], PAD_ID, dtype=np.int32)
@@ -110,19 +128,62 @@ def extract_token_ids_from_wav(wav_path):
         token_ids = token_ids[:MAX_TOKEN_LENGTH]
     return token_ids
 
-def prepare_inputs_for_inference(wav_path):
-    mel = load_wav_to_mel(wav_path)        # (128, T, 1)
+def clips_to_token_ids(clips):
+    """여러 클립을 배치 generate로 전사 → 파일별 (MAX_TOKEN_LENGTH,) 토큰"""
+    pred_ids = whisper_registry.transcribe(
+        WHISPER_CHECKPOINT,
+        [clip.pcm for clip in clips],
+        keys=[clip.content_hash for clip in clips],
+        language="ko",
+        task="transcribe",
+        do_sample=False,
+        max_new_tokens=MAX_TOKEN_LENGTH,
+    )
+    return [_pad_token_ids(ids) for ids in pred_ids]
+
+def clip_to_token_ids(clip):
+    return clips_to_token_ids([clip])[0]
+
+def extract_token_ids_from_wav(wav_path):
+    return clip_to_token_ids(audio_clip.load_clip(wav_path))
+
+def prepare_inputs_for_inference(wav_path, token_ids=None):
+    clip = audio_clip.as_clip(wav_path)    # 경로 또는 DecodedClip
+    mel = clip_to_mel(clip)                # (128, T, 1)
     mel = np.expand_dims(mel, axis=0)      # (1, 128, T, 1)
-    tok = extract_token_ids_from_wav(wav_path)
+    tok = clip_to_token_ids(clip) if token_ids is None else token_ids   # 배치 전사 결과 재사용
     tok = np.expand_dims(tok, axis=0)      # (1, L)
     return mel, tok
 
+def pad_mels(mel_list):
+    # 정규화 mel 기준 0 = -80dB(무음)으로 오른쪽 패딩
+    max_time = max(m.shape[1] for m in mel_list)
+    batch = np.zeros((len(mel_list), N_MELS, max_time, 1), dtype=np.float32)
+    for i, mel in enumerate(mel_list):
+        batch[i, :, :mel.shape[1], :] = mel
+    return batch
+
 # ====== 점수 출력 ======
-def score_audio(wav_path, threshold=THRESHOLD, label_names=target_words, top_k=10):
-    X_mel, X_tok = prepare_inputs_for_inference(wav_path)
-    probs = model.predict([X_mel, X_tok], verbose=0)[0]   # (num_labels,)
+def score_audio(wav_path, threshold=THRESHOLD, label_names=target_words, top_k=10, token_ids=None):
+    load()
+    X_mel, X_tok = prepare_inputs_for_inference(wav_path, token_ids=token_ids)
+    probs = _MODEL.predict([X_mel, X_tok], verbose=0)[0]   # (num_labels,)
     count = int((probs >= threshold).sum())
     picked = [(w, float(p)) for w, p in zip(label_names, probs) if p >= threshold]
     picked_sorted = sorted(picked, key=lambda x: x[1], reverse=True)
 
     return count
+
+def score_audio_batch(wav_paths, threshold=THRESHOLD, token_list=None):
+    """여러 파일(경로 또는 DecodedClip)을 predict 1회로 채점 → 파일별 count 리스트"""
+    clips = [audio_clip.as_clip(p) for p in wav_paths]
+    if not clips:
+        return []
+    load()
+    if token_list is None:
+        token_list = clips_to_token_ids(clips)
+
+    X_mel = pad_mels([clip_to_mel(clip) for clip in clips])   # (B, 128, T_max, 1)
+    X_tok = np.stack(token_list).astype(np.int32)             # (B, L)
+    probs = _MODEL.predict([X_mel, X_tok], verbose=0)          # (B, num_labels)
+    return [int((p >= threshold).sum()) for p in probs]
@@ -3,7 +3,10 @@ import librosa
 import tensorflow as tf
 import torch
 import os
-from transformers import WhisperProcessor, WhisperForConditionalGeneration
+import threading
+from models import whisper_registry
+from models import audio_clip
+from models import feature_store
 
 # ====== 하이퍼파라미터 ======
 SAMPLE_RATE = 16000
@@ -11,69 +14,96 @@ N_MELS = 128
 MAX_TOKEN_LENGTH = 512
 TEMPERATURE = 0
 MODEL_PATH = os.path.join(os.path.dirname(__file__), "say_obj_model.keras")  # 재헌님 여기 수정해주세요
+WHISPER_CHECKPOINT = "openai/whisper-small"
+# 채점 캐시 지문(models/score_cache.py)에 쓰이는 모델 아티팩트
+ARTIFACTS = [MODEL_PATH, WHISPER_CHECKPOINT]
 
-# ====== 전역 캐시 ======
+# ====== 전역 캐시 (load()/is_loaded()/unload()) ======
 _MODEL = None
-_WHISPER = None
-_PROCESSOR = None
+_LOAD_LOCK = threading.Lock()
+_WHISPER = whisper_registry.WhisperHold(WHISPER_CHECKPOINT)
 
 # ====== 디바이스 ======
-_DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+_DEVICE = whisper_registry.device
 
 def _load_model(model_path=MODEL_PATH):
     global _MODEL
-    if _MODEL is None:
-        _MODEL = tf.keras.models.load_model(model_path)
+    with _LOAD_LOCK:
+        if _MODEL is None:
+            _MODEL = tf.keras.models.load_model(model_path)
     return _MODEL
 
 def _load_whisper():
-    global _WHISPER, _PROCESSOR
-    if _WHISPER is None or _PROCESSOR is None:
-        _PROCESSOR = WhisperProcessor.from_pretrained("openai/whisper-small")
-        _WHISPER = WhisperForConditionalGeneration.from_pretrained(
-            "openai/whisper-small"
-        ).to(_DEVICE)
-    return _WHISPER, _PROCESSOR
+    _WHISPER.hold()
+
+def load():
+    """Keras 헤드 + Whisper(whisper-small) 상주"""
+    _load_model()
+    _load_whisper()
+
+def is_loaded():
+    return _MODEL is not None and _WHISPER.held
+
+def unload():
+    global _MODEL
+    with _LOAD_LOCK:
+        _MODEL = None
+    _WHISPER.drop()
 
 # ====== 전처리 ======
-def _wav_to_mel(wav_path, sr=SAMPLE_RATE, n_mels=N_MELS):
-    y, _ = librosa.load(wav_path, sr=sr)
-    mel = librosa.feature.melspectrogram(y=y, sr=sr, n_mels=n_mels)
+def _compute_mel(clip, n_mels=N_MELS):
+    mel = librosa.feature.melspectrogram(y=clip.pcm, sr=clip.sr, n_mels=n_mels)
     mel_db = librosa.power_to_db(mel, ref=np.max)
     mel_db = mel_db[..., np.newaxis]  # (128, T, 1)
     return mel_db.astype(np.float32)
 
-def _wav_to_token_ids(wav_path, sr=SAMPLE_RATE):
-    whisper, processor = _load_whisper()
-    y, _ = librosa.load(wav_path, sr=sr)
-    inputs = processor(y, sampling_rate=sr, return_tensors="pt")
-    input_features = inputs.input_features.to(_DEVICE)
-
-    forced_ids = processor.get_decoder_prompt_ids(language="ko", task="transcribe")
-
-    with torch.no_grad():
-        pred_ids = whisper.generate(
-            input_features,
-            forced_decoder_ids=forced_ids,
-            temperature=TEMPERATURE
-        )
-    token_ids = pred_ids[0].cpu().tolist()
+def _clip_to_mel(clip, n_mels=N_MELS):
+    # 같은 오디오의 mel은 특징 저장소(models/feature_store.py)에서 재사용
+    return feature_store.cached_mel(clip, f"say_obj:n{n_mels}", lambda c: _compute_mel(c, n_mels))
+
+def _wav_to_mel(wav_path, sr=SAMPLE_RATE, n_mels=N_MELS):
+    return _clip_to_mel(audio_clip.load_clip(wav_path, sr=sr), n_mels=n_mels)
+
+def _pad_token_ids(token_ids):
+    token_ids = list(token_ids)
     if len(token_ids) < MAX_TOKEN_LENGTH:
         token_ids += [0] * (MAX_TOKEN_LENGTH - len(token_ids))
     else:
         token_ids = token_ids[:MAX_TOKEN_LENGTH]
     return np.array(token_ids, dtype=np.int32)
 
+def _clips_to_token_ids(clips):
+    _load_whisper()
+    pred_ids = whisper_registry.transcribe(
+        WHISPER_CHECKPOINT,
+        [clip.pcm for clip in clips],
+        keys=[clip.content_hash for clip in clips],
+        forced_language="ko",
+        temperature=TEMPERATURE,
+    )
+    return [_pad_token_ids(ids) for ids in pred_ids]
+
+def _clip_to_token_ids(clip):
+    return _clips_to_token_ids([clip])[0]
+
+def _wav_to_token_ids(wav_path, sr=SAMPLE_RATE):
+    return _clip_to_token_ids(audio_clip.load_clip(wav_path, sr=sr))
+
 # =========================================================
 #  예측함수 # rainbow_wav: 무지개(6) 파일 경로 # swing_wav: 그네(9) 파일 경로
+#  (경로 대신 DecodedClip 전달 가능)
 # =========================================================
 def predict_say_object_total(rainbow_wav, swing_wav, model_path=MODEL_PATH):
+    load()
     model = _load_model(model_path)
 
-    mel_r = _wav_to_mel(rainbow_wav)[np.newaxis, ...]
-    mel_s = _wav_to_mel(swing_wav)[np.newaxis, ...]
-    tok_r = _wav_to_token_ids(rainbow_wav)[np.newaxis, :]
-    tok_s = _wav_to_token_ids(swing_wav)[np.newaxis, :]
+    clip_r = audio_clip.as_clip(rainbow_wav)
+    clip_s = audio_clip.as_clip(swing_wav)
+    mel_r = _clip_to_mel(clip_r)[np.newaxis, ...]
+    mel_s = _clip_to_mel(clip_s)[np.newaxis, ...]
+    tok_r, tok_s = _clips_to_token_ids([clip_r, clip_s])   # generate 1회
+    tok_r = tok_r[np.newaxis, :]
+    tok_s = tok_s[np.newaxis, :]
 
     y_hat = model.predict(
         {"mel_rainbow": mel_r, "tok_rainbow": tok_r,
@@ -0,0 +1,219 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# =========================================================
+# 채점 결과 디스크 캐시 (SQLite 1개 파일)
+# - 키: 오디오 내용 해시 + 문항 코드/번호 + 모델 아티팩트 지문 (+ 단계별 추가 정보)
+# - 같은 입력을 다시 채점(작업 재시도, /assessments/run-model 재실행)하면 모델을 돌리지 않음
+# - 모델 파일이 바뀌면 지문이 달라지므로 예전 결과는 자연히 사용되지 않고 LRU로 밀려남
+# =========================================================
+CACHE_PATH = os.getenv(
+    "SCORE_CACHE_PATH",
+    os.path.join(os.path.dirname(__file__), ".cache", "score_cache.sqlite"),
+)
+MAX_ENTRIES = int(os.getenv("SCORE_CACHE_MAX_ENTRIES", "200000"))
+ENABLED = os.getenv("SCORE_CACHE_ENABLED", "1") != "0"
+
+_LOCK = threading.Lock()
+_CONN = None
+_STATS = {"hits": 0, "misses": 0, "puts": 0, "evictions": 0}
+_FINGERPRINTS = {}   # (아티팩트 목록, 체크포인트 리비전) -> 지문 (프로세스 내 1회 계산)
+
+
+def _connect():
+    global _CONN
+    if _CONN is None:
+        os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+        conn = sqlite3.connect(CACHE_PATH, check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS score_cache (
+                cache_key TEXT PRIMARY KEY,
+                value     TEXT NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_score_cache_last_used ON score_cache (last_used)")
+        _CONN = conn
+    return _CONN
+
+
+def checkpoint_revision(name: str):
+    """
+    HF 체크포인트 이름("openai/whisper-small" 등)을 로컬 스냅샷으로 풀어 리비전 문자열로 반환
+    (스냅샷 커밋 해시 + 파일별 blob 이름(etag) → 새 리비전/재다운로드/다른 가중치를 가리키는 오프라인 캐시를 구분)
+    네트워크 없이 로컬 캐시만 확인. 캐시에 없거나 huggingface_hub가 없으면 None
+    """
+    if "/" not in name or os.path.exists(name):
+        return None
+    try:
+        from huggingface_hub import snapshot_download
+        snapshot = snapshot_download(name, local_files_only=True)
+    except Exception:
+        return None
+    parts = []
+    for root, _, files in sorted(os.walk(snapshot)):
+        for file_name in sorted(files):
+            path = os.path.join(root, file_name)
+            # 스냅샷 파일은 blobs/<etag> 심볼릭 링크 → 링크 대상 이름이 내용 식별자
+            parts.append(f"{os.path.relpath(path, snapshot)}={os.path.basename(os.path.realpath(path))}")
+    return f"{os.path.basename(snapshot)}[{','.join(parts)}]"
+
+
+def _artifact_signature(artifact, revision=None) -> str:
+    """
+    파일/디렉터리는 (이름, 크기, 수정 시각), HF 체크포인트는 이름 + 로컬 스냅샷 리비전,
+    그 외(단계 이름, 캐시에 없는 체크포인트)는 문자열 그대로
+    """
+    artifact = str(artifact)
+    if os.path.isfile(artifact):
+        st = os.stat(artifact)
+        return f"{os.path.basename(artifact)}:{st.st_size}:{st.st_mtime_ns}"
+    if os.path.isdir(artifact):
+        parts = []
+        for root, _, files in sorted(os.walk(artifact)):
+            for name in sorted(files):
+                st = os.stat(os.path.join(root, name))
+                parts.append(f"{os.path.relpath(os.path.join(root, name), artifact)}:{st.st_size}:{st.st_mtime_ns}")
+        return f"{os.path.basename(artifact.rstrip(os.sep))}/[{','.join(parts)}]"
+    if revision is not None:
+        return f"{artifact}@{revision}"
+    return artifact
+
+
+def fingerprint(artifacts) -> str:
+    """모델 아티팩트 목록(모델 파일 경로, Whisper 체크포인트 이름 등)의 지문"""
+    key = tuple(str(a) for a in artifacts)
+    # 체크포인트 리비전은 매번 확인 (로컬 캐시 조회라 가벼움) → 프로세스 실행 중 스냅샷이 바뀌어도 지문이 달라짐
+    revisions = tuple(checkpoint_revision(a) for a in key)
+    with _LOCK:
+        cached = _FINGERPRINTS.get((key, revisions))
+    if cached is not None:
+        return cached
+    digest = hashlib.sha256(
+        "|".join(_artifact_signature(a, r) for a, r in zip(key, revisions)).encode("utf-8")
+    ).hexdigest()[:16]
+    with _LOCK:
+        _FINGERPRINTS[(key, revisions)] = digest
+    return digest
+
+
+def make_key(audio_hash, question_cd, question_no, question_minor_no, model_fingerprint, extra=None) -> str:
+    """캐시 키. audio_hash가 없으면(해시를 모르는 입력) None → 캐시 사용 안 함"""
+    if not audio_hash:
+        return None
+    parts = [str(audio_hash), str(question_cd), str(question_no), str(question_minor_no), str(model_fingerprint)]
+    if extra is not None:
+        parts.append(str(extra))
+    return "|".join(parts)
+
+
+def get_many(keys):
+    """keys 순서대로 캐시된 값(없으면 None) 리스트. 조회된 항목은 최근 사용 시각 갱신"""
+    results = [None] * len(keys)
+    if not ENABLED:
+        return results
+    lookup = [k for k in keys if k]
+    found = {}
+    if lookup:
+        with _LOCK:
+            conn = _connect()
+            for start in range(0, len(lookup), 500):
+                chunk = lookup[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for cache_key, value in conn.execute(
+                    f"SELECT cache_key, value FROM score_cache WHERE cache_key IN ({placeholders})", chunk
+                ):
+                    found[cache_key] = json.loads(value)
+            if found:
+                now = time.time()
+                conn.executemany(
+                    "UPDATE score_cache SET last_used = ? WHERE cache_key = ?",
+                    [(now, k) for k in found],
+                )
+                conn.commit()
+
+    with _LOCK:
+        for i, k in enumerate(keys):
+            if k in found:
+                results[i] = found[k]
+                _STATS["hits"] += 1
+            else:
+                _STATS["misses"] += 1
+    return results
+
+
+def put_many(items):
+    """items: [(key, value), ...] 저장 후 MAX_ENTRIES 초과분을 오래된 순으로 제거"""
+    if not ENABLED:
+        return
+    # numpy 스칼라(np.float32 등)는 파이썬 숫자로 변환하여 저장
+    rows = [(k, json.dumps(v, default=lambda o: o.item()), time.time()) for k, v in items if k]
+    if not rows:
+        return
+    with _LOCK:
+        conn = _connect()
+        conn.executemany(
+            "INSERT OR REPLACE INTO score_cache (cache_key, value, last_used) VALUES (?, ?, ?)", rows
+        )
+        _STATS["puts"] += len(rows)
+        count = conn.execute("SELECT COUNT(*) FROM score_cache").fetchone()[0]
+        overflow = count - MAX_ENTRIES
+        if overflow > 0:
+            conn.execute(
+                """
+                DELETE FROM score_cache WHERE cache_key IN (
+                    SELECT cache_key FROM score_cache ORDER BY last_used ASC LIMIT ?
+                )
+                """,
+                (overflow,),
+            )
+            _STATS["evictions"] += overflow
+        conn.commit()
+
+
+def cached_scores(keys, compute):
+    """
+    keys: 항목별 캐시 키 (None이면 항상 계산)
+    compute: 미스 항목 인덱스 리스트를 받아 그 순서대로 점수 리스트를 반환하는 함수
+    Returns: keys 순서대로 점수 리스트
+    """
+    scores = get_many(keys)
+    missing = [i for i, s in enumerate(scores) if s is None]
+    if missing:
+        computed = compute(missing)
+        for i, score in zip(missing, computed):
+            scores[i] = score
+        put_many([(keys[i], scores[i]) for i in missing if scores[i] is not None])
+    return scores
+
+
+def stats() -> dict:
+    """hit/miss/저장/제거 건수와 현재 항목 수"""
+    with _LOCK:
+        snapshot = dict(_STATS)
+        snapshot["entries"] = _connect().execute("SELECT COUNT(*) FROM score_cache").fetchone()[0] if ENABLED else 0
+    total = snapshot["hits"] + snapshot["misses"]
+    snapshot["hit_rate"] = snapshot["hits"] / total if total else 0.0
+    return snapshot
+
+
+def clear():
+    """캐시 전체 삭제 (카운터 초기화 포함)"""
+    with _LOCK:
+        if ENABLED:
+            conn = _connect()
+            conn.execute("DELETE FROM score_cache")
+            conn.commit()
+        for k in _STATS:
+            _STATS[k] = 0
@@ -3,22 +3,31 @@ import numpy as np
 import tensorflow as tf
 import librosa
 import os
+import threading
+from models import audio_clip
+from models import feature_store
 
 # from ui.utils.env_utils import model_common_path
 model_path = os.path.join(os.path.dirname(__file__), "KoSp_tf_CLAP_D.keras")
+# 채점 캐시 지문(models/score_cache.py)에 쓰이는 모델 아티팩트
+ARTIFACTS = [model_path]
 
-# audio 파일 -> 멜변환, audio time_step
-def audio_preprocess(wav, sr=16000, n_mels=128):
-  ori_y1, sr1 = librosa.load(wav, sr=sr)
-  mel_spec1 = librosa.feature.melspectrogram(y=ori_y1, sr=sr1, n_mels=n_mels)
-  mel_db1 = librosa.power_to_db(mel_spec1, ref=np.max)
-  with open(wav, 'rb') as f:
-    wav_data = f.read()
+def _compute_mel(clip, n_mels=128):
+  mel_spec1 = librosa.feature.melspectrogram(y=clip.pcm, sr=clip.sr, n_mels=n_mels)
+  return librosa.power_to_db(mel_spec1, ref=np.max)
+
+# DecodedClip -> 멜변환, audio time_step
+def clip_preprocess(clip, n_mels=128):
+  mel_db1 = feature_store.cached_mel(clip, f"talk_clean:n{n_mels}", lambda c: _compute_mel(c, n_mels))
   bytes_per_sample = 2
-  duration = len(wav_data) / (sr * bytes_per_sample)
+  duration = clip.num_bytes / (clip.sr * bytes_per_sample)
 
   return mel_db1, round(duration, 3), mel_db1.shape[1]
 
+# audio 파일(또는 DecodedClip) -> 멜변환, audio time_step
+def audio_preprocess(wav, sr=16000, n_mels=128):
+  return clip_preprocess(audio_clip.as_clip(wav, sr=sr), n_mels=n_mels)
+
 def wav_padding(wav, wav_max_len=312):
   pad_width = wav_max_len - wav.shape[1]  # 얼마나 채워야 하는지
   if pad_width > 0:
@@ -95,49 +104,66 @@ score = {'1':3, '2':2, '3':1, '4':2, '5':2, '6':3, '7':2, '8':2, '9':2, '10':3,
          '11':2, '12':1, '13':3, '14':2, '15':2, '16':2, '17':2, '18':1, '19':2, '20':3,
          '21':3, '22':3, '23':1, '24':1, '25':2}
 
+# ============================================================================
+# 모델 캐시 - 워커 수명 동안 한 번만 로드
+# 문항마다 load_model/clear_session을 반복하던 방식(2025.08.22, 08.26)은
+# 로드가 한 번뿐이므로 name_scope 스택 오류/메모리 누수 문제가 생기지 않음
+# ============================================================================
+_MODEL = None
+_LOAD_LOCK = threading.Lock()
+
+def _load_model(path=model_path):
+  global _MODEL
+  with _LOAD_LOCK:
+    if _MODEL is None:
+      _MODEL = tf.keras.models.load_model(path,
+        custom_objects={
+          "hardtanh": hardtanh,
+          "SequenceMask": SequenceMask,
+          "make_attn_mask": make_attn_mask,
+          'CTC': tf.keras.losses.CTC()
+          }
+      )
+  return _MODEL
+
+def load():
+  _load_model()
+
+def is_loaded():
+  return _MODEL is not None
+
+def unload():
+  global _MODEL
+  with _LOAD_LOCK:
+    _MODEL = None
+
+def predict_batch(wav_items):
+  """
+  전체 문항을 한 번의 predict로 채점
+  wav_items: [{'path': str 또는 DecodedClip, 'question_no': int(1~25)}, ...]
+  """
+  if not wav_items:
+    return []
+  question_nos = [int(item['question_no']) for item in wav_items]
+
+  # 멜(312 프레임 패딩)과 문항별 sub_x 토큰을 배치로 쌓음
+  x_pred_data = np.concatenate([pred_preprocess(item['path'], n_mels=80) for item in wav_items], axis=0)
+  sub_x_data = np.stack([sub_x_dict[q-1] for q in question_nos]).astype(np.int32)
+
+  pred_model = _load_model()
+  pred_y = pred_model.predict([x_pred_data, sub_x_data], verbose=0)
+  return [np.round(pred_y[i][0]*score[str(q)], 0) for i, q in enumerate(question_nos)]
+
 def main(wav_items):
   """
   wav_items: [{'path': str, 'question_no': int}, ...]
   """
-  total_score = []
   for item in wav_items:
-    path = item['path']
     question_no = int(item['question_no'])
-    if 1 <= question_no <= 25:
-      sub_x_data = sub_x_dict[question_no-1]
-      num = str(question_no)
-    else:
+    if not 1 <= question_no <= 25:
       return f"문항 번호가 올바르지 않습니다. (question_no: {question_no})"
-  
-    # 모델 로드 - name_scope 스택 오류 방지를 위한 세션 초기화 추가 - 2025.08.26
-    tf.keras.backend.clear_session()
-    pred_model = tf.keras.models.load_model(model_path,
-      custom_objects={
-        "hardtanh": hardtanh,
-        "SequenceMask": SequenceMask,
-        "make_attn_mask": make_attn_mask,
-        'CTC': tf.keras.losses.CTC()
-        }
-    )
-    
-    try:
-      # path = 'C:/Users/eunhy/1001_p_4_0.wav'
-      x_pred_data = pred_preprocess(path,n_mels=80)
-      pred_y = pred_model.predict([x_pred_data,np.expand_dims(sub_x_data,axis=0)])
-      total_score.append(np.round(pred_y[0][0]*score[num],0))
-    finally:
-      # ============================================================================
-      # 메모리 관리 개선 - 2025.08.22 추가
-      # 메모리 누수 방지를 위한 모델 정리
-      # 예측 완료 후 모델을 메모리에서 완전히 제거하여 다음 모델 로드가 제대로 작동하도록 함
-      # TensorFlow 세션도 함께 초기화하여 GPU/CPU 메모리 확보
-      # ============================================================================
-      try:
-          if 'pred_model' in locals():
-              del pred_model
-      except:
-          pass
-      tf.keras.backend.clear_session()
+
+  total_score = predict_batch(wav_items)
 
   # print(f"녹음파일의 예상 점수는 {total_score}점 입니다.")
   return total_score
@@ -0,0 +1,139 @@
+import time
+import logging
+import importlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# =========================================================
+# 모델 예열 (공통 계약: 각 models/* 모듈의 load() / is_loaded() / unload())
+# - import 시점에는 가중치를 읽지 않으므로, 상주 워커는 시작할 때 warmup()으로 미리 로드
+# - 로드는 단계별 스레드로 병렬 실행 (TF/Torch 파일 읽기·그래프 생성이 서로 겹침)
+# - 더미 입력으로 추론을 두 번 돌려 첫 호출(cold: 그래프 트레이싱, 커널 선택)과
+#   두 번째 호출(warm) 지연을 따로 기록
+# - 더미 클립은 content_hash가 없으므로 채점 캐시/특징 저장소를 건드리지 않음
+# =========================================================
+STAGE_MODULES = {
+    "LTN_RPT": "ltn_rpt",
+    "GUESS_END": "guess_end",
+    "SAY_OBJ": "say_obj",
+    "SAY_ANI": "say_ani",
+    "TALK_PIC": "talk_pic",
+    "AH_SOUND": "ah_sound",
+    "PTK_SOUND": "ptk_sound",
+    "TALK_CLEAN": "talk_clean",
+}
+
+DUMMY_SECONDS = 1.0
+
+
+def _module(stage):
+    return importlib.import_module(f"models.{STAGE_MODULES[stage]}")
+
+
+def _dummy_clip():
+    from models.audio_clip import DecodedClip, SAMPLE_RATE
+
+    n = int(SAMPLE_RATE * DUMMY_SECONDS)
+    pcm = (np.random.default_rng(0).standard_normal(n) * 0.01).astype(np.float32)
+    return DecodedClip(pcm=pcm, sr=SAMPLE_RATE, path="<warmup>", num_bytes=n * 2)
+
+
+def _dummy_infer(stage, module, clip):
+    """단계별 대표 추론 함수를 더미 클립으로 1회 호출"""
+    if stage == "LTN_RPT":
+        module.predict_score([clip])
+    elif stage == "GUESS_END":
+        module.predict_guess_end_scores([clip], [0])
+    elif stage == "SAY_OBJ":
+        module.predict_say_object_total(clip, clip)
+    elif stage in ("SAY_ANI", "TALK_PIC"):
+        module.score_audio_batch([clip])
+    elif stage == "AH_SOUND":
+        module.analyze_pitch_stability(clip)
+    elif stage == "PTK_SOUND":
+        module.ptk_each_batch([clip])
+        module.ptk_whole_batch([clip])
+    elif stage == "TALK_CLEAN":
+        module.predict_batch([{"path": clip, "question_no": 1}])
+
+
+def _load_stage(stage):
+    start = time.perf_counter()
+    module = _module(stage)
+    module.load()
+    return time.perf_counter() - start
+
+
+def warmup(models=None, dummy=True, max_workers=None) -> dict:
+    """
+    models: 단계 코드 리스트 (None이면 전체)
+    Returns: {stage: {"load_s", "cold_infer_s", "warm_infer_s", "error"}}
+    """
+    stages = []
+    for stage in models or STAGE_MODULES:
+        if stage in STAGE_MODULES:
+            stages.append(stage)
+        else:
+            logger.warning(f"알 수 없는 단계, 건너뜀: {stage}")
+
+    results = {stage: {"load_s": None, "cold_infer_s": None, "warm_infer_s": None, "error": None} for stage in stages}
+    if not stages:
+        return results
+
+    # 1) 병렬 로드
+    with ThreadPoolExecutor(max_workers=max_workers or len(stages), thread_name_prefix="warmup") as executor:
+        futures = {stage: executor.submit(_load_stage, stage) for stage in stages}
+        for stage, future in futures.items():
+            try:
+                results[stage]["load_s"] = round(future.result(), 3)
+                logger.info(f"  {stage} 로드 ({results[stage]['load_s']:.1f}초)")
+            except Exception as e:
+                results[stage]["error"] = f"load: {type(e).__name__}: {e}"
+                logger.error(f"  {stage} 로드 실패: {e}")
+
+    if not dummy:
+        return results
+
+    # 2) 더미 추론 (cold → warm). 단계끼리 같은 Whisper/TF 런타임을 쓰므로 순차 실행
+    clip = _dummy_clip()
+    for stage in stages:
+        if results[stage]["error"]:
+            continue
+        module = _module(stage)
+        try:
+            for field in ("cold_infer_s", "warm_infer_s"):
+                start = time.perf_counter()
+                _dummy_infer(stage, module, clip)
+                results[stage][field] = round(time.perf_counter() - start, 3)
+            logger.info(
+                f"  {stage} 더미 추론 cold {results[stage]['cold_infer_s']:.2f}초 / "
+                f"warm {results[stage]['warm_infer_s']:.2f}초"
+            )
+        except Exception as e:
+            results[stage]["error"] = f"infer: {type(e).__name__}: {e}"
+            logger.error(f"  {stage} 더미 추론 실패: {e}")
+    return results
+
+
+def status() -> dict:
+    """이미 import된 단계 모듈의 로드 여부 (import되지 않은 단계는 생략)"""
+    import sys
+
+    return {
+        stage: sys.modules[f"models.{name}"].is_loaded()
+        for stage, name in STAGE_MODULES.items()
+        if f"models.{name}" in sys.modules
+    }
+
+
+def unload(models=None):
+    """단계별 모델 해제 (import되지 않은 단계는 무시)"""
+    import sys
+
+    for stage in models or STAGE_MODULES:
+        module = sys.modules.get(f"models.{STAGE_MODULES.get(stage, '')}")
+        if module is not None:
+            module.unload()
@@ -0,0 +1,161 @@
+import os
+import threading
+import logging
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# =========================================================
+# Whisper 전용 상주 서브프로세스 (WHISPER_EXECUTION=subprocess)
+# - TensorFlow(Keras 헤드, SPICE)는 워커 프로세스에, PyTorch(Whisper)는 이 자식 프로세스에 두어
+#   GIL/스레드 풀을 나눠 쓰지 않고 서로 다른 코어에서 겹쳐 실행
+# - PCM은 pickle 대신 multiprocessing.shared_memory 한 블록에 이어 붙여 전달 (응답은 짧은 토큰 배열)
+# - 스레드 예산: 자식은 WHISPER_TORCH_THREADS, 부모 TF는 MODEL_TF_THREADS (ui/utils/env_utils.py)
+# =========================================================
+TORCH_THREADS = int(os.getenv("WHISPER_TORCH_THREADS", str(max(1, (os.cpu_count() or 2) // 2))))
+
+_LOCK = threading.Lock()
+_PROC = None
+_CONN = None
+_STATS = {"requests": 0, "clips": 0, "restarts": 0}
+
+
+def _child_main(conn, torch_threads):
+    """자식 프로세스: 체크포인트를 한 번 로드해 상주시키고 요청을 순서대로 처리"""
+    os.environ["WHISPER_EXECUTION"] = "inprocess"
+    import torch
+    torch.set_num_threads(torch_threads)
+    from models import whisper_registry
+
+    held = set()
+    while True:
+        try:
+            req = conn.recv()
+        except EOFError:
+            break
+        if req is None:
+            break
+
+        shm = None
+        try:
+            checkpoint = req["checkpoint"]
+            if checkpoint not in held:
+                # 참조를 하나 잡아 두어 요청 사이에 해제되지 않게 함
+                whisper_registry.acquire(checkpoint)
+                held.add(checkpoint)
+
+            shm = shared_memory.SharedMemory(name=req["shm_name"])
+            flat = np.ndarray((req["total"],), dtype=np.float32, buffer=shm.buf)
+            offsets = np.concatenate([[0], np.cumsum(req["lengths"])])
+            pcm_list = [flat[offsets[i]:offsets[i + 1]] for i in range(len(req["lengths"]))]
+
+            results = whisper_registry._transcribe_local(
+                checkpoint, pcm_list, req["sr"], req["batch_size"],
+                req["forced_language"], req["forced_task"], **req["generate_kwargs"]
+            )
+            del pcm_list, flat
+            conn.send({"ok": True, "results": results})
+        except Exception as e:
+            conn.send({"ok": False, "error": f"{type(e).__name__}: {e}"})
+        finally:
+            if shm is not None:
+                shm.close()
+
+    whisper_registry.release_all()
+
+
+def _ensure_started():
+    global _PROC, _CONN
+    if _PROC is not None and _PROC.is_alive():
+        return
+    if _PROC is not None:
+        logger.warning("Whisper 서브프로세스가 종료되어 다시 시작합니다.")
+        _STATS["restarts"] += 1
+
+    ctx = mp.get_context("spawn")
+    parent_conn, child_conn = ctx.Pipe()
+    proc = ctx.Process(
+        target=_child_main,
+        args=(child_conn, TORCH_THREADS),
+        name="whisper-torch",
+        daemon=True,
+    )
+    proc.start()
+    child_conn.close()
+    _PROC, _CONN = proc, parent_conn
+    logger.info(f"Whisper 서브프로세스 시작 (pid={proc.pid}, torch 스레드={TORCH_THREADS})")
+
+
+def transcribe_remote(checkpoint, pcm_list, sr, batch_size, forced_language, forced_task, generate_kwargs):
+    """whisper_registry._transcribe_local과 같은 인자/결과, 실행은 자식 프로세스"""
+    lengths = [int(len(p)) for p in pcm_list]
+    total = sum(lengths)
+
+    shm = shared_memory.SharedMemory(create=True, size=max(total, 1) * 4)
+    try:
+        flat = np.ndarray((total,), dtype=np.float32, buffer=shm.buf)
+        pos = 0
+        for pcm, n in zip(pcm_list, lengths):
+            flat[pos:pos + n] = pcm
+            pos += n
+        del flat
+
+        request = {
+            "checkpoint": checkpoint,
+            "shm_name": shm.name,
+            "lengths": lengths,
+            "total": total,
+            "sr": sr,
+            "batch_size": batch_size,
+            "forced_language": forced_language,
+            "forced_task": forced_task,
+            "generate_kwargs": generate_kwargs,
+        }
+        # 자식은 요청을 하나씩 처리하므로 파이프 왕복 전체를 잠금
+        with _LOCK:
+            _ensure_started()
+            try:
+                _CONN.send(request)
+                resp = _CONN.recv()
+            except (EOFError, BrokenPipeError, ConnectionResetError) as e:
+                raise RuntimeError(f"Whisper 서브프로세스 통신 실패: {e}")
+            _STATS["requests"] += 1
+            _STATS["clips"] += len(pcm_list)
+    finally:
+        shm.close()
+        shm.unlink()
+
+    if not resp["ok"]:
+        raise RuntimeError(f"Whisper 서브프로세스 오류: {resp['error']}")
+    return resp["results"]
+
+
+def preload(checkpoints):
+    """자식 프로세스를 띄우고 체크포인트를 미리 로드 (빈 배치 요청)"""
+    for checkpoint in checkpoints:
+        transcribe_remote(checkpoint, [], 16000, None, None, "transcribe", {})
+
+
+def status() -> dict:
+    with _LOCK:
+        alive = _PROC is not None and _PROC.is_alive()
+        return dict(_STATS, pid=_PROC.pid if alive else None, alive=alive, torch_threads=TORCH_THREADS)
+
+
+def shutdown(timeout=10):
+    """자식 프로세스 종료 (워커 종료 시)"""
+    global _PROC, _CONN
+    with _LOCK:
+        if _PROC is None:
+            return
+        try:
+            _CONN.send(None)
+        except Exception:
+            pass
+        _PROC.join(timeout)
+        if _PROC.is_alive():
+            _PROC.terminate()
+        _PROC, _CONN = None, None
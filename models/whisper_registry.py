@@ -0,0 +1,237 @@
+import os
+import hashlib
+import threading
+import logging
+
+import numpy as np
+import torch
+from transformers import WhisperProcessor, WhisperForConditionalGeneration
+
+logger = logging.getLogger(__name__)
+
+# =========================================================
+# 프로세스 전역 Whisper 레지스트리
+# - 체크포인트 이름("openai/whisper-medium" 등)마다 processor/model 한 쌍만 로드
+# - acquire()로 참조 카운트 증가, release()로 감소 → 0이 되면 메모리에서 해제
+# =========================================================
+device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+# generate 한 번에 묶을 최대 파일 수 (CPU 노드 메모리에 맞게 조정)
+BATCH_SIZE = int(os.getenv("WHISPER_BATCH_SIZE", "8"))
+
+# 실행 위치: "inprocess"(기본) 또는 "subprocess"(models/whisper_process.py 상주 자식 프로세스)
+# subprocess 모드에서 이 프로세스는 processor(토크나이저)만 로드하고 모델 가중치는 올리지 않음
+EXECUTION = os.getenv("WHISPER_EXECUTION", "inprocess").lower()
+
+_LOCK = threading.Lock()
+_ENTRIES = {}   # checkpoint -> {"processor", "model", "refs"}
+_PROCESSORS = {}   # checkpoint -> processor (토크나이저/특징 추출기, 가벼움 → 해제하지 않음)
+_LOAD_LOCKS = {}   # checkpoint -> 로드 직렬화용 Lock (서로 다른 체크포인트는 병렬 로드)
+_GEN_LOCKS = {}    # checkpoint -> generate 직렬화용 Lock (같은 모델을 쓰는 단계끼리 공유)
+
+
+def _load_lock(checkpoint: str):
+    with _LOCK:
+        return _LOAD_LOCKS.setdefault(checkpoint, threading.Lock())
+
+
+def _generate_lock(checkpoint: str):
+    """
+    체크포인트별 generate 잠금
+    여러 단계가 같은 체크포인트를 공유하므로(GUESS_END/SAY_OBJ: whisper-small, SAY_ANI/TALK_PIC: whisper-medium)
+    단계별 잠금만으로는 두 슬롯이 같은 torch 모듈에서 동시에 generate할 수 있음
+    """
+    with _LOCK:
+        return _GEN_LOCKS.setdefault(checkpoint, threading.Lock())
+
+
+def get_processor(checkpoint: str):
+    """모델 가중치 없이 processor만 반환 (PAD_ID/어휘 크기 계산 등 import 시점 용도)"""
+    with _load_lock(checkpoint):
+        processor = _PROCESSORS.get(checkpoint)
+        if processor is None:
+            processor = WhisperProcessor.from_pretrained(checkpoint)
+            _PROCESSORS[checkpoint] = processor
+        return processor
+
+
+def acquire(checkpoint: str):
+    """체크포인트의 (processor, model) 쌍을 반환하고 참조 카운트를 1 증가"""
+    processor = get_processor(checkpoint)
+    with _load_lock(checkpoint):
+        with _LOCK:
+            entry = _ENTRIES.get(checkpoint)
+            if entry is not None:
+                entry["refs"] += 1
+                return entry["processor"], entry["model"]
+
+        if EXECUTION == "subprocess":
+            logger.info(f"Whisper processor 로드: {checkpoint} (모델은 서브프로세스)")
+            model = None
+        else:
+            logger.info(f"Whisper 로드: {checkpoint} ({device})")
+            model = WhisperForConditionalGeneration.from_pretrained(checkpoint).to(device)
+            model.eval()
+
+        with _LOCK:
+            entry = {"processor": processor, "model": model, "refs": 1}
+            _ENTRIES[checkpoint] = entry
+            return processor, model
+
+
+def release(checkpoint: str) -> bool:
+    """참조 카운트를 1 감소, 0이 되면 모델을 해제. 해제되었으면 True"""
+    with _LOCK:
+        entry = _ENTRIES.get(checkpoint)
+        if entry is None:
+            return False
+        entry["refs"] -= 1
+        if entry["refs"] > 0:
+            return False
+        del _ENTRIES[checkpoint]
+
+    logger.info(f"Whisper 해제: {checkpoint}")
+    del entry
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+    return True
+
+
+def release_all():
+    """참조 카운트와 관계없이 모든 체크포인트 해제 (워커 종료 시)"""
+    with _LOCK:
+        checkpoints = list(_ENTRIES.keys())
+        _ENTRIES.clear()
+    if checkpoints and torch.cuda.is_available():
+        torch.cuda.empty_cache()
+    return checkpoints
+
+
+class WhisperHold:
+    """
+    모델 모듈의 load()/unload()용: 체크포인트 참조를 최대 1개만 잡고/놓음
+    잡고 있는 동안에는 transcribe() 호출 사이에 모델이 해제되지 않음
+    """
+
+    def __init__(self, checkpoint: str):
+        self.checkpoint = checkpoint
+        self.held = False
+        self._lock = threading.Lock()
+
+    def hold(self):
+        with self._lock:
+            if not self.held:
+                acquire(self.checkpoint)
+                self.held = True
+
+    def drop(self):
+        with self._lock:
+            if self.held:
+                release(self.checkpoint)
+                self.held = False
+
+
+def loaded_checkpoints():
+    """현재 로드된 체크포인트별 참조 카운트"""
+    with _LOCK:
+        return {name: entry["refs"] for name, entry in _ENTRIES.items()}
+
+
+# =========================================================
+# 배치 전사
+# - 같은 체크포인트 + 같은 디코딩 옵션을 쓰는 파일들을 패딩된 배치로 묶어 generate 1회
+# - 결과는 파일별 토큰 ID(np.int32 1-D)로 다시 분리 (단건 generate 결과와 동일한 형태)
+# =========================================================
+def _trim_generated(row, eos_id):
+    """배치 패딩(eos 뒤 pad)을 제거하여 단건 generate와 같은 길이로 자름"""
+    hits = np.nonzero(row[1:] == eos_id)[0]
+    if len(hits) == 0:
+        return row
+    return row[:hits[0] + 2]
+
+
+def _decode_variant(checkpoint, sr, forced_language, forced_task, generate_kwargs):
+    """
+    특징 저장소 variant: 같은 체크포인트(같은 스냅샷 리비전) + 같은 디코딩 옵션일 때만 토큰을 재사용
+    리비전은 채점 캐시 지문과 같은 방식(score_cache.checkpoint_revision)으로 확인
+    """
+    from models.score_cache import checkpoint_revision
+
+    revision = checkpoint_revision(checkpoint)
+    if revision is not None:
+        # 파일 목록까지 넣으면 길어지므로 리비전은 짧은 해시로
+        checkpoint = f"{checkpoint}@{hashlib.sha1(revision.encode('utf-8')).hexdigest()[:12]}"
+    options = ",".join(f"{k}={generate_kwargs[k]!r}" for k in sorted(generate_kwargs))
+    return f"{checkpoint}|sr={sr}|lang={forced_language}|task={forced_task}|{options}"
+
+
+def transcribe(checkpoint, pcm_list, sr=16000, batch_size=None,
+               forced_language=None, forced_task="transcribe", keys=None, **generate_kwargs):
+    """
+    pcm_list: 16kHz mono float32 배열 리스트
+    forced_language: 지정 시 processor.get_decoder_prompt_ids()로 forced_decoder_ids 구성
+    keys: pcm별 오디오 내용 해시 (DecodedClip.content_hash). 지정 시 특징 저장소(models/feature_store.py)에
+          있는 토큰은 재사용하고 없는 것만 전사 → 전부 있으면 Whisper를 로드하지 않음
+    generate_kwargs: whisper_model.generate에 그대로 전달 (max_new_tokens, temperature 등)
+    Returns: 입력 순서대로 토큰 ID 배열 리스트
+    """
+    if len(pcm_list) == 0:
+        return []
+    # 샘플링 디코딩은 결과가 매번 달라지므로 저장소를 쓰지 않음
+    if keys is None or generate_kwargs.get("do_sample"):
+        return _transcribe(checkpoint, pcm_list, sr, batch_size, forced_language, forced_task, **generate_kwargs)
+
+    from models import feature_store
+
+    variant = _decode_variant(checkpoint, sr, forced_language, forced_task, generate_kwargs)
+    results = feature_store.get_many_or_compute(
+        list(keys),
+        "tokens",
+        variant,
+        lambda missing: _transcribe(
+            checkpoint, [pcm_list[i] for i in missing], sr, batch_size,
+            forced_language, forced_task, **generate_kwargs
+        ),
+    )
+    return [np.asarray(ids, dtype=np.int32) for ids in results]
+
+
+def _transcribe(checkpoint, pcm_list, sr=16000, batch_size=None,
+                forced_language=None, forced_task="transcribe", **generate_kwargs):
+    if EXECUTION == "subprocess":
+        from models import whisper_process
+        return whisper_process.transcribe_remote(
+            checkpoint, pcm_list, sr, batch_size, forced_language, forced_task, generate_kwargs
+        )
+    return _transcribe_local(checkpoint, pcm_list, sr, batch_size, forced_language, forced_task, **generate_kwargs)
+
+
+@torch.no_grad()
+def _transcribe_local(checkpoint, pcm_list, sr=16000, batch_size=None,
+                      forced_language=None, forced_task="transcribe", **generate_kwargs):
+    batch_size = batch_size or BATCH_SIZE
+
+    processor, model = acquire(checkpoint)
+    try:
+        if forced_language:
+            generate_kwargs["forced_decoder_ids"] = processor.get_decoder_prompt_ids(
+                language=forced_language, task=forced_task
+            )
+        eos_id = model.generation_config.eos_token_id
+
+        results = []
+        for start in range(0, len(pcm_list), batch_size):
+            chunk = list(pcm_list[start:start + batch_size])
+            inputs = processor(chunk, sampling_rate=sr, return_tensors="pt")
+            input_features = inputs.input_features.to(device)
+            attn_mask = getattr(inputs, "attention_mask", None)
+            if attn_mask is not None:
+                generate_kwargs["attention_mask"] = attn_mask.to(device)
+
+            with _generate_lock(checkpoint):
+                pred_ids = model.generate(input_features, **generate_kwargs)
+            for row in pred_ids.cpu().numpy().astype(np.int32):
+                results.append(_trim_generated(row, eos_id))
+        return results
+    finally:
+        release(checkpoint)
@@ -0,0 +1,119 @@
+"""
+API 기동 시간 벤치마크
+
+    python scripts/bench_api_startup.py [--report importtime.txt]
+
+- `python -X importtime -c "import api.main"`를 별도 프로세스로 실행해 모듈별 import 시간을 수집
+- api.main import 누적 시간, lifespan 시작 시간이 예산을 넘거나
+  무거운 모듈(TF/Torch/transformers/pandas/librosa)이 API import 중에 로드되면 실패(exit 1)
+- 모델 워커는 끈 상태(MODEL_WORKER_MODE=off)로 측정
+"""
+import os
+import re
+import sys
+import json
+import argparse
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# 예산 (ms) — 환경 변수로 조정 가능
+IMPORT_BUDGET_MS = float(os.getenv("API_IMPORT_BUDGET_MS", "800"))
+LIFESPAN_BUDGET_MS = float(os.getenv("API_LIFESPAN_BUDGET_MS", "50"))
+
+# API 프로세스가 import 시점에 로드하면 안 되는 모듈 (모델 워커 전용)
+FORBIDDEN_MODULES = ["tensorflow", "tensorflow_hub", "keras", "torch", "transformers", "pandas", "librosa"]
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+_LIFESPAN_SNIPPET = """
+import asyncio, json, time
+t0 = time.perf_counter()
+from api.main import app, lifespan
+t1 = time.perf_counter()
+async def run():
+    async with lifespan(app):
+        return time.perf_counter()
+t2 = asyncio.run(run())
+print(json.dumps({"import_ms": (t1 - t0) * 1000, "lifespan_ms": (t2 - t1) * 1000}))
+"""
+
+
+def _bench_env():
+    env = dict(os.environ)
+    env["MODEL_WORKER_MODE"] = "off"
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH")]))
+    return env
+
+
+def collect_importtime():
+    """(모듈별 [(이름, self_us, cumulative_us, depth)], 원문 리포트)"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import api.main"],
+        cwd=ROOT, env=_bench_env(), capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"api.main import 실패:\n{proc.stderr[-2000:]}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if m:
+            self_us, cum_us, indent, name = m.groups()
+            # "| name" = top-level(0), 하위 모듈은 2칸씩 들여쓰기
+            rows.append((name, int(self_us), int(cum_us), (len(indent) - 1) // 2))
+    return rows, proc.stderr
+
+
+def measure_lifespan():
+    proc = subprocess.run(
+        [sys.executable, "-c", _LIFESPAN_SNIPPET],
+        cwd=ROOT, env=_bench_env(), capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"lifespan 측정 실패:\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API 기동 시간 벤치마크")
+    parser.add_argument("--report", help="-X importtime 원문 리포트 저장 경로")
+    parser.add_argument("--top", type=int, default=15, help="느린 모듈 상위 N개 출력")
+    args = parser.parse_args()
+
+    rows, raw = collect_importtime()
+    if args.report:
+        Path(args.report).write_text(raw, encoding="utf-8")
+
+    timing = measure_lifespan()
+    api_main = next((r for r in rows if r[0] == "api.main"), None)
+    # importtime 리포트에 api.main 줄이 없으면 별도 측정한 wall-clock 값 사용
+    import_ms = api_main[2] / 1000 if api_main else timing["import_ms"]
+    loaded = {r[0] for r in rows}
+    forbidden = sorted(m for m in FORBIDDEN_MODULES if m in loaded)
+
+    print(f"api.main import (누적): {import_ms:.1f} ms (예산 {IMPORT_BUDGET_MS:.0f} ms)")
+    print(f"lifespan 시작: {timing['lifespan_ms']:.1f} ms (예산 {LIFESPAN_BUDGET_MS:.0f} ms)")
+    print(f"상위 {args.top}개 top-level 모듈 (누적 ms):")
+    top_level = sorted((r for r in rows if r[3] == 0), key=lambda r: r[2], reverse=True)
+    for name, _, cum_us, _ in top_level[:args.top]:
+        print(f"  {cum_us / 1000:8.1f}  {name}")
+
+    failures = []
+    if import_ms > IMPORT_BUDGET_MS:
+        failures.append(f"import 시간 초과: {import_ms:.1f} ms > {IMPORT_BUDGET_MS:.0f} ms")
+    if timing["lifespan_ms"] > LIFESPAN_BUDGET_MS:
+        failures.append(f"lifespan 시간 초과: {timing['lifespan_ms']:.1f} ms > {LIFESPAN_BUDGET_MS:.0f} ms")
+    if forbidden:
+        failures.append(f"API import 중 무거운 모듈 로드: {', '.join(forbidden)}")
+
+    for f in failures:
+        print(f"❌ {f}")
+    if failures:
+        sys.exit(1)
+    print("✅ 기동 시간 예산 이내")
+
+
+if __name__ == "__main__":
+    main()
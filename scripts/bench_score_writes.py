@@ -0,0 +1,93 @@
+"""
+점수 일괄 저장 벤치마크 (항목별 UPDATE vs 임시 테이블 + UPDATE JOIN)
+
+    python scripts/bench_score_writes.py [--sizes 10 100 1000] [--repeat 3]
+
+- AUDIO_STORAGE 구조를 복사한 임시 테이블(세션 종료 시 삭제)에 가짜 행을 넣고 측정 → 실제 데이터는 건드리지 않음
+- 크기별로 두 방식의 평균 시간(ms)과 항목당 시간, 매칭/변경 건수를 출력
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from sqlalchemy import text
+
+from api.database import SessionLocal
+from api.score_bulk import KEY_COLUMNS, update_scores, update_scores_per_item
+
+BENCH_TABLE = "bench_audio_storage"
+PATIENT_ID = "BENCH"
+
+
+def _setup(db, size):
+    db.execute(text(f"DROP TEMPORARY TABLE IF EXISTS {BENCH_TABLE}"))
+    db.execute(text(f"CREATE TEMPORARY TABLE {BENCH_TABLE} LIKE AUDIO_STORAGE"))
+    # 키/점수 외 NOT NULL 컬럼은 IGNORE로 암묵적 기본값 사용
+    db.execute(
+        text(f"""
+            INSERT IGNORE INTO {BENCH_TABLE} ({", ".join(KEY_COLUMNS)}, SCORE, USE_TF)
+            VALUES (:patient_id, :order_num, :assess_type, :question_cd, :question_no, :question_minor_no, NULL, 0)
+        """),
+        _items(size, score=None),
+    )
+    db.commit()
+
+
+def _items(size, score):
+    return [
+        {
+            "patient_id": PATIENT_ID,
+            "order_num": 1,
+            "assess_type": "CLAP_D",
+            "question_cd": "BENCH",
+            "question_no": i // 10 + 1,
+            "question_minor_no": i % 10 + 1,
+            "score": score,
+        }
+        for i in range(size)
+    ]
+
+
+def _measure(db, fn, size, repeat):
+    timings = []
+    results = None
+    for r in range(repeat):
+        # 매 반복마다 다른 점수 → 모든 행이 실제로 갱신됨
+        items = _items(size, score=float(r + 1))
+        start = time.perf_counter()
+        results = fn(db, items, table=BENCH_TABLE)
+        db.commit()
+        timings.append((time.perf_counter() - start) * 1000)
+    return sum(timings) / len(timings), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="점수 일괄 저장 벤치마크")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        print(f"{'items':>6}  {'per-item ms':>12}  {'set-based ms':>12}  {'per-item/row':>12}  {'set/row':>9}  {'speedup':>7}  matched/updated")
+        for size in args.sizes:
+            _setup(db, size)
+            loop_ms, _ = _measure(db, update_scores_per_item, size, args.repeat)
+            set_ms, results = _measure(db, update_scores, size, args.repeat)
+            matched = sum(1 for r in results if r["matched"])
+            updated = sum(1 for r in results if r["updated"])
+            print(
+                f"{size:>6}  {loop_ms:>12.1f}  {set_ms:>12.1f}  {loop_ms / size:>12.3f}  {set_ms / size:>9.3f}"
+                f"  {loop_ms / set_ms:>6.1f}x  {matched}/{updated}"
+            )
+        db.execute(text(f"DROP TEMPORARY TABLE IF EXISTS {BENCH_TABLE}"))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
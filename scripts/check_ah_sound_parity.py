@@ -0,0 +1,114 @@
+"""
+AH_SOUND 후처리 벡터화 동등성 검사 (models/ah_sound.py의 filter_pitch / moving_std)
+
+    python scripts/check_ah_sound_parity.py [--trials 2000] [--seed 0]
+
+- 벡터화 이전의 파이썬 루프 구현을 기준(reference)으로 그대로 보관하고,
+  같은 입력에 대해 두 구현의 출력이 같은지 np.testing.assert_allclose로 확인
+- 무작위 시퀀스 외에 경계 사례를 따로 검사:
+  윈도우 안의 0/음수, 유효값 1개 이하, len(seq) < win, 짝수 win, 빈 시퀀스
+- 불일치가 있으면 AssertionError로 종료(exit 1)
+"""
+import sys
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from models.ah_sound import filter_pitch, moving_std
+
+
+# ============================================
+# 기준 구현 (벡터화 이전 코드 그대로)
+# ============================================
+def reference_filter_pitch(pitch, confidence, threshold=0.7):
+    """신뢰도가 높은 피치만 필터링"""
+    filtered = [p if c >= threshold else 0 for p, c in zip(pitch, confidence)]
+    return filtered
+
+
+def reference_moving_std(seq, win=5):
+    """이동 윈도우 표준편차 계산"""
+    if len(seq) == 0:
+        return []
+    padded = np.pad(seq, (win//2,), mode='edge')
+    std_values = []
+    for i in range(len(seq)):
+        window = padded[i:i+win]
+        valid_values = window[window > 0]
+        if len(valid_values) > 1:
+            std_values.append(np.std(valid_values))
+        else:
+            std_values.append(0.0)
+    return std_values
+
+
+def check_moving_std(seq, win, label):
+    seq = np.asarray(seq, dtype=np.float64)
+    expected = np.asarray(reference_moving_std(seq, win), dtype=np.float64)
+    actual = np.asarray(moving_std(seq, win), dtype=np.float64)
+    assert actual.shape == expected.shape, f"{label}: shape {actual.shape} != {expected.shape}"
+    np.testing.assert_allclose(actual, expected, rtol=1e-12, atol=1e-12, err_msg=label)
+
+
+def check_filter_pitch(pitch, confidence, threshold, label):
+    expected = np.asarray(reference_filter_pitch(pitch, confidence, threshold), dtype=np.float64)
+    actual = np.asarray(filter_pitch(pitch, confidence, threshold), dtype=np.float64)
+    assert actual.shape == expected.shape, f"{label}: shape {actual.shape} != {expected.shape}"
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=0, err_msg=label)
+
+
+def edge_cases():
+    """(이름, seq, win) 경계 사례"""
+    return [
+        ("빈 시퀀스", [], 5),
+        ("길이 1", [200.0], 5),
+        ("len < win", [180.0, 0.0, 190.0], 9),
+        ("len < win (전부 유효)", [180.0, 185.0, 190.0, 195.0], 9),
+        ("전부 0", [0.0] * 20, 5),
+        ("전부 음수", [-1.0, -5.0, -2.0, -3.0, -4.0, -6.0], 3),
+        ("윈도우 안의 0/음수", [200.0, 0.0, -3.0, 210.0, 0.0, 205.0, -1.0, 220.0], 5),
+        ("유효값 1개", [0.0, 0.0, 150.0, 0.0, 0.0, 0.0, 0.0], 5),
+        ("유효값 1개씩 띄엄띄엄", [150.0, 0.0, 0.0, 0.0, 0.0, 160.0, 0.0, 0.0, 0.0, 0.0], 5),
+        ("짝수 win", [100.0, 110.0, 0.0, 130.0, 125.0, -2.0, 140.0, 150.0], 4),
+        ("짝수 win, len < win", [100.0, 0.0, 120.0], 6),
+        ("win 1", [100.0, 0.0, 120.0, 130.0], 1),
+        ("win 2", [100.0, 0.0, 120.0, 130.0, 0.0], 2),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AH_SOUND filter_pitch / moving_std 동등성 검사")
+    parser.add_argument("--trials", type=int, default=2000, help="무작위 시퀀스 개수")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for label, seq, win in edge_cases():
+        check_moving_std(seq, win, f"moving_std [{label}] win={win}")
+    print(f"경계 사례 {len(edge_cases())}건 통과")
+
+    rng = np.random.default_rng(args.seed)
+    for trial in range(args.trials):
+        n = int(rng.integers(0, 120))
+        win = int(rng.integers(1, 16))   # 홀수/짝수 win 모두 포함
+        pitch = rng.uniform(80.0, 400.0, n)
+        # 일부 프레임을 0(무성) / 음수로 바꿔 윈도우마다 유효값 수가 달라지게 함
+        r = rng.random(n)
+        pitch[r < rng.uniform(0.0, 0.9)] = 0.0
+        pitch[rng.random(n) < 0.05] *= -1.0
+        confidence = rng.random(n)
+        threshold = float(rng.choice([0.0, 0.1, 0.5, 0.7, 1.0]))
+
+        check_filter_pitch(pitch, confidence, threshold, f"filter_pitch trial={trial} n={n} th={threshold}")
+        filtered = filter_pitch(pitch, confidence, threshold)
+        check_moving_std(pitch, win, f"moving_std trial={trial} n={n} win={win} (원본)")
+        check_moving_std(filtered, win, f"moving_std trial={trial} n={n} win={win} (필터 후)")
+    print(f"무작위 시퀀스 {args.trials}건 통과")
+    print("✅ filter_pitch / moving_std 가 기준 루프 구현과 일치")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+미채점 회차 안전망(api/job_queue.py의 enqueue_pending_from_storage) 재등록 검사
+
+    python scripts/check_job_queue_requeue.py
+
+- 세션 임시 테이블(AUDIO_STORAGE, model_job과 같은 이름 → 이 세션에서만 원본을 가림)에
+  가짜 행을 넣고 검사하므로 실제 데이터는 건드리지 않음
+- 확인하는 내용:
+  done 회차에 새 USE_TF = 0 행이 들어오면 queued(ATTEMPTS 0)로 다시 등록,
+  큐에 없는 회차는 새로 등록,
+  더 최신 재시도가 채점된 문항의 이전 행만 남은 done 회차와 failed 회차는 그대로,
+  같은 상태에서 다시 호출하면 변경 없음
+- 불일치가 있으면 AssertionError로 종료(exit 1)
+"""
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from sqlalchemy import text
+
+from api.database import SessionLocal
+from api.job_queue import enqueue_pending_from_storage
+
+PATIENT_ID = "CHK0"
+
+
+def _setup(db):
+    for table in ("AUDIO_STORAGE", "model_job"):
+        db.execute(text(f"DROP TEMPORARY TABLE IF EXISTS {table}"))
+        db.execute(text(f"CREATE TEMPORARY TABLE {table} LIKE {table}"))
+    db.commit()
+
+
+def _add_audio(db, order_num, question_no, question_minor_no, use_tf):
+    # 키/USE_TF 외 NOT NULL 컬럼은 IGNORE로 암묵적 기본값 사용
+    db.execute(
+        text("""
+            INSERT IGNORE INTO AUDIO_STORAGE
+                (PATIENT_ID, ORDER_NUM, ASSESS_TYPE, QUESTION_CD, QUESTION_NO, QUESTION_MINOR_NO, USE_TF)
+            VALUES (:patient_id, :order_num, 'CLAP_A', 'CHECK', :question_no, :question_minor_no, :use_tf)
+        """),
+        {
+            "patient_id": PATIENT_ID,
+            "order_num": order_num,
+            "question_no": question_no,
+            "question_minor_no": question_minor_no,
+            "use_tf": use_tf,
+        }
+    )
+
+
+def _add_job(db, order_num, status, attempts):
+    db.execute(
+        text("""
+            INSERT INTO model_job (PATIENT_ID, ORDER_NUM, STATUS, ATTEMPTS, LAST_ERROR, CREATE_DATE)
+            VALUES (:patient_id, :order_num, :status, :attempts, :last_error, NOW())
+        """),
+        {
+            "patient_id": PATIENT_ID,
+            "order_num": order_num,
+            "status": status,
+            "attempts": attempts,
+            "last_error": "previous error" if status == "failed" else None,
+        }
+    )
+
+
+def _jobs(db):
+    rows = db.execute(
+        text("SELECT ORDER_NUM, STATUS, ATTEMPTS, LAST_ERROR FROM model_job WHERE PATIENT_ID = :patient_id"),
+        {"patient_id": PATIENT_ID}
+    ).fetchall()
+    return {row[0]: (row[1], row[2], row[3]) for row in rows}
+
+
+def main():
+    db = SessionLocal()
+    try:
+        _setup(db)
+
+        # 1회차: done 이후 문항 하나가 새로 들어옴 (import 스크립트/직접 DB 수정 등)
+        _add_job(db, 1, "done", 1)
+        _add_audio(db, 1, 1, 1, use_tf=1)
+        _add_audio(db, 1, 2, 1, use_tf=0)
+        # 2회차: 큐에 없음
+        _add_audio(db, 2, 1, 1, use_tf=0)
+        # 3회차: done, 미채점 행은 더 최신 재시도가 채점된 이전 행뿐
+        _add_job(db, 3, "done", 1)
+        _add_audio(db, 3, 1, 1, use_tf=0)
+        _add_audio(db, 3, 1, 2, use_tf=1)
+        # 4회차: failed는 재시도 없이 유지
+        _add_job(db, 4, "failed", 3)
+        _add_audio(db, 4, 1, 1, use_tf=0)
+        db.commit()
+
+        enqueue_pending_from_storage(db)
+        jobs = _jobs(db)
+        assert jobs[1] == ("queued", 0, None), f"done 회차 재등록 실패: {jobs[1]}"
+        assert jobs[2] == ("queued", 0, None), f"새 회차 등록 실패: {jobs[2]}"
+        assert jobs[3] == ("done", 1, None), f"이전 재시도만 남은 done 회차가 재등록됨: {jobs[3]}"
+        assert jobs[4] == ("failed", 3, "previous error"), f"failed 회차가 변경됨: {jobs[4]}"
+        print("done 회차 재등록 / 새 회차 등록 / 이전 재시도 제외 / failed 유지 통과")
+
+        assert enqueue_pending_from_storage(db) == 0, "같은 상태에서 다시 호출했는데 변경됨"
+        assert _jobs(db) == jobs, f"두 번째 호출 후 상태가 바뀜: {_jobs(db)}"
+        print("반복 호출 시 변경 없음 통과")
+        print("✅ enqueue_pending_from_storage 재등록 동작 확인")
+    finally:
+        for table in ("AUDIO_STORAGE", "model_job"):
+            db.execute(text(f"DROP TEMPORARY TABLE IF EXISTS {table}"))
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import os
+import time
+import argparse
+
+from api import audio_store
+from api.database import SessionLocal
+
+# 오디오 저장소(api/audio_store.py)에서 AUDIO_STORAGE.FILE_HASH가 가리키지 않는 파일 삭제
+# (업로드 도중 프로세스 종료 등으로 요청 경로에서 정리되지 못한 파일용)
+# 최근 수정된 파일은 커밋 전인 업로드일 수 있으므로 --min-age 이상 지난 것만 대상
+#
+#   python -m scripts.gc_audio_store [--min-age 3600] [--batch 500] [--dry-run]
+
+
+def iter_store_files():
+    """저장소의 (file_hash, file_format) 목록 (임시 디렉터리 제외)"""
+    for root, dirs, files in os.walk(audio_store.STORE_DIR):
+        if root == audio_store.STORE_DIR and "tmp" in dirs:
+            dirs.remove("tmp")
+        for name in files:
+            file_hash, _, file_format = name.partition(".")
+            if len(file_hash) == 64 and file_format:
+                yield file_hash, file_format
+
+
+def remove_stale_temp(saved_before: float, dry_run: bool) -> int:
+    """중단된 업로드가 남긴 임시 파일(.part) 삭제"""
+    tmp_dir = os.path.join(audio_store.STORE_DIR, "tmp")
+    if not os.path.isdir(tmp_dir):
+        return 0
+    removed = 0
+    for name in os.listdir(tmp_dir):
+        path = os.path.join(tmp_dir, name)
+        if name.endswith(".part") and os.stat(path).st_mtime <= saved_before:
+            if not dry_run:
+                os.unlink(path)
+            removed += 1
+    return removed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Delete audio store files that no AUDIO_STORAGE row references.")
+    parser.add_argument("--min-age", type=float, default=3600, help="skip files modified within this many seconds")
+    parser.add_argument("--batch", type=int, default=500, help="hashes per reference query")
+    parser.add_argument("--dry-run", action="store_true", help="count only")
+    args = parser.parse_args()
+
+    saved_before = time.time() - args.min_age
+    files = list(iter_store_files())
+    print(f"저장소 파일: {len(files)}개 (저장소: {audio_store.STORE_DIR})")
+
+    db = SessionLocal()
+    try:
+        removed = 0
+        for start in range(0, len(files), args.batch):
+            batch = files[start:start + args.batch]
+            removed += audio_store.remove_unreferenced(db, batch, saved_before=saved_before, dry_run=args.dry_run)
+            db.rollback()
+        temp_removed = remove_stale_temp(saved_before, args.dry_run)
+        label = "삭제 대상" if args.dry_run else "삭제"
+        print(f"{label}: 참조 없는 파일 {removed}개, 임시 파일 {temp_removed}개")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import argparse
+
+from sqlalchemy import text
+
+from api import audio_store
+from api.database import SessionLocal
+
+# AUDIO_STORAGE.FILE blob → 오디오 저장소(api/audio_store.py) 이전
+# 선행: db/data/AUDIO_STORAGE_alter_file_store.sql
+#
+#   python -m scripts.migrate_audio_blobs [--batch 200] [--dry-run]
+
+PK_COLUMNS = ["PATIENT_ID", "ORDER_NUM", "ASSESS_TYPE", "QUESTION_CD", "QUESTION_NO", "QUESTION_MINOR_NO"]
+
+
+def sniff_format(data: bytes) -> str:
+    """blob 헤더로 포맷 추정 (업로드 허용 포맷: wav, m4a, mp4, aac)"""
+    if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+        return "wav"
+    if data[4:8] == b"ftyp":
+        return "m4a"
+    if len(data) > 1 and data[0] == 0xFF and (data[1] & 0xF0) == 0xF0:
+        return "aac"
+    return "wav"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Move AUDIO_STORAGE blobs into the content-addressed audio store.")
+    parser.add_argument("--batch", type=int, default=200, help="rows per transaction")
+    parser.add_argument("--dry-run", action="store_true", help="count rows only")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        remaining = db.execute(
+            text("SELECT COUNT(*) FROM AUDIO_STORAGE WHERE FILE_FORMAT IS NULL AND FILE IS NOT NULL")
+        ).scalar()
+        print(f"이전 대상: {remaining}건 (저장소: {audio_store.STORE_DIR})")
+        if args.dry_run or not remaining:
+            return
+
+        select_query = text(f"""
+            SELECT {", ".join(PK_COLUMNS)}, FILE
+            FROM AUDIO_STORAGE
+            WHERE FILE_FORMAT IS NULL AND FILE IS NOT NULL
+            LIMIT :limit
+        """)
+        update_query = text("""
+            UPDATE AUDIO_STORAGE
+            SET FILE_HASH = :file_hash,
+                FILE_SIZE = :file_size,
+                FILE_FORMAT = :file_format,
+                FILE = NULL
+            WHERE PATIENT_ID = :PATIENT_ID
+              AND ORDER_NUM = :ORDER_NUM
+              AND ASSESS_TYPE = :ASSESS_TYPE
+              AND QUESTION_CD = :QUESTION_CD
+              AND QUESTION_NO = :QUESTION_NO
+              AND QUESTION_MINOR_NO = :QUESTION_MINOR_NO
+        """)
+
+        moved = 0
+        while True:
+            rows = db.execute(select_query, {"limit": args.batch}).mappings().fetchall()
+            if not rows:
+                break
+            params = []
+            for row in rows:
+                data = row["FILE"]
+                file_format = sniff_format(data)
+                # 파일을 먼저 기록(원자적)한 뒤 행을 갱신 → 중간에 실패해도 blob이 남아 있음
+                file_hash, file_size, _ = audio_store.save_bytes(data, file_format)
+                params.append(dict(
+                    {c: row[c] for c in PK_COLUMNS},
+                    file_hash=file_hash, file_size=file_size, file_format=file_format,
+                ))
+            db.execute(update_query, params)
+            db.commit()
+            moved += len(params)
+            print(f"  {moved}/{remaining}")
+
+        print(f"완료: {moved}건 이전")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,9 @@ import os
 import sys
 import time
 import logging
+import threading
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
 # 프로젝트 루트 경로 설정
 ROOT = Path(__file__).resolve().parents[1]
@@ -16,6 +18,46 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 동시에 처리할 (환자, 회차) 작업 수. 모델 객체는 슬롯끼리 공유된다 (ui/services/model_service 참고)
+WORKER_SLOTS = int(os.getenv("MODEL_WORKER_SLOTS", "1"))
+
+# 작업 입력 소스: "http"(원격 워커, /bundle 호출) 또는 "db"(API 프로세스 내 워커, AUDIO_STORAGE 직접 조회)
+WORKER_SOURCE = os.getenv("MODEL_WORKER_SOURCE", "http")
+
+# /bundle 압축 모드: "none"(무압축 tar, 기본) 또는 "gz"
+BUNDLE_COMPRESSION = os.getenv("MODEL_WORKER_BUNDLE_COMPRESSION", "none")
+
+# 슬롯별 처리 지표 {slot_name: {...}}
+_SLOT_METRICS = {}
+_METRICS_LOCK = threading.Lock()
+
+# 데몬 모드(--daemon): conda 환경 유지 + 모델 상주, 로컬 제어 소켓으로 상태 조회/실행 요청
+DAEMON_HOST = os.getenv("MODEL_WORKER_HOST", "127.0.0.1")
+DAEMON_PORT = int(os.getenv("MODEL_WORKER_PORT", "8765"))
+# 데몬 시작 시 미리 로드할 단계 (쉼표 구분, 기본 전체)
+WARM_MODELS = [
+    m.strip().upper()
+    for m in os.getenv(
+        "MODEL_WORKER_WARM_MODELS",
+        "LTN_RPT,GUESS_END,SAY_OBJ,SAY_ANI,TALK_PIC,AH_SOUND,PTK_SOUND,TALK_CLEAN",
+    ).split(",")
+    if m.strip()
+]
+
+_DAEMON_STATE = {
+    "mode": "once",
+    "state": "cold",        # cold → warming → warm
+    "started_at": None,
+    "warmup_seconds": None,
+    "warm_models": [],
+    "warmup_timings": {},  # 단계별 load_s / cold_infer_s / warm_infer_s
+    "busy": False,
+    "passes": 0,
+    "last_pass_at": None,
+    "last_pass_seconds": None,
+}
+_DAEMON_LOCK = threading.Lock()
+
 
 def _ensure_conda_env():
     """
@@ -111,27 +153,42 @@ def _init_heavy_imports():
     return pd, text, SessionLocal, APIClient, model_process, save_scores_to_db
 
 
-def get_pending_jobs(db, text):
-    """파일이 존재하는 건 중 점수가 없는 회차만 조회"""
-    rows = db.execute(
-        text(
-            """
-            SELECT DISTINCT lst.PATIENT_ID, lst.ORDER_NUM, pk.API_KEY
-            FROM AUDIO_STORAGE lst
-            JOIN API_KEY pk
-                on pk.PATIENT_ID = lst.PATIENT_ID
-            WHERE lst.USE_TF = 0
-            """
-        )
-    ).fetchall()
-    return rows
+def claim_next_job(SessionLocal):
+    """
+    model_job 큐에서 다음 작업 1건을 임대 (FOR UPDATE SKIP LOCKED, api/job_queue.py)
+    Returns: (job_id, patient_id, order_num, api_key) 또는 None
+    """
+    from api import job_queue
+
+    db = SessionLocal()
+    try:
+        jobs = job_queue.claim_jobs(db, limit=1)
+        return jobs[0] if jobs else None
+    finally:
+        db.close()
+
 
+def finish_job(SessionLocal, job_id, success: bool, error: str = None):
+    """임대한 작업을 done(또는 재시도 queued / failed)으로 마감"""
+    from api import job_queue
 
-def fetch_bundle_as_path_info(patient_id: str, order_num: int, api_base_url: str, pd):
+    db = SessionLocal()
+    try:
+        if success:
+            job_queue.complete_job(db, job_id)
+        else:
+            job_queue.fail_job(db, job_id, error or "모델링 실패")
+    except Exception as e:
+        logger.error(f"작업 {job_id} 상태 갱신 실패: {e}")
+    finally:
+        db.close()
+
+
+def fetch_bundle_as_path_info(patient_id: str, order_num: int, api_base_url: str, pd, compression: str = None):
     """
     /reports/{patient_id}/{order_num}/bundle 을 호출해서
     - manifest.json → DataFrame
-    - audio 파일 → 임시 디렉터리에 풀고,
+    - audio 파일 → 응답을 받는 대로 임시 디렉터리에 풀고 (tar 임시 파일 없음),
     - model_process가 기대하는 컬럼 이름으로 정리하여 반환
     """
     import tarfile
@@ -140,27 +197,27 @@ def fetch_bundle_as_path_info(patient_id: str, order_num: int, api_base_url: str
     import json
 
     url = f"{api_base_url}/reports/{patient_id}/{order_num}/bundle"
-    resp = requests.get(url, stream=True, timeout=300)
+    resp = requests.get(
+        url,
+        params={"compression": compression or BUNDLE_COMPRESSION},
+        stream=True,
+        timeout=300,
+    )
     resp.raise_for_status()
-
-    # tar.gz 임시 저장
-    tmp_tar = tempfile.NamedTemporaryFile(delete=False, suffix=".tar.gz")
-    for chunk in resp.iter_content(chunk_size=1024 * 1024):
-        if chunk:
-            tmp_tar.write(chunk)
-    tmp_tar.close()
+    resp.raw.decode_content = True
 
     temp_dir = tempfile.mkdtemp(prefix=f"{patient_id}_{order_num}_")
     manifest = None
 
-    # 압축 해제
-    with tarfile.open(tmp_tar.name, "r:gz") as tar:
-        for member in tar.getmembers():
+    # 스트림 모드("r|*")로 엔트리가 도착하는 순서대로 해제 (gz/무압축 자동 판별)
+    with tarfile.open(fileobj=resp.raw, mode="r|*") as tar:
+        for member in tar:
             if member.name == "manifest.json":
                 f = tar.extractfile(member)
                 manifest = json.load(f)
             else:
                 tar.extract(member, path=temp_dir)
+    resp.close()
 
     if manifest is None:
         raise ValueError("manifest.json 이 번들에 없습니다.")
@@ -185,50 +242,424 @@ def fetch_bundle_as_path_info(patient_id: str, order_num: int, api_base_url: str
     return df
 
 
-def process_pending_jobs(pd, text, SessionLocal, APIClient, model_process, save_scores_to_db):
+# ============================================
+# 작업 입력 소스 (fetch(patient_id, order_num) -> model_process용 DataFrame)
+# ============================================
+class HttpBundleSource:
+    """원격 워커용: API 서버의 /bundle 을 받아 임시 디렉터리에 풀어 경로로 전달"""
+
+    def __init__(self, pd, APIClient):
+        self.pd = pd
+        self.APIClient = APIClient
+
+    def fetch(self, patient_id, order_num):
+        raw_base_url = self.APIClient._get_api_base_url()
+        api_base_url = self.APIClient._normalize_url(raw_base_url)
+        return fetch_bundle_as_path_info(patient_id, order_num, api_base_url, self.pd)
+
+
+class DbBundleSource:
+    """
+    API 프로세스 내 워커용: HTTP/tar.gz/임시 파일을 거치지 않고
+    AUDIO_STORAGE 행을 한 건씩 받아 오디오 저장소 파일(이전 행은 blob)을 바로 디코딩(DecodedClip)하여 전달
+    문항별 재녹음(QUESTION_MINOR_NO)은 model_process가 가장 큰 번호만 쓰므로 SQL에서 미리 걸러
+    버려질 파일은 디코딩/메모리 적재하지 않음
+    """
+
+    def __init__(self, pd, text, SessionLocal):
+        self.pd = pd
+        self.text = text
+        self.SessionLocal = SessionLocal
+
+    def fetch(self, patient_id, order_num):
+        from api import audio_store
+        from models.audio_clip import load_clip, load_clip_bytes
+
+        # 순위는 키 컬럼만으로 계산한 뒤 원본 행과 조인 (이전 행의 FILE blob이 파생 테이블에 복사되지 않게)
+        # ui/services/model_service.py의 groupby(...)['question_minor_no'].idxmax()와 같은 기준
+        query = self.text("""
+            SELECT
+                s.PATIENT_ID,
+                s.ORDER_NUM,
+                s.ASSESS_TYPE,
+                s.QUESTION_CD,
+                s.QUESTION_NO,
+                s.QUESTION_MINOR_NO,
+                s.DURATION,
+                s.RATE,
+                s.FILE_HASH,
+                s.FILE_FORMAT,
+                IF(s.FILE_FORMAT IS NULL, s.FILE, NULL) AS FILE
+            FROM (
+                SELECT
+                    ASSESS_TYPE,
+                    QUESTION_CD,
+                    QUESTION_NO,
+                    QUESTION_MINOR_NO,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY ASSESS_TYPE, QUESTION_CD, QUESTION_NO
+                        ORDER BY CAST(QUESTION_MINOR_NO AS SIGNED) DESC
+                    ) AS RN
+                FROM AUDIO_STORAGE
+                WHERE PATIENT_ID = :patient_id
+                  AND ORDER_NUM = :order_num
+                  AND USE_TF = 0
+            ) latest
+            JOIN AUDIO_STORAGE s
+                ON s.PATIENT_ID = :patient_id
+               AND s.ORDER_NUM = :order_num
+               AND s.ASSESS_TYPE = latest.ASSESS_TYPE
+               AND s.QUESTION_CD = latest.QUESTION_CD
+               AND s.QUESTION_NO = latest.QUESTION_NO
+               AND s.QUESTION_MINOR_NO = latest.QUESTION_MINOR_NO
+            WHERE latest.RN = 1
+            ORDER BY s.ASSESS_TYPE, s.QUESTION_CD, s.QUESTION_NO, s.QUESTION_MINOR_NO
+        """)
+
+        records = []
+        db = self.SessionLocal()
+        try:
+            # 서버 측 커서로 한 행씩 받아 디코딩 (저장소 파일은 경로로, 이전 행의 blob은 디코딩 직후 해제)
+            result = db.execute(
+                query,
+                {"patient_id": patient_id, "order_num": order_num},
+                execution_options={"stream_results": True, "yield_per": 1},
+            )
+            for row in result.mappings():
+                name = f"{row['QUESTION_CD']}/{row['QUESTION_NO']}_{row['QUESTION_MINOR_NO']}"
+                path = audio_store.row_path(row)
+                if path is not None:
+                    clip = load_clip(path, content_hash=row["FILE_HASH"])
+                else:
+                    clip = load_clip_bytes(audio_store.read_row_bytes(row), name=name)
+                records.append({
+                    "patient_id": row["PATIENT_ID"],
+                    "order_num": row["ORDER_NUM"],
+                    "assess_type": row["ASSESS_TYPE"],
+                    "question_cd": row["QUESTION_CD"],
+                    "question_no": row["QUESTION_NO"],
+                    "question_minor_no": row["QUESTION_MINOR_NO"],
+                    "duration": row["DURATION"],
+                    "rate": row["RATE"],
+                    "file": clip,
+                })
+        finally:
+            db.close()
+
+        return self.pd.DataFrame(records)
+
+
+def make_job_source(kind, pd, text, SessionLocal, APIClient):
+    kind = (kind or WORKER_SOURCE).lower()
+    if kind == "db":
+        return DbBundleSource(pd, text, SessionLocal)
+    if kind == "http":
+        return HttpBundleSource(pd, APIClient)
+    raise ValueError(f"알 수 없는 작업 입력 소스: {kind} (http | db)")
+
+
+def _record_slot_metrics(slot: str, success: bool, elapsed: float):
+    with _METRICS_LOCK:
+        m = _SLOT_METRICS.setdefault(slot, {"jobs": 0, "succeeded": 0, "failed": 0, "busy_seconds": 0.0, "last_finished_at": None})
+        m["jobs"] += 1
+        m["succeeded" if success else "failed"] += 1
+        m["busy_seconds"] += elapsed
+        m["last_finished_at"] = time.time()
+
+
+def get_slot_metrics() -> dict:
+    """슬롯별 처리 건수/성공/실패/누적 처리 시간 스냅샷"""
+    with _METRICS_LOCK:
+        return {slot: dict(m) for slot, m in _SLOT_METRICS.items()}
+
+
+def process_job(patient_id, order_num, api_key, source, model_process, save_scores_to_db):
+    """(환자, 회차) 1건 처리: 입력 조회 → 모델링 → 점수 저장. (성공 여부, 오류 메시지) 반환"""
+    slot = threading.current_thread().name
+    start_time = time.time()
+    success = False
+    try:
+        path_info = source.fetch(patient_id, order_num)
+        if path_info.empty:
+            # 채점할 파일이 남아 있지 않음 → 처리할 것 없이 완료
+            logger.warning(f"{patient_id}/{order_num}: 파일 메타데이터 없음, 건너뜀")
+            success = True
+            return True, None
+        scores, question_meta = model_process(path_info, api_key)
+        success = save_scores_to_db(scores, order_num, patient_id, question_meta=question_meta)
+
+        if success:
+            logger.info(f"[{slot}] {patient_id}/{order_num}: 모델링 완료 및 점수 저장")
+            return True, None
+        logger.error(f"[{slot}] {patient_id}/{order_num}: 점수 저장 실패")
+        return False, "점수 저장 실패"
+    except Exception as e:
+        logger.error(f"[{slot}] {patient_id}/{order_num}: 처리 실패 - {e}")
+        return False, str(e)
+    finally:
+        _record_slot_metrics(slot, success, time.time() - start_time)
+
+
+def _drain_queue(SessionLocal, job_source, model_process, save_scores_to_db) -> int:
+    """슬롯 1개: 큐가 빌 때까지 작업을 하나씩 임대 → 처리 → 마감. 처리 건수 반환"""
+    handled = 0
+    while True:
+        job = claim_next_job(SessionLocal)
+        if job is None:
+            return handled
+        job_id, patient_id, order_num, api_key = job
+        success, error = process_job(patient_id, order_num, api_key, job_source, model_process, save_scores_to_db)
+        finish_job(SessionLocal, job_id, success, error)
+        handled += 1
+
+
+def next_wait(SessionLocal, interval: float) -> float:
+    """
+    다음 대기 시간: interval과 디바운스 대기 작업(NOT_BEFORE)이 풀리는 시각 중 빠른 쪽
+    (업로드 알림으로 깨어났지만 DB 시계 기준 NOT_BEFORE가 아직 안 된 경우 곧바로 다시 시도)
+    """
+    from api import job_queue
+
+    db = SessionLocal()
+    try:
+        delay = job_queue.seconds_until_next_job(db)
+    except Exception as e:
+        logger.warning(f"디바운스 대기 작업 조회 실패: {e}")
+        delay = None
+    finally:
+        db.close()
+    if delay is None:
+        return interval
+    return min(interval, delay + 0.1)
+
+
+def process_pending_jobs(pd, text, SessionLocal, APIClient, model_process, save_scores_to_db, slots: int = None, source: str = None):
+    from api import job_queue
+
+    slots = max(1, slots or WORKER_SLOTS)
+    job_source = make_job_source(source, pd, text, SessionLocal, APIClient)
+
+    # 안전망: 업로드 API를 거치지 않은 미채점 회차를 큐에 등록
     db = SessionLocal()
     try:
-        pending = get_pending_jobs(db, text)
-        if not pending:
-            logger.info("대기 중인 모델링 작업이 없습니다.")
-            return
+        job_queue.enqueue_pending_from_storage(db)
+    except Exception as e:
+        logger.error(f"미채점 회차 큐 등록 실패: {e}")
+    finally:
+        db.close()
+
+    start_time = time.time()
+    if slots == 1:
+        handled = _drain_queue(SessionLocal, job_source, model_process, save_scores_to_db)
+    else:
+        with ThreadPoolExecutor(max_workers=slots, thread_name_prefix="model-slot") as executor:
+            futures = [
+                executor.submit(_drain_queue, SessionLocal, job_source, model_process, save_scores_to_db)
+                for _ in range(slots)
+            ]
+            handled = sum(future.result() for future in futures)
+
+    if handled == 0:
+        logger.info("대기 중인 모델링 작업이 없습니다.")
+        return
+
+    logger.info(f"{handled}건 처리 종료 ({time.time() - start_time:.2f}초, 슬롯: {slots})")
+    try:
+        from models import score_cache
+        logger.info(f"채점 캐시: {score_cache.stats()}")
+    except Exception as e:
+        logger.warning(f"채점 캐시 통계 조회 실패: {e}")
+    for slot, m in sorted(get_slot_metrics().items()):
+        logger.info(
+            f"  {slot}: 처리 {m['jobs']}건 (성공 {m['succeeded']}, 실패 {m['failed']}), "
+            f"누적 {m['busy_seconds']:.1f}초"
+        )
+
+
+# ============================================
+# 데몬 모드
+# ============================================
+def _set_daemon_state(**kwargs):
+    with _DAEMON_LOCK:
+        _DAEMON_STATE.update(kwargs)
+
+
+def get_daemon_status() -> dict:
+    """warm/cold 상태, 로드된 Whisper 체크포인트, 슬롯 지표, 캐시 통계"""
+    with _DAEMON_LOCK:
+        status = dict(_DAEMON_STATE)
+    status["slots"] = get_slot_metrics()
+    if "models.whisper_registry" in sys.modules:
+        status["whisper_checkpoints"] = sys.modules["models.whisper_registry"].loaded_checkpoints()
+    if "models.whisper_process" in sys.modules:
+        status["whisper_process"] = sys.modules["models.whisper_process"].status()
+    if "models.warmup" in sys.modules:
+        status["models_loaded"] = sys.modules["models.warmup"].status()
+    for name in ("score_cache", "feature_store"):
+        module = sys.modules.get(f"models.{name}")
+        if module is not None:
+            status[name] = module.stats()
+    try:
+        from api.job_events import pending_uploads
+        status["pending_uploads"] = [list(k) for k in pending_uploads()]
+    except Exception:
+        pass
+    return status
+
+
+def _warm_models(models=None):
+    """단계별 모델을 병렬 로드 후 더미 추론으로 예열 (models/warmup.py, 단계별 cold/warm 지연 기록)"""
+    from models import warmup
+
+    models = models or WARM_MODELS
+    _set_daemon_state(state="warming")
+    start_time = time.time()
+    timings = warmup.warmup(models)
+    warmed = [stage for stage, t in timings.items() if not t["error"]]
+    # Whisper를 서브프로세스에서 실행하는 경우 자식 프로세스의 체크포인트도 미리 로드
+    registry = sys.modules.get("models.whisper_registry")
+    if registry is not None and registry.EXECUTION == "subprocess":
+        try:
+            from models import whisper_process
+            whisper_process.preload(list(registry.loaded_checkpoints()))
+        except Exception as e:
+            logger.error(f"  Whisper 서브프로세스 예열 실패: {e}")
+    elapsed = time.time() - start_time
+    _set_daemon_state(state="warm", warmup_seconds=round(elapsed, 2), warm_models=warmed, warmup_timings=timings)
+    logger.info(f"모델 예열 완료 ({elapsed:.1f}초): {warmed}")
+
+
+def _start_control_server(host=DAEMON_HOST, port=DAEMON_PORT):
+    """
+    로컬 제어 소켓 (한 줄 JSON 요청 → 한 줄 JSON 응답)
+    - {"cmd": "status"}
+    - {"cmd": "run"}                                      : 즉시 큐 처리
+    - {"cmd": "enqueue", "patient_id": ..., "order_num": ...} : 작업 등록 후 즉시 처리
+    - {"cmd": "notify", "patient_id": ..., "order_num": ...}  : API(external 모드)의 업로드 알림 (디바운스 후 처리)
+    """
+    import json
+    import socketserver
+    from api import job_queue
+    from api.job_events import request_run, notify_upload
 
-        logger.info(f"{len(pending)}건 처리 시작")
-        for patient_id, order_num, api_key in pending:
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
             try:
-                raw_base_url = APIClient._get_api_base_url()
-                api_base_url = APIClient._normalize_url(raw_base_url)
-                path_info = fetch_bundle_as_path_info(patient_id, order_num, api_base_url, pd)
-                if path_info.empty:
-                    logger.warning(f"{patient_id}/{order_num}: 파일 메타데이터 없음, 건너뜀")
-                    continue
-                scores, question_meta = model_process(path_info, api_key)
-                success = save_scores_to_db(scores, order_num, patient_id, question_meta=question_meta)
-
-                if success:
-                    logger.info(f"{patient_id}/{order_num}: 모델링 완료 및 점수 저장")
+                req = json.loads(self.rfile.readline().decode("utf-8") or "{}")
+                cmd = req.get("cmd", "status")
+                if cmd == "status":
+                    resp = {"ok": True, "status": get_daemon_status()}
+                elif cmd == "run":
+                    request_run()
+                    resp = {"ok": True}
+                elif cmd == "enqueue":
+                    from api.database import SessionLocal
+                    db = SessionLocal()
+                    try:
+                        job_queue.enqueue_job(db, str(req["patient_id"]), int(req["order_num"]))
+                        db.commit()
+                    finally:
+                        db.close()
+                    request_run()
+                    resp = {"ok": True}
+                elif cmd == "notify":
+                    # 작업은 API가 업로드 트랜잭션에서 이미 등록함 → 깨우기만 (되돌려 보내지 않음)
+                    notify_upload(str(req["patient_id"]), int(req["order_num"]), forward=False)
+                    resp = {"ok": True}
                 else:
-                    logger.error(f"{patient_id}/{order_num}: 점수 저장 실패")
+                    resp = {"ok": False, "error": f"알 수 없는 명령: {cmd}"}
             except Exception as e:
-                logger.error(f"{patient_id}/{order_num}: 처리 실패 - {e}")
-    finally:
-        db.close()
+                resp = {"ok": False, "error": str(e)}
+            self.wfile.write((json.dumps(resp, ensure_ascii=False, default=str) + "\n").encode("utf-8"))
+
+    socketserver.ThreadingTCPServer.allow_reuse_address = True
+    server = socketserver.ThreadingTCPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="model-worker-control", daemon=True).start()
+    logger.info(f"제어 소켓 대기: {host}:{port}")
+    return server
 
 
-def main(loop: bool = True, interval: int = 300):
+def query_daemon(request: dict, host=DAEMON_HOST, port=DAEMON_PORT, timeout=10) -> dict:
+    """실행 중인 데몬에 제어 명령 전송"""
+    import json
+    import socket
+
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        sock.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        data = sock.makefile("rb").readline()
+    return json.loads(data.decode("utf-8"))
+
+
+def serve(interval: int = 300, slots: int = None, source: str = None, port: int = DAEMON_PORT):
+    """
+    데몬 모드: 환경/모델을 한 번만 준비하고 계속 상주
+    - 큐 처리 후 업로드 알림·제어 명령(run/enqueue) 또는 interval 경과까지 대기
+    - conda 환경은 삭제하지 않음 (다음 배치에서 재생성/재로드 비용 없음)
+    """
+    from api.job_events import wait_for_jobs
+
+    _set_daemon_state(mode="daemon", started_at=time.time())
+    pd, text, SessionLocal, APIClient, model_process, save_scores_to_db = _init_heavy_imports()
+    _start_control_server(port=port)
+    _warm_models()
+
+    logger.info(f"모델 워커 데몬 시작 (주기: {interval}초, 슬롯: {slots or WORKER_SLOTS}, 입력: {source or WORKER_SOURCE})")
+    while True:
+        pass_start = time.time()
+        _set_daemon_state(busy=True)
+        try:
+            process_pending_jobs(pd, text, SessionLocal, APIClient, model_process, save_scores_to_db, slots=slots, source=source)
+        except Exception as e:
+            logger.error(f"모델 워커 처리 중 오류: {e}")
+        finally:
+            with _DAEMON_LOCK:
+                _DAEMON_STATE["busy"] = False
+                _DAEMON_STATE["passes"] += 1
+                _DAEMON_STATE["last_pass_at"] = time.time()
+                _DAEMON_STATE["last_pass_seconds"] = round(time.time() - pass_start, 2)
+        wait_for_jobs(timeout=next_wait(SessionLocal, interval))
+
+
+def main(loop: bool = True, interval: int = 300, slots: int = None, source: str = None):
     pd, text, SessionLocal, APIClient, model_process, save_scores_to_db = _init_heavy_imports()
 
     if not loop:
-        process_pending_jobs(pd, text, SessionLocal, APIClient, model_process, save_scores_to_db)
+        process_pending_jobs(pd, text, SessionLocal, APIClient, model_process, save_scores_to_db, slots=slots, source=source)
         return
 
-    logger.info(f"모델 워커 시작 (주기: {interval}초)")
+    logger.info(f"모델 워커 시작 (주기: {interval}초, 슬롯: {slots or WORKER_SLOTS}, 입력: {source or WORKER_SOURCE})")
+    from api.job_events import wait_for_jobs
+
     while True:
-        process_pending_jobs(pd, text, SessionLocal, APIClient, model_process, save_scores_to_db)
-        time.sleep(interval)
+        process_pending_jobs(pd, text, SessionLocal, APIClient, model_process, save_scores_to_db, slots=slots, source=source)
+        # 같은 프로세스에서 업로드 API가 돌면 알림으로 즉시 깨어남, 아니면 interval 폴링
+        # (디바운스 대기 작업이 있으면 NOT_BEFORE가 풀리는 시각까지만)
+        wait_for_jobs(timeout=next_wait(SessionLocal, interval))
 
 
 if __name__ == "__main__":
+    import json
+    import argparse
+
+    parser = argparse.ArgumentParser(description="CLAP 모델링 워커")
+    parser.add_argument("--daemon", action="store_true", help="모델을 상주시키고 계속 실행 (conda 환경 유지)")
+    parser.add_argument("--status", action="store_true", help="실행 중인 데몬 상태 조회")
+    parser.add_argument("--run", action="store_true", help="실행 중인 데몬에 즉시 처리 요청")
+    parser.add_argument("--interval", type=int, default=300, help="안전망 폴링 주기(초)")
+    parser.add_argument("--slots", type=int, default=None)
+    parser.add_argument("--source", choices=["http", "db"], default=None)
+    parser.add_argument("--port", type=int, default=DAEMON_PORT, help="데몬 제어 소켓 포트 (127.0.0.1)")
+    args = parser.parse_args()
+
+    if args.status or args.run:
+        resp = query_daemon({"cmd": "status" if args.status else "run"}, port=args.port)
+        print(json.dumps(resp, ensure_ascii=False, indent=2, default=str))
+        sys.exit(0 if resp.get("ok") else 1)
+
     _ensure_conda_env()
-    main(loop=False)
-    _cleanup_conda_env()
+    if args.daemon:
+        serve(interval=args.interval, slots=args.slots, source=args.source, port=args.port)
+    else:
+        main(loop=False, slots=args.slots, source=args.source)
+        _cleanup_conda_env()
@@ -1,10 +1,22 @@
 import time
 import os
 import logging
+import threading
 import pandas as pd
 
 logger = logging.getLogger(__name__)
 
+# 동시 실행 슬롯(scripts/model_worker) 간 모델 공유 정책
+# - 로드된 모델 객체는 프로세스 전체가 공유 (슬롯마다 따로 로드하지 않음)
+# - 같은 단계는 한 번에 한 슬롯만 실행 (Keras predict 함수 생성/지연 로드 경쟁 방지)
+# - Whisper 체크포인트는 단계끼리 공유되므로(GUESS_END/SAY_OBJ, SAY_ANI/TALK_PIC)
+#   generate는 단계 잠금과 별도로 whisper_registry에서 체크포인트별로 직렬화
+# - 디코딩, 번들 다운로드, 점수 저장, 서로 다른 모델 단계는 슬롯끼리 병렬 실행
+_STAGE_LOCKS = {
+    name: threading.Lock()
+    for name in ['LTN_RPT', 'GUESS_END', 'SAY_OBJ', 'SAY_ANI', 'TALK_PIC', 'AH_SOUND', 'PTK_SOUND', 'TALK_CLEAN']
+}
+
 # Lazy loading 함수들
 def get_talk_pic():
     from models import talk_pic
@@ -38,6 +50,32 @@ def get_guess_end():
     from models import guess_end
     return guess_end
 
+def get_audio_clip():
+    from models import audio_clip
+    return audio_clip
+
+def get_score_cache():
+    from models import score_cache
+    return score_cache
+
+
+def _cached_stage(stage, module, file_infos, clips, compute, extras=None):
+    """
+    채점 캐시(models/score_cache.py)를 거쳐 단계 점수 계산
+    - 키: 오디오 해시 + 문항 코드/번호 + (단계, 모델 아티팩트) 지문 + extras[i]
+    - compute(missing): 캐시 미스 인덱스 리스트 → 그 순서대로 점수 리스트
+    """
+    score_cache = get_score_cache()
+    fp = score_cache.fingerprint([stage] + list(module.ARTIFACTS))
+    keys = [
+        score_cache.make_key(
+            clip.content_hash, fi['question_cd'], fi['question_no'], fi['question_minor_no'], fp,
+            extras[i] if extras is not None else None,
+        )
+        for i, (fi, clip) in enumerate(zip(file_infos, clips))
+    ]
+    return score_cache.cached_scores(keys, compute)
+
 
 def model_process(path_info, api_key=None):
     """
@@ -145,15 +183,37 @@ def model_process(path_info, api_key=None):
             # temp_path = download_file_from_db(api_key=api_key, **file_info)
             # return temp_path, True
 
+        # 파일당 디코딩(16kHz mono)은 작업 내 한 번만 수행하고 모든 단계가 공유
+        decoded_clips = {}
+
+        def load_clip(file_info):
+            # DB 직접 조회 소스는 이미 디코딩된 DecodedClip을 'file'에 담아 전달
+            if isinstance(file_info.get("file"), get_audio_clip().DecodedClip):
+                return file_info["file"]
+            temp_path, should_cleanup = resolve_audio_path(file_info)
+            if should_cleanup:
+                temp_files.append(temp_path)
+            if temp_path not in decoded_clips:
+                decoded_clips[temp_path] = get_audio_clip().load_clip(temp_path)
+            return decoded_clips[temp_path]
+
         if len(ltn_rpt_files) > 0:
             start_time = time.time()
             try:
                 ltn_rpt = get_ltn_rpt()
                 # 각 파일 호출
-                file_paths = [resolve_audio_path(fi)[0] for fi in ltn_rpt_files]
-                temp_files.extend([resolve_audio_path(fi)[0] for fi in ltn_rpt_files if resolve_audio_path(fi)[1]])
+                clips = [load_clip(fi) for fi in ltn_rpt_files]
 
-                ltn_rpt_result = ltn_rpt.predict_score(file_paths)
+                # 점수 배점이 문항 위치(point[i])에 따라 달라지므로 미스가 하나라도 있으면 전체를 다시 계산
+                def compute_ltn_rpt(missing):
+                    with _STAGE_LOCKS['LTN_RPT']:
+                        full = ltn_rpt.predict_score(clips)
+                    return [full[i] for i in missing]
+
+                ltn_rpt_result = _cached_stage(
+                    'LTN_RPT', ltn_rpt, ltn_rpt_files, clips, compute_ltn_rpt,
+                    extras=list(range(len(clips))),
+                )
 
                 # file_info에 모델링한 점수 추가
                 for i, file_info in enumerate(ltn_rpt_files):
@@ -168,12 +228,18 @@ def model_process(path_info, api_key=None):
             start_time = time.time()
             try:
                 guess_end = get_guess_end()
-                for idx, file_info in enumerate(guess_end_files):
-                    temp_path, should_cleanup = resolve_audio_path(file_info)
-                    if should_cleanup:
-                        temp_files.append(temp_path)
-                    # 한 번의 순회에서 점수 계산 + 할당
-                    file_info['score'] = int(guess_end.predict_guess_end_score(temp_path, idx))
+                clips = [load_clip(fi) for fi in guess_end_files]
+                # 캐시 미스 파일만 배치로 전사 + predict 1회 (prompt_id = 문항 순서)
+                def compute_guess_end(missing):
+                    with _STAGE_LOCKS['GUESS_END']:
+                        return guess_end.predict_guess_end_scores([clips[i] for i in missing], missing)
+
+                scores = _cached_stage(
+                    'GUESS_END', guess_end, guess_end_files, clips, compute_guess_end,
+                    extras=list(range(len(clips))),
+                )
+                for file_info, score in zip(guess_end_files, scores):
+                    file_info['score'] = int(score)
                     scored_file_infos.append(file_info)
                 logger.info(f"GUESS_END 모델 실행 시간: {time.time() - start_time:.2f}초")
             except Exception as e:
@@ -186,16 +252,23 @@ def model_process(path_info, api_key=None):
             start_time = time.time()
             try:
                 say_obj = get_say_obj()
-                file_paths = []
-                for file_info in say_obj_files:
-                    temp_path, should_cleanup = resolve_audio_path(file_info)
-                    file_paths.append(temp_path)
-                    if should_cleanup:
-                        temp_files.append(temp_path)
 
                 say_obj_score = None
-                if len(file_paths) >= 9:
-                    say_obj_score = round(say_obj.predict_say_object_total(file_paths[5], file_paths[8]), 2)
+                if len(say_obj_files) >= 9:
+                    rainbow_clip, swing_clip = load_clip(say_obj_files[5]), load_clip(say_obj_files[8])
+
+                    def compute_say_obj(missing):
+                        with _STAGE_LOCKS['SAY_OBJ']:
+                            return [round(say_obj.predict_say_object_total(rainbow_clip, swing_clip), 2)]
+
+                    # 대표 행(무지개) 키 + 그네 파일 해시를 함께 키로 사용
+                    if swing_clip.content_hash:
+                        say_obj_score = _cached_stage(
+                            'SAY_OBJ', say_obj, [say_obj_files[5]], [rainbow_clip], compute_say_obj,
+                            extras=[swing_clip.content_hash],
+                        )[0]
+                    else:
+                        say_obj_score = compute_say_obj([0])[0]
 
                 for i, file_info in enumerate(say_obj_files):
                     if i == 5 and say_obj_score is not None:
@@ -213,12 +286,15 @@ def model_process(path_info, api_key=None):
             start_time = time.time()
             try:
                 say_ani = get_say_ani()
-                for file_info in say_ani_files:
-                    temp_path, should_cleanup = resolve_audio_path(file_info)
-                    if should_cleanup:
-                        temp_files.append(temp_path)
-                    # 한 번의 순회에서 점수 계산 + 할당
-                    file_info['score'] = int(say_ani.score_audio(temp_path))
+                clips = [load_clip(fi) for fi in say_ani_files]
+                # 캐시 미스 파일만 배치 전사 + predict 1회
+                def compute_say_ani(missing):
+                    with _STAGE_LOCKS['SAY_ANI']:
+                        return say_ani.score_audio_batch([clips[i] for i in missing])
+
+                scores = _cached_stage('SAY_ANI', say_ani, say_ani_files, clips, compute_say_ani)
+                for file_info, score in zip(say_ani_files, scores):
+                    file_info['score'] = int(score)
                     scored_file_infos.append(file_info)
                 logger.info(f"SAY_ANI 모델 실행 시간: {time.time() - start_time:.2f}초")
             except Exception as e:
@@ -229,12 +305,15 @@ def model_process(path_info, api_key=None):
             start_time = time.time()
             try:
                 talk_pic = get_talk_pic()
-                for file_info in talk_pic_files:
-                    temp_path, should_cleanup = resolve_audio_path(file_info)
-                    if should_cleanup:
-                        temp_files.append(temp_path)
-                    # 한 번의 순회에서 점수 계산 + 할당
-                    file_info['score'] = int(talk_pic.score_audio(temp_path))
+                clips = [load_clip(fi) for fi in talk_pic_files]
+                # 캐시 미스 파일만 배치 전사 + predict 1회
+                def compute_talk_pic(missing):
+                    with _STAGE_LOCKS['TALK_PIC']:
+                        return talk_pic.score_audio_batch([clips[i] for i in missing])
+
+                scores = _cached_stage('TALK_PIC', talk_pic, talk_pic_files, clips, compute_talk_pic)
+                for file_info, score in zip(talk_pic_files, scores):
+                    file_info['score'] = int(score)
                     scored_file_infos.append(file_info)
                 logger.info(f"TALK_PIC 모델 실행 시간: {time.time() - start_time:.2f}초")
             except Exception as e:
@@ -246,11 +325,13 @@ def model_process(path_info, api_key=None):
             try:
                 ah_sound = get_ah_sound()
                 file_info = ah_sound_files[0]
-                temp_path, should_cleanup = resolve_audio_path(file_info)
-                if should_cleanup:
-                    temp_files.append(temp_path)
+                clip = load_clip(file_info)
                 # 점수 계산 + 할당
-                file_info['score'] = round(ah_sound.analyze_pitch_stability(temp_path), 2)
+                def compute_ah_sound(missing):
+                    with _STAGE_LOCKS['AH_SOUND']:
+                        return [round(ah_sound.analyze_pitch_stability(clip), 2)]
+
+                file_info['score'] = _cached_stage('AH_SOUND', ah_sound, [file_info], [clip], compute_ah_sound)[0]
                 scored_file_infos.append(file_info)
                 logger.info(f"AH_SOUND 모델 실행 시간: {time.time() - start_time:.2f}초")
             except Exception as e:
@@ -260,20 +341,26 @@ def model_process(path_info, api_key=None):
             start_time = time.time()
             try:
                 ptk_sound = get_ptk_sound()                
-                file_paths = []
-                for ptk_file in ptk_sound_files:
-                    temp_path, should_cleanup = resolve_audio_path(ptk_file)
-                    file_paths.append(temp_path)
-                    if should_cleanup:
-                        temp_files.append(temp_path)
+                clips = [load_clip(ptk_file) for ptk_file in ptk_sound_files]
+
+                # 앞 9개는 단일 음정(each), 이후는 전체 음정(whole) → 캐시 미스만 모델별 predict 1회
+                def compute_ptk_sound(missing):
+                    each_idx = [i for i in missing if i < 9]
+                    whole_idx = [i for i in missing if i >= 9]
+                    with _STAGE_LOCKS['PTK_SOUND']:
+                        each = ptk_sound.ptk_each_batch([clips[i] for i in each_idx]) if each_idx else []
+                        whole = ptk_sound.ptk_whole_batch([clips[i] for i in whole_idx]) if whole_idx else []
+                    by_idx = dict(zip(each_idx + whole_idx, list(each) + list(whole)))
+                    return [by_idx[i] for i in missing]
+
+                ptk_scores = _cached_stage(
+                    'PTK_SOUND', ptk_sound, ptk_sound_files, clips, compute_ptk_sound,
+                    extras=['each' if i < 9 else 'whole' for i in range(len(clips))],
+                )
                 
-                for i, path in enumerate(file_paths):
+                for i, score in enumerate(ptk_scores):
                     file_info = ptk_sound_files[i]  # 각 파일의 정보 사용
-                    if i >= 9:
-                        file_info['score'] = round(ptk_sound.ptk_whole(path), 2)
-                    else:
-                        file_info['score'] = round(ptk_sound.ptk_each(path), 2)
-
+                    file_info['score'] = round(score, 2)
                     scored_file_infos.append(file_info)
                     
                 logger.info(f"PTK_SOUND 모델 실행 시간: {time.time() - start_time:.2f}초")
@@ -286,17 +373,22 @@ def model_process(path_info, api_key=None):
             start_time = time.time()
             try:
                 talk_clean = get_talk_clean()
-                file_items = []
-                for file_info in talk_clean_files:
-                    temp_path, should_cleanup = resolve_audio_path(file_info)
-                    file_items.append({
-                        "path": temp_path,
-                        "question_no": file_info['question_no']
-                    })
-                    if should_cleanup:
-                        temp_files.append(temp_path)
-                
-                talk_clean_result = talk_clean.main(file_items)
+                clips = [load_clip(file_info) for file_info in talk_clean_files]
+
+                def compute_talk_clean(missing):
+                    file_items = [
+                        {"path": clips[i], "question_no": talk_clean_files[i]['question_no']}
+                        for i in missing
+                    ]
+                    with _STAGE_LOCKS['TALK_CLEAN']:
+                        result = talk_clean.main(file_items)
+                    if isinstance(result, str):
+                        # 문항 번호 검증 실패 메시지 → 점수 없음 (캐시하지 않음)
+                        logger.error(f"TALK_CLEAN: {result}")
+                        return [None] * len(missing)
+                    return result
+
+                talk_clean_result = _cached_stage('TALK_CLEAN', talk_clean, talk_clean_files, clips, compute_talk_clean)
                 
                 # 모델 실행 후, 결과를 각 file_info에 할당 (한 번만 순회)
                 for i, file_info in enumerate(talk_clean_files):
@@ -33,9 +33,12 @@ def model_common_path():
     return os.path.join(repo_root.as_posix(), "models")
 
 # TensorFlow 설정 (import 전에 설정)
+# 기본은 1 스레드. Whisper를 서브프로세스로 분리(WHISPER_EXECUTION=subprocess)하면
+# MODEL_TF_THREADS로 TF 쪽 예산을 늘릴 수 있음
+TF_THREADS = os.getenv('MODEL_TF_THREADS', '1')
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
-os.environ['TF_NUM_INTEROP_THREADS'] = '1'
-os.environ['TF_NUM_INTRAOP_THREADS'] = '1'
+os.environ['TF_NUM_INTEROP_THREADS'] = TF_THREADS
+os.environ['TF_NUM_INTRAOP_THREADS'] = TF_THREADS
 
 ENV_NAME = "CLAP_PC"
 